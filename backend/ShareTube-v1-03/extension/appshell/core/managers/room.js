@@ -6,6 +6,7 @@ import { syncLiveList, isYouTubeUrl } from "../utils/utils.js";
 export default class RoomManager {
     constructor(app) {
         this.app = app;
+        this.presenceVersion = null;
     }
 
     get hashRoomCode() {
@@ -63,11 +64,16 @@ export default class RoomManager {
         return url.toString();
     }
 
-    async onSocketPresenceUpdate(presence) {
-        if (!Array.isArray(presence)) return;
+    // Presence protocol: presence.update carries a full snapshot {code, version, users};
+    // presence.joined/left/ready are deltas that each bump the room's presence version.
+    currentUsers() {
+        return Array.isArray(state.users) ? state.users : state.users.get();
+    }
+
+    syncUsers(remoteItems) {
         syncLiveList({
             localList: state.users,
-            remoteItems: presence,
+            remoteItems,
             extractRemoteId: (v) => v.id,
             extractLocalId: (u) => u.id,
             createInstance: (item) => new ShareTubeUser(item),
@@ -75,8 +81,49 @@ export default class RoomManager {
         });
     }
 
-    onSocketUserReadyUpdate(payload) {
-        if (!payload || payload.user_id == null) return;
+    async onSocketPresenceUpdate(presence) {
+        // Older servers sent a bare member array without a version
+        const users = Array.isArray(presence) ? presence : presence && presence.users;
+        if (!Array.isArray(users)) return;
+        this.presenceVersion = Array.isArray(presence) ? null : presence.version;
+        this.syncUsers(users);
+    }
+
+    // Returns true when the delta should be applied; requests a snapshot on a version gap.
+    acceptPresenceDelta(payload) {
+        if (!payload || payload.version == null) return false;
+        // No snapshot yet (joining): the snapshot that follows already includes this change
+        if (this.presenceVersion == null) return false;
+        if (payload.version <= this.presenceVersion) return false;
+        if (payload.version === this.presenceVersion + 1) {
+            this.presenceVersion = payload.version;
+        } else {
+            // Missed a delta: apply this one (deltas are idempotent) and resync from a snapshot
+            this.app.socket.emit("presence.sync", { code: state.roomCode.get() });
+        }
+        return true;
+    }
+
+    onSocketPresenceJoined(payload) {
+        if (!this.acceptPresenceDelta(payload) || !payload.user) return;
+        const remoteItems = this.currentUsers()
+            .filter((u) => u && u.id !== payload.user.id)
+            .map((u) => ({ id: u.id }));
+        remoteItems.push(payload.user);
+        this.syncUsers(remoteItems);
+    }
+
+    onSocketPresenceLeft(payload) {
+        if (!this.acceptPresenceDelta(payload) || payload.user_id == null) return;
+        this.syncUsers(
+            this.currentUsers()
+                .filter((u) => u && u.id !== payload.user_id)
+                .map((u) => ({ id: u.id }))
+        );
+    }
+
+    onSocketPresenceReady(payload) {
+        if (!this.acceptPresenceDelta(payload) || payload.user_id == null) return;
         const user = state.getUserById(payload.user_id);
         if (!user || !user.ready) return;
         user.ready.set(Boolean(payload.ready));
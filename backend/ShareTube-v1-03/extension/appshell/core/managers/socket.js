@@ -3,12 +3,24 @@ console.log("cs/socket.js loaded");
 
 import state from "../state/state.js";
 import { io } from "../../../shared/dep/socket.io.min.esm.js";
+import { decode as decodeMsgpack } from "../../../shared/dep/msgpack.esm.js";
+import { inflateRaw } from "../../../shared/dep/inflate.esm.js";
+
+// Mutating events sent with a request_id and retried until acknowledged; every retry of one user
+// action reuses its id, so the server answers a resend with the original result instead of
+// running it again
+const IDEMPOTENT_EVENTS = new Set(["queue.add", "room.control.skip", "queue.continue_next"]);
+const IDEMPOTENT_ATTEMPTS = 3;
+const IDEMPOTENT_ACK_TIMEOUT_MS = 15000;
 
 // Ensure a single connected Socket.IO client on the provided app instance
 export default class SocketManager {
     constructor(app) {
         this.app = app;
         this.binds = {};
+        // Last room broadcast seq seen, used to resume a rejoin without a full snapshot
+        this.lastSeq = null;
+        this.lastSeqCode = null;
     }
 
     async withSocket(callback) {
@@ -16,9 +28,27 @@ export default class SocketManager {
         return await callback(this.socket);
     }
 
-    async joinRoom(code) {
+    async joinRoom(code, { resume = false } = {}) {
         // Include a client-side timestamp so the server can echo it back for NTP-style offset calc
-        return await this.emit("room.join", { code, clientTimestamp: Date.now() });
+        const payload = { code, clientTimestamp: Date.now() };
+        // On reconnect, ask the server to replay only what we missed since the last seq
+        const holdsRoom = this.lastSeqCode === code && this.lastSeq != null;
+        if (resume && holdsRoom) payload.last_seq = this.lastSeq;
+        // Already showing this room: the server answers "not modified" if nothing changed
+        else if (holdsRoom && state.inRoom.get() && state.roomCode.get() === code) payload.snapshot_seq = this.lastSeq;
+        return await this.emit("room.join", payload);
+    }
+
+    trackSeq(event, data) {
+        if (!data || typeof data.seq !== "number") return;
+        const code = data.code || state.roomCode.get();
+        // A snapshot join result resets the baseline; broadcasts only move it forward
+        if (event === "user.join.result" || code !== this.lastSeqCode || this.lastSeq == null) {
+            this.lastSeqCode = code;
+            this.lastSeq = data.seq;
+        } else {
+            this.lastSeq = Math.max(this.lastSeq, data.seq);
+        }
     }
 
     async ensureSocket() {
@@ -31,8 +61,13 @@ export default class SocketManager {
         // Without a token, we cannot authenticate the websocket
         if (!auth_token) return null;
         try {
-            // Create a websocket-only Socket.IO client with auth token in query
-            this.socket = io(base, { transports: ["websocket"], path: "/socket.io", query: { token: auth_token } });
+            // Create a websocket-only Socket.IO client with auth token in query; codec=msgpack and
+            // compress=deflate ask for binary and compressed large frames (ignored when disabled)
+            this.socket = io(base, {
+                transports: ["websocket"],
+                path: "/socket.io",
+                query: { token: auth_token, codec: "msgpack", compress: "deflate" },
+            });
             // Basic connection lifecycle logs
             this.socket.on("connect", () => {
                 console.log("socket.io connected");
@@ -43,7 +78,7 @@ export default class SocketManager {
                 if (wasInRoom) {
                     console.log("ShareTube: Reconnecting to room", reconnectCode);
                     try {
-                        this.joinRoom(reconnectCode);
+                        this.joinRoom(reconnectCode, { resume: true });
                     } catch (e) {
                         console.warn("ShareTube: Failed to rejoin room on reconnect", e);
                     }
@@ -55,7 +90,7 @@ export default class SocketManager {
                 console.log("socket.io disconnected");
             });
             // Handle authentication expiration
-            this.socket.on("auth.expired", async () => {
+            const onAuthExpired = async () => {
                 console.warn("ShareTube: Authentication token expired, clearing sign-in state");
                 try {
                     // Clear reconnect room code since user needs to re-authenticate
@@ -64,26 +99,35 @@ export default class SocketManager {
                 } catch (e) {
                     console.warn("ShareTube: failed to clear auth state on token expiration", e);
                 }
+            };
+            this.socket.on("auth.expired", onAuthExpired);
+            // The server validates the token once at connect and refuses the socket when it is bad
+            this.socket.on("connect_error", (err) => {
+                if (err && err.message === "auth.expired") onAuthExpired();
+                // A worker at capacity refuses the socket with a jittered delay; refused sockets
+                // do not reconnect on their own
+                if (err && err.message === "server.busy") {
+                    const delay = Number(err.data && err.data.retry_after_ms) || 2000;
+                    console.warn("ShareTube: server busy, retrying connection in", delay, "ms");
+                    setTimeout(() => {
+                        if (this.socket && !this.socket.connected) this.socket.connect();
+                    }, delay);
+                }
             });
+            // Events the server shed under load ({event, retry_after_ms})
+            this.socket.on("server.busy", (payload) => console.warn("ShareTube: server busy, event rejected", payload));
+            this.socket.on("rate_limited", (payload) => console.warn("ShareTube: event rate limited", payload));
+            this.socket.onAny((event, data) => this.trackSeq(event, data));
+            // Server-side emit buffer merges consecutive events for this socket into one frame
+            this.socket.on("emit.batch", (payload) => this.dispatchBatch(payload));
+            // Negotiated msgpack frames carry one {event, data} pair as a binary attachment
+            this.socket.on("emit.packed", (buffer) => this.dispatchPacked(buffer));
+            // Large frames arrive raw-deflated; inflated synchronously so event order is preserved
+            this.socket.on("emit.deflated", (format, buffer) => this.dispatchDeflated(format, buffer));
             // Low-level channel diagnostics/ping
             this.socket.on("hello", (payload) => console.log("socket.io hello", payload));
             this.socket.on("hello", (payload) => console.log("socket.io hello", payload));
-
-            const engine = this.socket.io && this.socket.io.engine;
-            if (engine) {
-                // Hook into low-level Engine.IO ping/pong so we can forward heartbeats
-                engine.on("ping", () => console.log("socket.io engine ping"));
-                engine.on("pong", (latency) => {
-                    try {
-                        // Relay Engine.IO heartbeat to the backend so it can mark this user as alive
-                        this.socket.emit("client.pong", { ts: Date.now(), latency });
-                    } catch (err) {
-                        console.warn("ShareTube: failed to emit client.pong heartbeat", err);
-                    }
-                });
-            } else {
-                console.warn("ShareTube: unable to attach to socket.io engine for heartbeat forwarding");
-            }
+            // Liveness comes from the Engine.IO ping/pong itself; the server records transport pongs
             this.bindHandlers();
         } catch (e) {
             // If connection fails, reset socket and warn
@@ -101,6 +145,55 @@ export default class SocketManager {
         }
     }
 
+    dispatchLocal(event, data, source) {
+        this.trackSeq(event, data);
+        for (const listener of this.socket.listeners(event)) {
+            try {
+                listener(data);
+            } catch (e) {
+                console.warn(`ShareTube: ${source} listener failed`, event, e);
+            }
+        }
+    }
+
+    dispatchBatch(payload) {
+        const events = Array.isArray(payload?.events) ? payload.events : [];
+        for (const { event, data } of events) {
+            if (!event) continue;
+            this.dispatchLocal(event, data, "emit.batch");
+        }
+    }
+
+    dispatchPacked(buffer) {
+        let frame;
+        try {
+            frame = decodeMsgpack(buffer);
+        } catch (e) {
+            console.warn("ShareTube: failed to decode emit.packed frame", e);
+            return;
+        }
+        if (!frame || !frame.event) return;
+        this.dispatchLocal(frame.event, frame.data, "emit.packed");
+    }
+
+    dispatchDeflated(format, buffer) {
+        let event;
+        let data;
+        try {
+            const body = inflateRaw(buffer);
+            if (format === "msgpack") {
+                ({ event, data } = decodeMsgpack(body));
+            } else {
+                [event, data] = JSON.parse(new TextDecoder("utf-8").decode(body));
+            }
+        } catch (e) {
+            console.warn("ShareTube: failed to decode emit.deflated frame", format, e);
+            return;
+        }
+        if (!event) return;
+        this.dispatchLocal(event, data, "emit.deflated");
+    }
+
     on(event, callback) {
         if (this.socket) {
             this.socket.on(event, callback);
@@ -134,11 +227,25 @@ export default class SocketManager {
     }
 
     async emit(event, data) {
+        const payload = { code: state.roomCode.get(), ...data };
+        if (IDEMPOTENT_EVENTS.has(event)) return await this.emitIdempotent(event, payload);
         return await this.withSocket(async (socket) => {
-            return await socket.emit(event, {
-                code: state.roomCode.get(),
-                ...data,
-            });
+            return await socket.emit(event, payload);
+        });
+    }
+
+    async emitIdempotent(event, payload) {
+        // One id per user action, kept across retries (including ones buffered over a reconnect)
+        if (!payload.request_id) payload.request_id = crypto.randomUUID();
+        return await this.withSocket(async (socket) => {
+            for (let attempt = 1; attempt <= IDEMPOTENT_ATTEMPTS; attempt++) {
+                try {
+                    return await socket.timeout(IDEMPOTENT_ACK_TIMEOUT_MS).emitWithAck(event, payload);
+                } catch (e) {
+                    console.warn("ShareTube: no ack, retrying", event, { attempt, request_id: payload.request_id });
+                }
+            }
+            return null;
         });
     }
 }
@@ -11,6 +11,9 @@ export default class VirtualPlayer {
     constructor(app) {
         this.app = app;
         this.verbose = false;
+        // Version of the local queue copy (null until the join snapshot arrives)
+        this.queueId = null;
+        this.queueVersion = null;
         this.eventHandlers = {
             "virtualplayer.user-event": [],
             "virtualplayer.room-join-result": [],
@@ -33,8 +36,11 @@ export default class VirtualPlayer {
         socket.on("queue.added", this.onQueueAdded.bind(this));
         socket.on("queue.removed", this.onQueueRemoved.bind(this));
         socket.on("queue.moved", this.onQueueMoved.bind(this));
+        socket.on("queue.batch", this.onQueueBatch.bind(this));
+        socket.on("queue.update", this.onQueueUpdate.bind(this));
         socket.on("user.join.result", this.onRoomJoinResult.bind(this));
         socket.on("room.playback", this.onRoomPlayback.bind(this));
+        socket.on("room.control.seek.ack", this.onSeekAck.bind(this));
         socket.on("room.settings.update", this.onRoomSettingsUpdate.bind(this));
         socket.on("room.error", this.onRoomError.bind(this));
     }
@@ -103,53 +109,80 @@ export default class VirtualPlayer {
         this.updateNextUpItem();
     }
 
+    // Apply a single {id, position, status} update without re-rendering
+    applyQueueMove(update) {
+        if (!update?.id) return;
+        const item = state.queue.find((i) => i.id === update.id);
+        if (item) {
+            if (update.position !== undefined) item.position.set(update.position);
+            if (update.status !== undefined) item.status.set(update.status);
+        }
+
+        // Keep currentPlaying.item status in sync when it was affected by the move
+        const currentPlayingItem = state.currentPlaying.item.get();
+        if (currentPlayingItem && currentPlayingItem !== item && update.id === currentPlayingItem.id && update.status !== undefined) {
+            currentPlayingItem.status.set(update.status);
+        }
+    }
+
     async onQueueMoved(data) {
         if (!data.id) return;
         // Apply bulk updates when provided (used by reorder operations that renumber positions)
         const updates = data?.opts?.updates;
         if (Array.isArray(updates) && updates.length) {
-            for (const u of updates) {
-                if (!u?.id) continue;
-                const it = state.queue.find((i) => i.id === u.id);
-                if (!it) continue;
-                if (u.position !== undefined) it.position.set(u.position);
-                if (u.status !== undefined) it.status.set(u.status);
-            }
+            updates.forEach((u) => this.applyQueueMove(u));
         } else {
-            const item = state.queue.find((i) => i.id === data.id);
-            if (!item) return;
-            if (data.position !== undefined) item.position.set(data.position);
-            if (data.status !== undefined) item.status.set(data.status);
+            if (!state.queue.find((i) => i.id === data.id)) return;
+            this.applyQueueMove(data);
         }
 
-        // Update currentPlaying.item status if it was affected by the move
-        const currentPlayingItem = state.currentPlaying.item.get();
-        if (currentPlayingItem) {
-            let currentItemUpdated = false;
-
-            // Check bulk updates
-            if (Array.isArray(updates) && updates.length) {
-                const update = updates.find((u) => u?.id === currentPlayingItem.id);
-                if (update && update.status !== undefined) {
-                    currentPlayingItem.status.set(update.status);
-                    currentItemUpdated = true;
-                }
-            }
-            // Check single update
-            else if (data.id === currentPlayingItem.id && data.status !== undefined) {
-                currentPlayingItem.status.set(data.status);
-                currentItemUpdated = true;
-            }
+        this.refreshQueueLists();
+        this.updateNextUpItem();
+    }
 
-            if (currentItemUpdated) {
-                console.log(`Updated currentPlaying.item status to: ${currentPlayingItem.status.get()}`);
+    applyQueueOp(op) {
+        if (!op) return;
+        if (op.op === "insert") {
+            if (!op.item || state.queue.find((i) => i.id === op.item.id)) return;
+            state.queue.push(new ShareTubeQueueItem(this.app, op.item));
+        } else if (op.op === "move" || op.op === "update") {
+            this.applyQueueMove(op);
+        } else if (op.op === "remove") {
+            const idx = state.queue.findIndex((i) => i.id === op.id);
+            if (idx !== -1) state.queue.splice(idx, 1);
+        }
+    }
+
+    // One versioned patch per committed server change; apply in order, catch up on a gap
+    async onQueueBatch(data) {
+        if (!this.isForCurrentRoom(data?.code)) return;
+        const ops = Array.isArray(data.ops) ? data.ops : [];
+        if (data.version != null) {
+            // No snapshot yet (joining): the join snapshot already includes this change
+            if (this.queueVersion == null) return;
+            if (data.queue_id !== this.queueId || data.version > this.queueVersion + 1) {
+                this.app.socket.emit("queue.sync", {
+                    code: state.roomCode.get(),
+                    queue_id: this.queueId,
+                    version: this.queueVersion,
+                });
+                return;
             }
+            if (data.version <= this.queueVersion) return;
+            this.queueVersion = data.version;
         }
+        if (!ops.length) return;
+        ops.forEach((op) => this.applyQueueOp(op));
 
         this.refreshQueueLists();
         this.updateNextUpItem();
     }
 
+    async onQueueUpdate(data) {
+        if (!this.isForCurrentRoom(data?.code)) return;
+        this.loadQueueEntries(data);
+    }
+
     refreshQueueLists() {
         // LiveList behaves like an array; use get() if provided, else treat as array
         const base = typeof state.queue.get === "function" ? state.queue.get() : state.queue;
@@ -174,6 +207,8 @@ export default class VirtualPlayer {
 
     async loadQueueEntries(queue) {
         if (!queue || !queue.entries) return;
+        this.queueId = queue.id;
+        this.queueVersion = queue.version ?? 0;
         // Clear the queue before populating to prevent duplicates when rejoining
         state.queue.clear();
         for (const entry of queue.entries) {
@@ -231,6 +266,13 @@ export default class VirtualPlayer {
         state.inRoom.set(true);
         this.app.youtubePlayer?.start();
 
+        // Resumed rejoin (missed broadcasts are replayed right after this result) or an
+        // unchanged room: the local copy is current, so there is no snapshot to apply
+        if (result.resumed || result.not_modified) {
+            this.emit("virtualplayer.room-join-result", result);
+            return;
+        }
+
         const snapshot = result.snapshot;
         state.adSyncMode.set(snapshot.ad_sync_mode);
         state.roomAutoadvanceOnEnd.set(snapshot.autoadvance_on_end ?? true);
@@ -280,6 +322,15 @@ export default class VirtualPlayer {
         if (data.trigger === "room.control.seek" && !this.shouldSuppressTimestampUpdate(data)) this.applyTimestamp();
     }
 
+    onSeekAck(data) {
+        if (!this.isForCurrentRoom(data.code)) return;
+        // The server folds seek bursts into one room.playback; move our own player right away.
+        // Frame steps already happened locally.
+        if (data.frame_step !== undefined && data.frame_step !== null) return;
+        if (typeof data.progress_ms !== "number") return;
+        this.app.youtubePlayer?.setDesiredProgressMs(data.progress_ms);
+    }
+
     playerStateChange(priorState, newState) {
         if (priorState === "playing" && newState === "paused") return this.app.youtubePlayer?.setDesiredState("paused");
         if (priorState === "paused" && newState === "playing")
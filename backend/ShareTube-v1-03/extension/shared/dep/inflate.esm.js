@@ -0,0 +1,169 @@
+// Minimal synchronous raw DEFLATE (RFC 1951) decoder for the server's "emit.deflated" frames.
+// Synchronous on purpose: DecompressionStream is async and would let later (uncompressed)
+// Socket.IO events overtake a compressed one.
+
+const LENGTH_BASE = [
+    3, 4, 5, 6, 7, 8, 9, 10, 11, 13, 15, 17, 19, 23, 27, 31, 35, 43, 51, 59, 67, 83, 99, 115, 131, 163, 195, 227, 258,
+];
+const LENGTH_EXTRA = [0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 5, 5, 5, 5, 0];
+const DIST_BASE = [
+    1, 2, 3, 4, 5, 7, 9, 13, 17, 25, 33, 49, 65, 97, 129, 193, 257, 385, 513, 769, 1025, 1537, 2049, 3073, 4097, 6145,
+    8193, 12289, 16385, 24577,
+];
+const DIST_EXTRA = [0, 0, 0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 13, 13];
+const CODE_LENGTH_ORDER = [16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15];
+
+// Canonical Huffman table: number of codes per bit length and symbols ordered by code
+function buildTable(lengths) {
+    const counts = new Uint16Array(16);
+    for (const length of lengths) counts[length]++;
+    counts[0] = 0;
+    const offsets = new Uint16Array(16);
+    for (let length = 1; length < 16; length++) offsets[length] = offsets[length - 1] + counts[length - 1];
+    const symbols = new Uint16Array(lengths.length);
+    for (let symbol = 0; symbol < lengths.length; symbol++) {
+        if (lengths[symbol]) symbols[offsets[lengths[symbol]]++] = symbol;
+    }
+    return { counts, symbols };
+}
+
+let fixedTables = null;
+
+function getFixedTables() {
+    if (!fixedTables) {
+        const lengths = new Uint8Array(288);
+        lengths.fill(8, 0, 144);
+        lengths.fill(9, 144, 256);
+        lengths.fill(7, 256, 280);
+        lengths.fill(8, 280, 288);
+        fixedTables = { literals: buildTable(lengths), distances: buildTable(new Uint8Array(30).fill(5)) };
+    }
+    return fixedTables;
+}
+
+export function inflateRaw(input) {
+    const bytes = input instanceof Uint8Array ? input : new Uint8Array(input);
+    let position = 0;
+    let bitBuffer = 0;
+    let bitCount = 0;
+    let output = new Uint8Array(Math.max(1024, bytes.length * 4));
+    let length = 0;
+
+    const bits = (need) => {
+        while (bitCount < need) {
+            if (position >= bytes.length) throw new Error("inflate: unexpected end of input");
+            bitBuffer |= bytes[position++] << bitCount;
+            bitCount += 8;
+        }
+        const value = bitBuffer & ((1 << need) - 1);
+        bitBuffer >>>= need;
+        bitCount -= need;
+        return value;
+    };
+    const ensure = (extra) => {
+        if (length + extra <= output.length) return;
+        let size = output.length * 2;
+        while (size < length + extra) size *= 2;
+        const grown = new Uint8Array(size);
+        grown.set(output.subarray(0, length));
+        output = grown;
+    };
+    const decodeSymbol = (table) => {
+        let code = 0;
+        let first = 0;
+        let index = 0;
+        for (let bitLength = 1; bitLength < 16; bitLength++) {
+            code |= bits(1);
+            const count = table.counts[bitLength];
+            if (code - count < first) return table.symbols[index + (code - first)];
+            index += count;
+            first = (first + count) << 1;
+            code <<= 1;
+        }
+        throw new Error("inflate: invalid Huffman code");
+    };
+
+    const stored = () => {
+        bitBuffer = 0;
+        bitCount = 0;
+        if (position + 4 > bytes.length) throw new Error("inflate: truncated stored block");
+        const size = bytes[position] | (bytes[position + 1] << 8);
+        position += 4;
+        if (position + size > bytes.length) throw new Error("inflate: truncated stored block");
+        ensure(size);
+        output.set(bytes.subarray(position, position + size), length);
+        length += size;
+        position += size;
+    };
+
+    const dynamicTables = () => {
+        const literalCount = bits(5) + 257;
+        const distanceCount = bits(5) + 1;
+        const codeLengthCount = bits(4) + 4;
+        const codeLengths = new Uint8Array(19);
+        for (let i = 0; i < codeLengthCount; i++) codeLengths[CODE_LENGTH_ORDER[i]] = bits(3);
+        const codeLengthTable = buildTable(codeLengths);
+
+        const lengths = new Uint8Array(literalCount + distanceCount);
+        let index = 0;
+        while (index < lengths.length) {
+            const symbol = decodeSymbol(codeLengthTable);
+            if (symbol < 16) {
+                lengths[index++] = symbol;
+                continue;
+            }
+            let repeat;
+            let value = 0;
+            if (symbol === 16) {
+                if (index === 0) throw new Error("inflate: repeat without previous length");
+                value = lengths[index - 1];
+                repeat = 3 + bits(2);
+            } else if (symbol === 17) {
+                repeat = 3 + bits(3);
+            } else {
+                repeat = 11 + bits(7);
+            }
+            if (index + repeat > lengths.length) throw new Error("inflate: too many code lengths");
+            lengths.fill(value, index, index + repeat);
+            index += repeat;
+        }
+        return {
+            literals: buildTable(lengths.subarray(0, literalCount)),
+            distances: buildTable(lengths.subarray(literalCount)),
+        };
+    };
+
+    const compressed = ({ literals, distances }) => {
+        for (;;) {
+            const symbol = decodeSymbol(literals);
+            if (symbol < 256) {
+                ensure(1);
+                output[length++] = symbol;
+                continue;
+            }
+            if (symbol === 256) return;
+            const lengthIndex = symbol - 257;
+            if (lengthIndex >= 29) throw new Error("inflate: invalid length symbol");
+            const copyLength = LENGTH_BASE[lengthIndex] + bits(LENGTH_EXTRA[lengthIndex]);
+            const distanceIndex = decodeSymbol(distances);
+            if (distanceIndex >= 30) throw new Error("inflate: invalid distance symbol");
+            const distance = DIST_BASE[distanceIndex] + bits(DIST_EXTRA[distanceIndex]);
+            if (distance > length) throw new Error("inflate: distance too far back");
+            ensure(copyLength);
+            for (let i = 0; i < copyLength; i++, length++) output[length] = output[length - distance];
+        }
+    };
+
+    let last = 0;
+    while (!last) {
+        last = bits(1);
+        const type = bits(2);
+        if (type === 0) stored();
+        else if (type === 1) compressed(getFixedTables());
+        else if (type === 2) compressed(dynamicTables());
+        else throw new Error("inflate: invalid block type");
+    }
+    return output.subarray(0, length);
+}
+
+export default { inflateRaw };
@@ -0,0 +1,162 @@
+// Minimal MessagePack decoder for the server's binary "emit.packed" frames.
+// Decodes the full MessagePack type set except extension types, which are returned as
+// { type, data } (the server never emits them). Maps decode to plain objects.
+
+const textDecoder = new TextDecoder("utf-8");
+
+export function decode(input) {
+    const bytes = input instanceof Uint8Array ? input : new Uint8Array(input);
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let offset = 0;
+
+    const str = (length) => {
+        const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+        offset += length;
+        return value;
+    };
+    const bin = (length) => {
+        const value = bytes.slice(offset, offset + length);
+        offset += length;
+        return value;
+    };
+    const array = (length) => {
+        const value = new Array(length);
+        for (let i = 0; i < length; i++) value[i] = read();
+        return value;
+    };
+    const map = (length) => {
+        const value = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            value[key] = read();
+        }
+        return value;
+    };
+    const ext = (length) => {
+        const type = view.getInt8(offset);
+        offset += 1;
+        return { type, data: bin(length) };
+    };
+    const uint64 = () => {
+        const value = view.getUint32(offset) * 2 ** 32 + view.getUint32(offset + 4);
+        offset += 8;
+        return value;
+    };
+    const int64 = () => {
+        const value = view.getInt32(offset) * 2 ** 32 + view.getUint32(offset + 4);
+        offset += 8;
+        return value;
+    };
+
+    function read() {
+        const byte = bytes[offset++];
+        if (byte <= 0x7f) return byte;
+        if (byte <= 0x8f) return map(byte & 0x0f);
+        if (byte <= 0x9f) return array(byte & 0x0f);
+        if (byte <= 0xbf) return str(byte & 0x1f);
+        if (byte >= 0xe0) return byte - 0x100;
+        let value;
+        switch (byte) {
+            case 0xc0:
+                return null;
+            case 0xc2:
+                return false;
+            case 0xc3:
+                return true;
+            case 0xc4:
+                return bin(bytes[offset++]);
+            case 0xc5:
+                value = view.getUint16(offset);
+                offset += 2;
+                return bin(value);
+            case 0xc6:
+                value = view.getUint32(offset);
+                offset += 4;
+                return bin(value);
+            case 0xc7:
+                return ext(bytes[offset++]);
+            case 0xc8:
+                value = view.getUint16(offset);
+                offset += 2;
+                return ext(value);
+            case 0xc9:
+                value = view.getUint32(offset);
+                offset += 4;
+                return ext(value);
+            case 0xca:
+                value = view.getFloat32(offset);
+                offset += 4;
+                return value;
+            case 0xcb:
+                value = view.getFloat64(offset);
+                offset += 8;
+                return value;
+            case 0xcc:
+                return bytes[offset++];
+            case 0xcd:
+                value = view.getUint16(offset);
+                offset += 2;
+                return value;
+            case 0xce:
+                value = view.getUint32(offset);
+                offset += 4;
+                return value;
+            case 0xcf:
+                return uint64();
+            case 0xd0:
+                return view.getInt8(offset++);
+            case 0xd1:
+                value = view.getInt16(offset);
+                offset += 2;
+                return value;
+            case 0xd2:
+                value = view.getInt32(offset);
+                offset += 4;
+                return value;
+            case 0xd3:
+                return int64();
+            case 0xd4:
+                return ext(1);
+            case 0xd5:
+                return ext(2);
+            case 0xd6:
+                return ext(4);
+            case 0xd7:
+                return ext(8);
+            case 0xd8:
+                return ext(16);
+            case 0xd9:
+                return str(bytes[offset++]);
+            case 0xda:
+                value = view.getUint16(offset);
+                offset += 2;
+                return str(value);
+            case 0xdb:
+                value = view.getUint32(offset);
+                offset += 4;
+                return str(value);
+            case 0xdc:
+                value = view.getUint16(offset);
+                offset += 2;
+                return array(value);
+            case 0xdd:
+                value = view.getUint32(offset);
+                offset += 4;
+                return array(value);
+            case 0xde:
+                value = view.getUint16(offset);
+                offset += 2;
+                return map(value);
+            case 0xdf:
+                value = view.getUint32(offset);
+                offset += 4;
+                return map(value);
+            default:
+                throw new Error(`msgpack: unknown type byte 0x${byte.toString(16)}`);
+        }
+    }
+
+    return read();
+}
+
+export default { decode };
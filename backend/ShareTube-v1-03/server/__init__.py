@@ -39,6 +39,10 @@ from .config import Config, START_DEBUG_CONFIG_DUMP
 # Import shared Flask extensions (SQLAlchemy and SocketIO)
 from .extensions import db, socketio
 
+# Import the shared JSON codec (orjson when installed) for Flask and Socket.IO
+from .lib import json_codec
+from .lib.json_codec import CodecJSONProvider
+
 # Import migrations runner (currently placeholder)
 from .migrations import run_all_migrations
 
@@ -153,6 +157,8 @@ def get_user_id_from_auth_header() -> Optional[int]:
 def create_app() -> Flask:
     # Create the Flask app instance
     app = Flask(__name__)
+    # jsonify/request.get_json go through the shared codec (orjson when installed)
+    app.json = CodecJSONProvider(app)
     # Ensure Flask's logger handlers also use our Gunicorn-style formatter
     gunicorn_formatter = GunicornStyleFormatter()
     for handler in app.logger.handlers:
@@ -218,6 +224,13 @@ def create_app() -> Flask:
         allowed_origins = [o.strip() for o in origins_cfg.split(",") if o.strip()]
     # Enable CORS for all routes using the allowed origins
     CORS(app, resources={r"/*": {"origins": allowed_origins, "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]}})
+    # Compress large JSON responses (dashboard and /api/* arrays)
+    from .lib.http_compression import install_http_compression
+
+    install_http_compression(app)
+    # Opt-in msgpack/compressed frames for clients that negotiate them (JSON stays the default)
+    from .lib.socket_codec import install_socket_codec, socketio_serializer_options
+
     # Initialize Socket.IO with the same CORS policy and optional message queue
     socketio.init_app(
         app,
@@ -228,7 +241,22 @@ def create_app() -> Flask:
         engineio_logger=True,
         ping_timeout=30,
         ping_interval=10,
+        json=json_codec,
+        **socketio_serializer_options(),
     )
+    install_socket_codec()
+    # Refuse sockets and shed events once this worker is at its socket/in-flight handler limits
+    from .lib.admission import install_admission_control
+
+    install_admission_control()
+    # Defer handler emits until the handler's transaction commits
+    from .lib.emit_buffer import install_emit_buffer
+
+    install_emit_buffer(app)
+    # Count Engine.IO transport pongs as user liveness (no app-level pong events or DB writes)
+    from .lib.liveness import install_transport_liveness
+
+    install_transport_liveness(app)
     try:
         app.logger.info(
             "SocketIO configured: async_mode=%s, message_queue=%s",
@@ -346,6 +374,13 @@ def register_routes(app: Flask) -> None:
     except Exception:
         logging.exception("queue socket handlers registration failed")
 
+    try:
+        from .lib.backup import start_backup_if_needed
+
+        start_backup_if_needed(app)
+    except Exception:
+        logging.exception("backup task start failed")
+
     # Register page blueprints
     try:
         from ui_portals.dashboard.backend import register_socket_handlers as register_dashboard_socket_handlers
@@ -51,6 +51,49 @@ class Config:
     SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
     # Socket.IO async mode override (e.g., 'gevent', 'eventlet'); empty means default
     SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "")
+    # Let clients that connect with ?codec=msgpack receive binary MessagePack frames (needs msgpack)
+    SOCKETIO_MSGPACK_ENABLED = os.getenv("SOCKETIO_MSGPACK_ENABLED", "false").lower() == "true"
+    # Frames at least this large are raw-deflated for clients that connect with ?compress=deflate
+    # (0 disables); level 1 keeps most of the savings at a fraction of the CPU of higher levels
+    SOCKETIO_DEFLATE_MIN_BYTES = int(os.getenv("SOCKETIO_DEFLATE_MIN_BYTES", "8192"))
+    SOCKETIO_DEFLATE_LEVEL = int(os.getenv("SOCKETIO_DEFLATE_LEVEL", "1"))
+    # Once a socket's Engine.IO queue holds this many packets, further frames wait in a bounded
+    # per-socket outbox where stale room.playback/presence.update frames are replaced (0 disables)
+    SOCKETIO_OUTBOUND_HIGH_WATER = int(os.getenv("SOCKETIO_OUTBOUND_HIGH_WATER", "32"))
+    # Outbox caps; a socket that exceeds either is disconnected and resumes from its last room seq
+    SOCKETIO_OUTBOUND_MAX_BYTES = int(os.getenv("SOCKETIO_OUTBOUND_MAX_BYTES", str(1024 * 1024)))
+    SOCKETIO_OUTBOUND_MAX_FRAMES = int(os.getenv("SOCKETIO_OUTBOUND_MAX_FRAMES", "256"))
+    # Per-worker admission control (0 disables a limit): Engine.IO sessions accepted, event handlers
+    # running at once, and the in-flight level at which low-priority events (search, probe) are shed
+    SOCKETIO_MAX_SOCKETS = int(os.getenv("SOCKETIO_MAX_SOCKETS", "2000"))
+    SOCKETIO_MAX_INFLIGHT_HANDLERS = int(os.getenv("SOCKETIO_MAX_INFLIGHT_HANDLERS", "200"))
+    SOCKETIO_LOW_PRIORITY_MAX_INFLIGHT = int(os.getenv("SOCKETIO_LOW_PRIORITY_MAX_INFLIGHT", "100"))
+    # Priority lanes: playback control gets its own in-flight pool; bulk/external-I/O events
+    # (queue.add, debug list load) run at most this many at once (keep it below the DB pool size)
+    # and wait up to SOCKETIO_BULK_WAIT_MS for a slot before being rejected
+    SOCKETIO_CONTROL_MAX_INFLIGHT = int(os.getenv("SOCKETIO_CONTROL_MAX_INFLIGHT", "64"))
+    SOCKETIO_BULK_CONCURRENCY = int(os.getenv("SOCKETIO_BULK_CONCURRENCY", "4"))
+    SOCKETIO_BULK_WAIT_MS = int(os.getenv("SOCKETIO_BULK_WAIT_MS", "5000"))
+    # Base retry delay sent with server.busy rejections (clients get 0.5x-1.5x of it)
+    SOCKETIO_RETRY_AFTER_MS = int(os.getenv("SOCKETIO_RETRY_AFTER_MS", "2000"))
+    # Per-socket and per-user token buckets as "event=burst/seconds" (burst tokens refilled over seconds).
+    # Seeks are coalesced to one commit per SEEK_COALESCE_MS, so their bucket only has to stop floods,
+    # not the frame-step/scrub bursts (key repeat runs at ~30/s).
+    SOCKETIO_RATE_LIMITS = os.getenv(
+        "SOCKETIO_RATE_LIMITS",
+        "room.control.seek=60/2,user.ready=6/5,queue.add=5/10",
+    )
+    # Keep per-user buckets in Redis so the limits hold across workers
+    SOCKETIO_RATE_LIMIT_REDIS = os.getenv("SOCKETIO_RATE_LIMIT_REDIS", "false").lower() == "true"
+    # Seconds a client request_id on queue.add / room.control.skip / queue.continue_next is remembered
+    # so a resend after reconnect gets the original result instead of running again
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "60"))
+    # JSON responses at least this large are sent with gzip/br when the client accepts it (0 disables)
+    HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))
+    HTTP_COMPRESS_GZIP_LEVEL = int(os.getenv("HTTP_COMPRESS_GZIP_LEVEL", "6"))
+    HTTP_COMPRESS_BR_QUALITY = int(os.getenv("HTTP_COMPRESS_BR_QUALITY", "4"))
+    # JSON encoder for Flask, Socket.IO and the Redis logs: auto (orjson when installed), orjson, stdlib
+    JSON_CODEC = os.getenv("JSON_CODEC", "auto")
 
     # Enable periodic system diagnostics emission over sockets when true
     ENABLE_SYSTEM_STATS = os.getenv("ENABLE_SYSTEM_STATS", "false").lower() == "true"
@@ -64,6 +107,9 @@ class Config:
 
     # Pong timeout in seconds for user health checks (users inactive longer than this will be considered disconnected)
     PONG_TIMEOUT_SECONDS = int(os.getenv("PONG_TIMEOUT_SECONDS", "20"))
+    # Seconds between each worker's publish of Engine.IO pong liveness to Redis; keep
+    # ping_interval (10) + this below PONG_TIMEOUT_SECONDS
+    LIVENESS_PUBLISH_SECONDS = int(os.getenv("LIVENESS_PUBLISH_SECONDS", "5"))
     # Heartbeat interval in seconds for periodic cleanup of inactive users across all rooms
     HEARTBEAT_INTERVAL_SECONDS = int(os.getenv("HEARTBEAT_INTERVAL_SECONDS", "20"))
 
@@ -86,6 +132,49 @@ class Config:
     # Prevents players from needing to speed up to catch up immediately after start
     PLAYBACK_START_BUFFER_MS = int(os.getenv("PLAYBACK_START_BUFFER_MS", "200"))
 
+    # Seeks for a room arriving within this window are folded into one commit and one room.playback
+    # (frame stepping, scrubbing); the actor is acknowledged immediately. 0 applies each seek inline.
+    SEEK_COALESCE_MS = int(os.getenv("SEEK_COALESCE_MS", "80"))
+
+    # Seconds a cached per-(room, user) permission bitmask stays valid in a worker.
+    # Local changes invalidate immediately; this bounds staleness for changes made by other workers.
+    PERMISSION_CACHE_TTL_SECONDS = int(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "30"))
+
+    # Seconds between heartbeat passes that rebuild Redis ready/total counters from the table
+    READY_COUNTER_RECONCILE_SECONDS = int(os.getenv("READY_COUNTER_RECONCILE_SECONDS", "60"))
+
+    # Online SQLite backups (runs in the worker that claims the "backup" background slot)
+    # Seconds between snapshots; 0 disables the backup loop
+    BACKUP_INTERVAL_SECONDS = int(os.getenv("BACKUP_INTERVAL_SECONDS", str(6 * 3600)))
+    # Snapshot directory; when empty, defaults to "<project_root>/instance/<VERSION>/backups/"
+    BACKUP_DIR = os.getenv("BACKUP_DIR", "")
+    # Number of gzip snapshots to keep (oldest are removed first)
+    BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+    # Pages copied per backup step and sleep between steps; writers wait at most one step
+    BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+    BACKUP_STEP_SLEEP_MS = int(os.getenv("BACKUP_STEP_SLEEP_MS", "50"))
+    # Abort a snapshot that takes longer than this (e.g. restarted repeatedly by heavy writes)
+    BACKUP_MAX_SECONDS = int(os.getenv("BACKUP_MAX_SECONDS", "600"))
+
+    # Read-only engine for dashboard/analytics queries (separate pool from realtime room writes)
+    ANALYTICS_DB_POOL_SIZE = int(os.getenv("ANALYTICS_DB_POOL_SIZE", "2"))
+    # Statements running longer than this are interrupted (SQLite progress handler)
+    ANALYTICS_DB_STATEMENT_TIMEOUT_MS = int(os.getenv("ANALYTICS_DB_STATEMENT_TIMEOUT_MS", "5000"))
+    # How long a read waits for a busy database / free pooled connection before giving up
+    ANALYTICS_DB_BUSY_TIMEOUT_MS = int(os.getenv("ANALYTICS_DB_BUSY_TIMEOUT_MS", "2000"))
+
+    # Presence debounce window in milliseconds; membership changes within it share one presence.update
+    PRESENCE_DEBOUNCE_MS = int(os.getenv("PRESENCE_DEBOUNCE_MS", "250"))
+
+    # Queue patches kept per queue for catch-up; a client further behind gets a full snapshot
+    QUEUE_PATCH_LOG_SIZE = int(os.getenv("QUEUE_PATCH_LOG_SIZE", "200"))
+
+    # Room broadcasts kept per room for resume-from-seq rejoins (older gaps get a snapshot)
+    ROOM_EVENT_LOG_SIZE = int(os.getenv("ROOM_EVENT_LOG_SIZE", "200"))
+
+    # Rooms whose latest room.join snapshot is cached per worker (LRU)
+    ROOM_SNAPSHOT_CACHE_SIZE = int(os.getenv("ROOM_SNAPSHOT_CACHE_SIZE", "256"))
+
 
 
 def START_DEBUG_CONFIG_DUMP(logger: logging.Logger, app: Flask):
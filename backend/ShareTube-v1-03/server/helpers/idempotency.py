@@ -0,0 +1,131 @@
+"""
+Short-lived idempotency records for mutating socket commands.
+
+Problem:
+- After a reconnect the extension can resend ``queue.add``, ``room.control.skip`` or
+  ``queue.continue_next`` that the server already handled; each resend does the work again
+  (another YouTube fetch, another advance, another room broadcast).
+
+Solution:
+- Mutating events accept an optional client ``request_id``. The first call claims
+  ``(user, event, request_id)`` with a pending marker before the handler runs; when it finishes,
+  the marker is replaced by the handler's result and the replies it sent to the caller.
+- A duplicate gets the stored replies re-sent to its own socket and the stored result, without
+  the handler running. A duplicate that arrives while the original is still running is answered
+  as in progress; the room broadcast of the original reaches it either way.
+- Records live in Redis (so a resend landing on another worker is still caught) and fall back to
+  the process when Redis is unavailable. They expire after ``IDEMPOTENCY_TTL_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Optional
+
+from ..config import Config
+from ..lib import json_codec
+from ..lib.utils import get_redis_client
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+
+# Longer ids are ignored rather than stored
+MAX_REQUEST_ID_LENGTH = 128
+# Expired local records are swept once the fallback store grows past this many
+_LOCAL_RECORDS_PRUNE_AT = 4096
+
+# In-process fallback when Redis is unavailable: key -> (expires at, record)
+_local_records: dict[str, tuple[float, dict]] = {}
+
+
+def _ttl_seconds() -> int:
+    return max(1, int(getattr(Config, "IDEMPOTENCY_TTL_SECONDS", 60)))
+
+
+def _get_record_key(user_id: int, event: str, request_id: str) -> str:
+    return f"idempotency:{user_id}:{event}:{request_id}"
+
+
+def get_request_id(data: Any) -> Optional[str]:
+    """The client ``request_id`` of an event payload, or None when absent or unusable."""
+    if not isinstance(data, dict):
+        return None
+    request_id = data.get("request_id")
+    if request_id is None or isinstance(request_id, bool):
+        return None
+    request_id = str(request_id).strip()
+    if not request_id or len(request_id) > MAX_REQUEST_ID_LENGTH:
+        return None
+    return request_id
+
+
+def _prune_local_records(now: float) -> None:
+    if len(_local_records) < _LOCAL_RECORDS_PRUNE_AT:
+        return
+    for key, (expires_at, _record) in list(_local_records.items()):
+        if expires_at <= now:
+            del _local_records[key]
+
+
+def _claim_local(key: str) -> Optional[dict]:
+    now = time.monotonic()
+    _prune_local_records(now)
+    existing = _local_records.get(key)
+    if existing and existing[0] > now:
+        return existing[1]
+    _local_records[key] = (now + _ttl_seconds(), {"status": STATUS_PENDING})
+    return None
+
+
+def claim_request(user_id: int, event: str, request_id: str) -> Optional[dict]:
+    """
+    Claim a request id before running its handler.
+
+    Returns None when this call owns the request and should run, otherwise the existing record:
+    ``{"status": "pending"}`` while the original runs, or ``{"status": "done", "result",
+    "replies"}`` once it finished.
+    """
+    key = _get_record_key(user_id, event, request_id)
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            pending = json_codec.dumps({"status": STATUS_PENDING})
+            if redis_client.set(key, pending, nx=True, ex=_ttl_seconds()):
+                return None
+            raw = redis_client.get(key)
+            if raw is not None:
+                return json_codec.loads(raw)
+            # Expired between SET NX and GET; claim again
+            if redis_client.set(key, pending, nx=True, ex=_ttl_seconds()):
+                return None
+            return {"status": STATUS_PENDING}
+        except Exception:
+            logging.exception("claim_request: failed to claim in Redis (key=%s)", key)
+    return _claim_local(key)
+
+
+def complete_request(user_id: int, event: str, request_id: str, result: Any, replies: list[dict]) -> None:
+    """Store the handler's result and caller replies so duplicates can be answered from them."""
+    key = _get_record_key(user_id, event, request_id)
+    record = {"status": STATUS_DONE, "result": result, "replies": replies}
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            redis_client.setex(key, _ttl_seconds(), json_codec.dumps(record, default=str))
+            return
+        except Exception:
+            logging.exception("complete_request: failed to store result in Redis (key=%s)", key)
+    _local_records[key] = (time.monotonic() + _ttl_seconds(), record)
+
+
+def release_request(user_id: int, event: str, request_id: str) -> None:
+    """Drop a claim whose handler failed so a resend runs again."""
+    key = _get_record_key(user_id, event, request_id)
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            redis_client.delete(key)
+        except Exception:
+            logging.exception("release_request: failed to release claim in Redis (key=%s)", key)
+    _local_records.pop(key, None)
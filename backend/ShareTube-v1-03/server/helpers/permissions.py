@@ -0,0 +1,204 @@
+"""
+Cached permission matrix for room-level checks.
+
+Problem:
+- Owner/operator/admin checks run on every queue mutation and several room events.
+- Each check lazily loads room.operators, queries RoomMembership and gets the User row.
+
+Solution:
+- Compute a per-(room, user) capability bitmask once with a single query and cache it in-process.
+- Invalidate on operator, membership and user role changes (mapper events + explicit calls for
+  bulk deletes that bypass the ORM), and bound cross-worker staleness with a short TTL.
+- Invalidations made inside a transaction are applied on ``after_commit`` (and dropped on
+  rollback): dropping the entry before the commit lets a concurrent check re-cache the old row.
+- Expired entries are swept once the cache grows past ``_CACHE_PRUNE_AT`` entries.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from ..extensions import db
+from ..models import Room, RoomMembership, RoomOperator, User
+
+# Individual capability bits
+CAP_OWNER = 1 << 0
+CAP_ROOM_OPERATOR = 1 << 1
+CAP_MEMBER_OPERATOR = 1 << 2
+CAP_ADMIN = 1 << 3
+
+# Owner, operators (either source) and site admins can modify any queue entry
+MODIFY_ANY_ENTRY = CAP_OWNER | CAP_ROOM_OPERATOR | CAP_MEMBER_OPERATOR | CAP_ADMIN
+# Owner and RoomOperator rows can change room settings and manually advance the queue
+MANAGE_ROOM = CAP_OWNER | CAP_ROOM_OPERATOR
+
+# Expired entries are swept once the cache grows past this many
+_CACHE_PRUNE_AT = 4096
+# session.info key holding (room_id, user_id) invalidations waiting for the commit
+_PENDING_INVALIDATIONS_KEY = "pending_permission_invalidations"
+
+# (room_id, user_id) -> (capabilities, expires_at monotonic seconds)
+_cache: dict[tuple[int, int], tuple[int, float]] = {}
+
+
+def _ttl_seconds() -> float:
+    try:
+        return float(current_app.config.get("PERMISSION_CACHE_TTL_SECONDS", 30))
+    except Exception:
+        return 30.0
+
+
+def _compute_capabilities(room: Room, user_id: int) -> int:
+    """Resolve every capability bit for (room, user) with one query."""
+    caps = 0
+    if room.owner_id and room.owner_id == user_id:
+        caps |= CAP_OWNER
+
+    row = (
+        db.session.query(User.role, RoomMembership.role, RoomOperator.id)
+        .select_from(User)
+        .outerjoin(
+            RoomMembership,
+            and_(RoomMembership.user_id == User.id, RoomMembership.room_id == room.id),
+        )
+        .outerjoin(
+            RoomOperator,
+            and_(RoomOperator.user_id == User.id, RoomOperator.room_id == room.id),
+        )
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row:
+        user_role, membership_role, operator_id = row
+        if operator_id is not None:
+            caps |= CAP_ROOM_OPERATOR
+        if membership_role == "operator":
+            caps |= CAP_MEMBER_OPERATOR
+        if user_role in ("admin", "super_admin"):
+            caps |= CAP_ADMIN
+    return caps
+
+
+def _prune_cache(now: float) -> None:
+    if len(_cache) < _CACHE_PRUNE_AT:
+        return
+    for key, (_caps, expires_at) in list(_cache.items()):
+        if expires_at <= now:
+            del _cache[key]
+
+
+def get_capabilities(room: Room, user_id: Optional[int]) -> int:
+    """Return the cached capability bitmask for a user in a room."""
+    if not room or not user_id:
+        return 0
+    key = (room.id, int(user_id))
+    now = time.monotonic()
+    cached = _cache.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+    caps = _compute_capabilities(room, int(user_id))
+    _prune_cache(now)
+    _cache[key] = (caps, now + _ttl_seconds())
+    return caps
+
+
+def has_capability(room: Room, user_id: Optional[int], mask: int) -> bool:
+    """True when the user holds any of the capability bits in ``mask``."""
+    return bool(get_capabilities(room, user_id) & mask)
+
+
+def can_manage_room(room: Room, user_id: Optional[int]) -> bool:
+    """Owner or RoomOperator: room settings, manual continue, operator-only ad sync."""
+    return has_capability(room, user_id, MANAGE_ROOM)
+
+
+def _drop_cached(room_id: Optional[int], user_id: Optional[int]) -> None:
+    if room_id is None and user_id is None:
+        _cache.clear()
+        return
+    for key in list(_cache.keys()):
+        if room_id is not None and key[0] != room_id:
+            continue
+        if user_id is not None and key[1] != user_id:
+            continue
+        _cache.pop(key, None)
+
+
+def invalidate_permissions(
+    room_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    session: Optional[Session] = None,
+) -> None:
+    """
+    Drop cached entries matching the given room and/or user (both None clears everything).
+
+    Inside an open transaction (``session``, or the app's ``db.session``) the drop waits for the
+    commit and is discarded on rollback; otherwise it happens immediately.
+    """
+    if session is None and has_app_context():
+        session = db.session()
+    if session is not None and session.in_transaction():
+        session.info.setdefault(_PENDING_INVALIDATIONS_KEY, set()).add((room_id, user_id))
+        return
+    _drop_cached(room_id, user_id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _on_after_commit(session: Session) -> None:
+    for room_id, user_id in session.info.pop(_PENDING_INVALIDATIONS_KEY, ()):
+        _drop_cached(room_id, user_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _on_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS_KEY, None)
+
+
+# ORM-level invalidation, applied when the flushing transaction commits. Bulk
+# query.delete()/update() calls bypass these hooks, so call invalidate_permissions() explicitly
+# next to them.
+@event.listens_for(RoomOperator, "after_insert")
+@event.listens_for(RoomOperator, "after_update")
+@event.listens_for(RoomOperator, "after_delete")
+@event.listens_for(RoomMembership, "after_insert")
+@event.listens_for(RoomMembership, "after_delete")
+def _on_room_link_changed(_mapper, _connection, target) -> None:
+    invalidate_permissions(
+        room_id=target.room_id, user_id=target.user_id, session=object_session(target)
+    )
+
+
+@event.listens_for(RoomMembership, "after_update")
+def _on_membership_changed(_mapper, _connection, target: RoomMembership) -> None:
+    # Ready toggles update memberships constantly; only role changes affect capabilities.
+    if inspect(target).attrs.role.history.has_changes():
+        invalidate_permissions(
+            room_id=target.room_id, user_id=target.user_id, session=object_session(target)
+        )
+
+
+@event.listens_for(User, "after_update")
+def _on_user_changed(_mapper, _connection, target: User) -> None:
+    if inspect(target).attrs.role.history.has_changes():
+        invalidate_permissions(user_id=target.id, session=object_session(target))
+
+
+@event.listens_for(User, "after_delete")
+def _on_user_deleted(_mapper, _connection, target: User) -> None:
+    invalidate_permissions(user_id=target.id, session=object_session(target))
+
+
+@event.listens_for(Room, "after_update")
+def _on_room_changed(_mapper, _connection, target: Room) -> None:
+    if inspect(target).attrs.owner_id.history.has_changes():
+        invalidate_permissions(room_id=target.id, session=object_session(target))
+
+
+@event.listens_for(Room, "after_delete")
+def _on_room_deleted(_mapper, _connection, target: Room) -> None:
+    invalidate_permissions(room_id=target.id, session=object_session(target))
@@ -0,0 +1,164 @@
+"""
+Per-socket and per-user token buckets for spammable socket events.
+
+Problem:
+- ``room.control.seek`` (frame stepping), ``user.ready`` toggles and ``queue.add`` (two outbound
+  HTTP calls) each cost a DB commit and usually a room-wide broadcast, and nothing stops a buggy
+  or malicious client from sending them in a tight loop.
+
+Solution:
+- ``SOCKETIO_RATE_LIMITS`` maps events to buckets as ``event=burst/seconds``: up to ``burst``
+  calls at once, refilled at ``burst`` tokens per ``seconds``.
+- Each limited call takes a token from the socket's bucket and from the user's bucket, so
+  opening more tabs does not multiply the allowance. A call is rejected without a token being
+  taken from either bucket.
+- Socket buckets live in process (a socket never leaves its worker). User buckets do too, unless
+  ``SOCKETIO_RATE_LIMIT_REDIS`` is set; then they live in Redis (one Lua call) and hold across
+  workers, falling back to the process when Redis is unavailable.
+- Callers get the milliseconds until the next token, so the rejection can be answered without
+  touching the database.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Optional
+
+from ..config import Config
+from ..lib.utils import get_redis_client
+
+# Idle buckets refill completely; dropping them past this many keeps the fallback store small
+_LOCAL_BUCKETS_PRUNE_AT = 4096
+
+_TAKE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local burst = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+if tokens < 1 then
+    return math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 0
+"""
+
+# Parsed SOCKETIO_RATE_LIMITS: event -> (burst, tokens per second)
+_limits: Optional[dict[str, tuple[float, float]]] = None
+# In-process buckets: key -> [tokens, monotonic timestamp of the last refill]
+_local_buckets: dict[str, list[float]] = {}
+
+
+def _parse_limits(spec: str) -> dict[str, tuple[float, float]]:
+    limits: dict[str, tuple[float, float]] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        try:
+            event, bucket = item.split("=", 1)
+            burst, seconds = bucket.split("/", 1)
+            burst_value, seconds_value = float(burst), float(seconds)
+        except ValueError:
+            logging.warning("rate_limit: ignoring malformed SOCKETIO_RATE_LIMITS entry %r", item)
+            continue
+        if burst_value >= 1 and seconds_value > 0:
+            limits[event.strip()] = (burst_value, burst_value / seconds_value)
+    return limits
+
+
+def get_rate_limit(event: str) -> Optional[tuple[float, float]]:
+    """(burst, tokens per second) configured for an event, or None when it is not limited."""
+    global _limits
+    if _limits is None:
+        _limits = _parse_limits(getattr(Config, "SOCKETIO_RATE_LIMITS", ""))
+    return _limits.get(event)
+
+
+def _get_socket_bucket_key(sid: str, event: str) -> str:
+    return f"ratelimit:sid:{sid}:{event}"
+
+
+def _get_user_bucket_key(user_id: int, event: str) -> str:
+    return f"ratelimit:user:{user_id}:{event}"
+
+
+def _local_wait_ms(key: str, burst: float, rate: float, now: float) -> int:
+    """Refill a local bucket; 0 when it holds a token, else milliseconds until it will."""
+    bucket = _local_buckets.get(key)
+    if bucket is None:
+        bucket = _local_buckets[key] = [burst, now]
+    bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+    bucket[1] = now
+    if bucket[0] >= 1:
+        return 0
+    return int((1 - bucket[0]) / rate * 1000) + 1
+
+
+def _prune_local_buckets(now: float) -> None:
+    if len(_local_buckets) < _LOCAL_BUCKETS_PRUNE_AT:
+        return
+    for key, (tokens, updated) in list(_local_buckets.items()):
+        limit = get_rate_limit(key.rsplit(":", 1)[-1])
+        if limit is None or tokens + (now - updated) * limit[1] >= limit[0]:
+            del _local_buckets[key]
+
+
+def _take_redis(key: str, burst: float, rate: float) -> Optional[int]:
+    redis_client = get_redis_client()
+    if not redis_client:
+        return None
+    try:
+        ttl = max(1, int(burst / rate) + 1)
+        return int(redis_client.eval(_TAKE_SCRIPT, 1, key, burst, rate, ttl))
+    except Exception:
+        logging.exception("rate_limit: failed to take a token in Redis (key=%s)", key)
+        return None
+
+
+def take_token(event: str, sid: Optional[str], user_id: Optional[int]) -> int:
+    """
+    Spend one token of ``event`` for the socket and its user.
+
+    Returns 0 when the call may proceed, otherwise the milliseconds until it would be allowed.
+    """
+    limit = get_rate_limit(event)
+    if limit is None:
+        return 0
+    burst, rate = limit
+    now = time.monotonic()
+    _prune_local_buckets(now)
+
+    socket_key = _get_socket_bucket_key(sid, event) if sid else None
+    if socket_key:
+        wait_ms = _local_wait_ms(socket_key, burst, rate, now)
+        if wait_ms:
+            return wait_ms
+
+    if user_id is not None:
+        user_key = _get_user_bucket_key(user_id, event)
+        wait_ms = None
+        if getattr(Config, "SOCKETIO_RATE_LIMIT_REDIS", False):
+            # The script spends the token itself when one is available
+            wait_ms = _take_redis(user_key, burst, rate)
+        if wait_ms is None:
+            wait_ms = _local_wait_ms(user_key, burst, rate, now)
+            if not wait_ms:
+                _local_buckets[user_key][0] -= 1
+        if wait_ms:
+            return wait_ms
+
+    if socket_key:
+        _local_buckets[socket_key][0] -= 1
+    return 0
+
+
+def forget_socket_buckets(sid: str) -> None:
+    """Drop a disconnected socket's buckets."""
+    prefix = _get_socket_bucket_key(sid, "")
+    for key in [key for key in _local_buckets if key.startswith(prefix)]:
+        del _local_buckets[key]
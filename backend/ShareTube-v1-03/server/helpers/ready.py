@@ -0,0 +1,210 @@
+"""
+Per-room ready barrier counters.
+
+Problem:
+- Every user.ready toggle re-read every membership in the room to evaluate all(ready).
+- Starting a new barrier bulk-updated memberships with a subquery over every active user.
+
+Solution:
+- Keep ``ready``/``total`` counters per room in a Redis hash, adjusted atomically (Lua) on ready
+  toggles, joins, leaves and barrier resets, so the all-ready check is a constant-time comparison.
+  Callers apply deltas after their commit, from the row change that actually landed.
+- Missing hashes (first use, expiry, Redis restart) are rebuilt from the table, and the heartbeat
+  reconciles existing hashes periodically to repair drift from failed commits.
+- Without Redis the counters fall back to a single aggregate COUNT query against the table.
+- A member is ready only while ``membership.ready_generation == room.ready_generation``, so a
+  new barrier is a single-row increment of ``Room.ready_generation``. Its counter reset is queued
+  on the session and runs on ``after_commit`` (dropped on rollback), so Redis never clears a
+  barrier the table has not started.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import and_, case, event, func
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..lib.utils import get_redis_client
+from ..models import Room, RoomMembership, User
+
+# Counter hashes expire if a room goes quiet; they are rebuilt from the table on next use.
+READY_COUNTER_TTL_SECONDS = 3600
+# session.info key holding room ids whose counter reset waits for the commit
+_PENDING_RESETS_KEY = "pending_ready_resets"
+
+_ADJUST_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return nil
+end
+local ready = redis.call('HINCRBY', KEYS[1], 'ready', ARGV[1])
+local total = redis.call('HINCRBY', KEYS[1], 'total', ARGV[2])
+if total < 0 then
+    total = 0
+    redis.call('HSET', KEYS[1], 'total', 0)
+end
+if ready < 0 then
+    ready = 0
+    redis.call('HSET', KEYS[1], 'ready', 0)
+end
+if ready > total then
+    ready = total
+    redis.call('HSET', KEYS[1], 'ready', total)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {ready, total}
+"""
+
+_RESET_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'ready', 0)
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def _get_ready_counter_key(room_id: int) -> str:
+    """Get Redis key for a room's ready/total counters."""
+    return f"room:ready:{room_id}"
+
+
+def is_member_ready(membership: RoomMembership, room: Room) -> bool:
+    """True when the member flagged ready during the room's current barrier generation."""
+    return bool(membership.ready) and (membership.ready_generation or 0) == (room.ready_generation or 0)
+
+
+def count_ready_from_db(room_id: int) -> tuple[int, int]:
+    """Return (ready, total) for active members of a room with one aggregate query."""
+    row = (
+        db.session.query(
+            func.count(RoomMembership.id),
+            func.sum(
+                case(
+                    (
+                        and_(
+                            RoomMembership.ready.is_(True),
+                            RoomMembership.ready_generation == Room.ready_generation,
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ),
+        )
+        .join(User, RoomMembership.user_id == User.id)
+        .join(Room, RoomMembership.room_id == Room.id)
+        .filter(RoomMembership.room_id == room_id, User.active.is_(True))
+        .one()
+    )
+    total = int(row[0] or 0)
+    ready = int(row[1] or 0)
+    return ready, total
+
+
+def reconcile_ready_counters(room_id: int, redis_client=None) -> tuple[int, int]:
+    """Rebuild a room's counters from the table and store them in Redis when available."""
+    ready, total = count_ready_from_db(room_id)
+    redis_client = redis_client or get_redis_client()
+    if redis_client:
+        key = _get_ready_counter_key(room_id)
+        try:
+            pipe = redis_client.pipeline(transaction=True)
+            pipe.hset(key, mapping={"ready": ready, "total": total})
+            pipe.expire(key, READY_COUNTER_TTL_SECONDS)
+            pipe.execute()
+        except Exception:
+            logging.exception("reconcile_ready_counters: failed to store counters in Redis (room_id=%s)", room_id)
+    return ready, total
+
+
+def get_ready_counters(room_id: int) -> tuple[int, int]:
+    """Return (ready, total) for a room, rebuilding the counters when they are missing."""
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            ready, total = redis_client.hmget(_get_ready_counter_key(room_id), "ready", "total")
+            if ready is not None and total is not None:
+                return int(ready), int(total)
+        except Exception:
+            logging.exception("get_ready_counters: failed to read counters from Redis (room_id=%s)", room_id)
+        return reconcile_ready_counters(room_id, redis_client)
+    return count_ready_from_db(room_id)
+
+
+def adjust_ready_counters(
+    room_id: int, ready_delta: int = 0, total_delta: int = 0
+) -> tuple[int, int]:
+    """Atomically apply deltas to a room's counters and return the new (ready, total)."""
+    redis_client = get_redis_client()
+    if not redis_client:
+        return count_ready_from_db(room_id)
+    try:
+        result = redis_client.eval(
+            _ADJUST_SCRIPT,
+            1,
+            _get_ready_counter_key(room_id),
+            int(ready_delta),
+            int(total_delta),
+            READY_COUNTER_TTL_SECONDS,
+        )
+        if result is not None:
+            return int(result[0]), int(result[1])
+    except Exception:
+        logging.exception("adjust_ready_counters: failed to adjust counters in Redis (room_id=%s)", room_id)
+    # Missing hash: the table (including the caller's committed change) is the source of truth.
+    return reconcile_ready_counters(room_id, redis_client)
+
+
+def _reset_ready_counter(room_id: int) -> None:
+    redis_client = get_redis_client()
+    if not redis_client:
+        return
+    try:
+        redis_client.eval(
+            _RESET_SCRIPT,
+            1,
+            _get_ready_counter_key(room_id),
+            READY_COUNTER_TTL_SECONDS,
+        )
+    except Exception:
+        logging.exception("reset_room_ready: failed to reset ready counter in Redis (room_id=%s)", room_id)
+
+
+def reset_room_ready(room: Room) -> None:
+    """Start a new ready barrier: bump the room's generation; the ready counter clears on commit."""
+    room.ready_generation = (room.ready_generation or 0) + 1
+    db.session.flush()
+    db.session.info.setdefault(_PENDING_RESETS_KEY, set()).add(room.id)
+
+
+@event.listens_for(db.session, "after_commit")
+def _on_after_commit(session: Session) -> None:
+    for room_id in session.info.pop(_PENDING_RESETS_KEY, ()):
+        _reset_ready_counter(room_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def _on_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_RESETS_KEY, None)
+
+
+def reconcile_all_ready_counters() -> int:
+    """Reconcile every room that currently has a counter hash; returns rooms checked."""
+    redis_client = get_redis_client()
+    if not redis_client:
+        return 0
+    checked = 0
+    try:
+        for key in redis_client.scan_iter(match="room:ready:*", count=200):
+            try:
+                room_id = int(str(key).rsplit(":", 1)[1])
+            except (IndexError, ValueError):
+                continue
+            reconcile_ready_counters(room_id, redis_client)
+            checked += 1
+    except Exception:
+        logging.exception("reconcile_all_ready_counters: failed to scan counter keys")
+    return checked
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import logging
+from collections import deque
+from typing import Optional
 
+from ..lib import json_codec
 from ..lib.utils import get_redis_client
 
 
@@ -106,3 +109,101 @@ def check_user_other_connections(user_id: int, disconnecting_socket_id: str) ->
     connections.discard(disconnecting_socket_id)
     return len(connections) > 0
 
+
+
+def _get_presence_version_key(room_id: int) -> str:
+    """Get Redis key for a room's presence version counter."""
+    return f"room:presence:version:{room_id}"
+
+
+# Fallback presence versions when Redis is unavailable (single-worker deployments)
+_local_presence_versions: dict[int, int] = {}
+
+
+def next_presence_version(room_id: int) -> int:
+    """Increment and return a room's presence version (one bump per presence change)."""
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            key = _get_presence_version_key(room_id)
+            version = int(redis_client.incr(key))
+            redis_client.expire(key, 86400)  # 24 hours
+            return version
+        except Exception:
+            logging.exception("next_presence_version: failed to increment presence version in Redis")
+    version = _local_presence_versions.get(room_id, 0) + 1
+    _local_presence_versions[room_id] = version
+    return version
+
+
+def get_presence_version(room_id: int) -> int:
+    """Current presence version for a room (0 before the first change)."""
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            value = redis_client.get(_get_presence_version_key(room_id))
+            return int(value) if value is not None else 0
+        except Exception:
+            logging.exception("get_presence_version: failed to read presence version from Redis")
+    return _local_presence_versions.get(room_id, 0)
+
+
+def _get_queue_patches_key(queue_id: int) -> str:
+    """Redis list of recent queue.batch patches (JSON) for catch-up after a version gap."""
+    return f"room:queue:patches:{queue_id}"
+
+
+# In-process fallback when Redis is unavailable (single worker)
+_local_queue_patches: dict[int, deque] = {}
+
+
+def record_queue_patch(queue_id: int, patch: dict, limit: int) -> None:
+    """Append a versioned patch to the queue's log, keeping the newest ``limit`` entries."""
+    if limit <= 0:
+        return
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            key = _get_queue_patches_key(queue_id)
+            pipe = redis_client.pipeline()
+            pipe.rpush(key, json_codec.dumps(patch))
+            pipe.ltrim(key, -limit, -1)
+            pipe.expire(key, 86400)  # 24 hours
+            pipe.execute()
+            return
+        except Exception:
+            logging.exception("record_queue_patch: failed to append queue patch in Redis")
+    log = _local_queue_patches.get(queue_id)
+    if log is None or log.maxlen != limit:
+        log = deque(log or (), maxlen=limit)
+        _local_queue_patches[queue_id] = log
+    log.append(patch)
+
+
+def get_queue_patches_since(queue_id: int, since: int, current: int) -> Optional[list[dict]]:
+    """
+    Patches with versions since+1..current in order, or None when the log no longer covers
+    that range (the caller should send a full snapshot instead).
+    """
+    if current <= since:
+        return []
+    patches: Optional[list[dict]] = None
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            raw = redis_client.lrange(_get_queue_patches_key(queue_id), 0, -1)
+            patches = [json_codec.loads(item) for item in raw]
+        except Exception:
+            logging.exception("get_queue_patches_since: failed to read queue patches from Redis")
+    if patches is None:
+        patches = list(_local_queue_patches.get(queue_id, ()))
+
+    # Concurrent writers can append out of order; versions themselves come from the database
+    wanted = sorted(
+        (p for p in patches if since < int(p.get("version", 0)) <= current),
+        key=lambda p: int(p["version"]),
+    )
+    versions = [int(p["version"]) for p in wanted]
+    if versions != list(range(since + 1, current + 1)):
+        return None
+    return wanted
@@ -0,0 +1,124 @@
+"""
+Per-room broadcast sequence numbers and a bounded replay log.
+
+Problem:
+- After a socket drop the extension re-runs ``room.join`` and always receives a full
+  ``room.to_dict()`` snapshot, even when it missed a single event.
+
+Solution:
+- Every room broadcast is stamped with a per-room ``seq`` and appended to a bounded log
+  (Redis list, or an in-process deque without Redis); the increment and append run in one Lua
+  script so log order always matches seq order.
+- ``room.join`` accepts ``last_seq``; when the log still covers ``last_seq + 1 .. current`` the
+  server replays just those events to the rejoining socket instead of sending a snapshot.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from typing import Any, Optional
+
+from ..config import Config
+from ..lib import json_codec
+from ..lib.utils import get_redis_client
+
+# Logs expire once a room has been quiet for a day; a rejoin after that gets a snapshot
+ROOM_LOG_TTL_SECONDS = 86400
+
+_APPEND_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('RPUSH', KEYS[2], seq .. ':' .. ARGV[1])
+redis.call('LTRIM', KEYS[2], -tonumber(ARGV[2]), -1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return seq
+"""
+
+# In-process fallback when Redis is unavailable (single worker): code -> (seq, events)
+_local_logs: dict[str, tuple[int, deque]] = {}
+
+
+def _get_seq_key(code: str) -> str:
+    return f"room:seq:{code}"
+
+
+def _get_log_key(code: str) -> str:
+    return f"room:events:{code}"
+
+
+def _log_size() -> int:
+    return max(1, int(getattr(Config, "ROOM_EVENT_LOG_SIZE", 200)))
+
+
+def append_room_event(code: str, event: str, data: Any) -> int:
+    """Assign the next seq for a room broadcast and append it to the replay log."""
+    encoded = json_codec.dumps({"event": event, "data": data}, default=str)
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            return int(
+                redis_client.eval(
+                    _APPEND_SCRIPT,
+                    2,
+                    _get_seq_key(code),
+                    _get_log_key(code),
+                    encoded,
+                    _log_size(),
+                    ROOM_LOG_TTL_SECONDS,
+                )
+            )
+        except Exception:
+            logging.exception("append_room_event: failed to append to Redis log (code=%s)", code)
+    seq, events = _local_logs.get(code, (0, deque(maxlen=_log_size())))
+    seq += 1
+    events.append((seq, encoded))
+    _local_logs[code] = (seq, events)
+    return seq
+
+
+def get_room_seq(code: str) -> int:
+    """Latest seq broadcast to a room (0 before the first broadcast)."""
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            value = redis_client.get(_get_seq_key(code))
+            return int(value) if value is not None else 0
+        except Exception:
+            logging.exception("get_room_seq: failed to read seq from Redis (code=%s)", code)
+    return _local_logs.get(code, (0, None))[0]
+
+
+def get_room_events_since(code: str, last_seq: int) -> Optional[list[tuple[int, str, Any]]]:
+    """
+    Events after ``last_seq`` as (seq, event, data), or None when the log no longer covers
+    them (or ``last_seq`` is from a log that has since been reset) and a snapshot is needed.
+    """
+    current = get_room_seq(code)
+    if last_seq > current:
+        return None
+    if last_seq == current:
+        return []
+
+    raw: Optional[list[tuple[int, str]]] = None
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            raw = []
+            for item in redis_client.lrange(_get_log_key(code), 0, -1):
+                seq, _, encoded = item.partition(":")
+                raw.append((int(seq), encoded))
+        except Exception:
+            logging.exception("get_room_events_since: failed to read Redis log (code=%s)", code)
+            raw = None
+    if raw is None:
+        raw = list(_local_logs.get(code, (0, ()))[1])
+
+    missed = [(seq, encoded) for seq, encoded in raw if last_seq < seq <= current]
+    if [seq for seq, _ in missed] != list(range(last_seq + 1, current + 1)):
+        return None
+    events: list[tuple[int, str, Any]] = []
+    for seq, encoded in missed:
+        decoded = json_codec.loads(encoded)
+        events.append((seq, decoded["event"], decoded["data"]))
+    return events
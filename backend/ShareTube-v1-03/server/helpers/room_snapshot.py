@@ -0,0 +1,61 @@
+"""
+Cached room snapshots for room.join.
+
+Problem:
+- Every room.join rebuilt ``room.to_dict()`` from the ORM (room, operators, memberships and the
+  full queue with authors), even when many clients joined the same unchanged room at once.
+
+Solution:
+- Snapshots are cached per (room, seq) in a small per-process LRU. ``seq`` is the room broadcast
+  sequence from ``room_log``; every mutating handler announces its change with a room broadcast,
+  which advances the seq, so a changed room never matches a cached entry.
+- The seq is read before the snapshot is built, so a cached snapshot is never older than its seq.
+- Clients that already hold the room at the current seq get a "not modified" join result.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from ..config import Config
+from ..lib import metrics
+from ..models import Room
+from .room_log import get_room_seq
+
+_lock = threading.Lock()
+# room_id -> (seq, snapshot); only the newest snapshot per room is kept
+_cache: OrderedDict[int, tuple[int, dict[str, Any]]] = OrderedDict()
+
+
+def _cache_size() -> int:
+    return max(1, int(getattr(Config, "ROOM_SNAPSHOT_CACHE_SIZE", 256)))
+
+
+def get_room_snapshot(room: Room) -> tuple[int, dict[str, Any]]:
+    """
+    Return (seq, snapshot) for a room, building and caching it on a miss.
+
+    The snapshot dict is shared between callers and must not be mutated.
+    """
+    seq = get_room_seq(room.code)
+    with _lock:
+        cached = _cache.get(room.id)
+        if cached is not None and cached[0] == seq:
+            _cache.move_to_end(room.id)
+            metrics.incr("room.snapshot.hit")
+            return cached
+    metrics.incr("room.snapshot.miss")
+
+    snapshot = room.to_dict()
+    with _lock:
+        current = _cache.get(room.id)
+        # A concurrent builder may already have stored a newer seq for this room
+        if current is None or current[0] <= seq:
+            _cache[room.id] = (seq, snapshot)
+            _cache.move_to_end(room.id)
+        while len(_cache) > _cache_size():
+            _cache.popitem(last=False)
+    return seq, snapshot
+
@@ -0,0 +1,219 @@
+"""
+Full-text search over queue entries (current queues and room history).
+
+Problem:
+- Finding an earlier video in a long queue/history meant pulling the whole snapshot to the client.
+
+Solution:
+- An FTS5 virtual table ``queue_entry_fts`` keyed by ``queue_entry.id`` (rowid) indexes the entry
+  title and its YouTube author title, plus a ``room_key`` token (``r<room_id>``) so MATCH only
+  walks and ranks the searched room's entries instead of every room's.
+- SQLite triggers keep it in sync on entry insert/update/delete and author title changes, so no
+  application code path has to remember to reindex.
+- Hits are ranked with bm25 (entry title weighted above author title), newest entry id first on
+  ties, and paginated per room; ranking never leaves the FTS table.
+- When FTS5 is unavailable (non-SQLite engine or a build without the module) searches fall back
+  to a LIKE scan so the socket event still works.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import inspect, or_, text
+
+from ..extensions import db
+from ..models import Queue, QueueEntry, YouTubeAuthor
+
+FTS_TABLE = "queue_entry_fts"
+
+# bm25 column weights: (title, author_title, room_key); lower scores rank first
+_BM25_WEIGHTS = (10.0, 2.0, 0.0)
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_QUERY_LENGTH = 256
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_AUTHOR_TITLE_SQL = "(SELECT title FROM youtube_author WHERE id = new.youtube_author_id)"
+_ROOM_KEY_SQL = "(SELECT 'r' || room_id FROM queue WHERE id = new.queue_id)"
+
+_FTS_TRIGGERS = (
+    "queue_entry_fts_ai",
+    "queue_entry_fts_ad",
+    "queue_entry_fts_au",
+    "youtube_author_fts_au",
+    "youtube_author_fts_ad",
+)
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title,
+        author_title,
+        room_key,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS queue_entry_fts_ai AFTER INSERT ON queue_entry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author_title, room_key)
+        VALUES (new.id, new.title, {_AUTHOR_TITLE_SQL}, {_ROOM_KEY_SQL});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS queue_entry_fts_ad AFTER DELETE ON queue_entry BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS queue_entry_fts_au
+    AFTER UPDATE OF title, youtube_author_id, queue_id ON queue_entry BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, title, author_title, room_key)
+        VALUES (new.id, new.title, {_AUTHOR_TITLE_SQL}, {_ROOM_KEY_SQL});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS youtube_author_fts_au AFTER UPDATE OF title ON youtube_author BEGIN
+        UPDATE {FTS_TABLE} SET author_title = new.title
+        WHERE rowid IN (SELECT id FROM queue_entry WHERE youtube_author_id = new.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS youtube_author_fts_ad AFTER DELETE ON youtube_author BEGIN
+        UPDATE {FTS_TABLE} SET author_title = NULL
+        WHERE rowid IN (SELECT id FROM queue_entry WHERE youtube_author_id = old.id);
+    END
+    """,
+]
+
+_FTS_BACKFILL = f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, author_title, room_key)
+    SELECT qe.id, qe.title, ya.title, 'r' || q.room_id
+    FROM queue_entry AS qe
+    LEFT JOIN youtube_author AS ya ON ya.id = qe.youtube_author_id
+    LEFT JOIN queue AS q ON q.id = qe.queue_id
+"""
+
+# Per-process cache of whether the FTS table is usable (None = not checked yet)
+_fts_available: Optional[bool] = None
+
+
+def ensure_queue_search_index(conn) -> bool:
+    """Create the FTS table and sync triggers if missing, backfilling existing rows once."""
+    global _fts_available
+    if conn.dialect.name != "sqlite":
+        _fts_available = False
+        return False
+    try:
+        existed = FTS_TABLE in inspect(conn).get_table_names()
+        if existed:
+            columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({FTS_TABLE})"))}
+            if "room_key" not in columns:
+                # Index from before room scoping: rebuild it (and its triggers) with room keys
+                logging.info("search: rebuilding %s with room keys", FTS_TABLE)
+                for trigger in _FTS_TRIGGERS:
+                    conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+                conn.execute(text(f"DROP TABLE {FTS_TABLE}"))
+                existed = False
+        for statement in _FTS_DDL:
+            conn.execute(text(statement))
+        if not existed:
+            logging.info("search: building %s from existing queue entries", FTS_TABLE)
+            conn.execute(text(_FTS_BACKFILL))
+        _fts_available = True
+    except Exception:
+        logging.exception("search: FTS5 index unavailable; queue.search will use LIKE fallback")
+        _fts_available = False
+    return _fts_available
+
+
+def build_match_query(raw: str) -> str:
+    """Turn free text into a safe FTS5 MATCH expression (AND of quoted prefix terms)."""
+    tokens = _TOKEN_RE.findall((raw or "")[:SEARCH_MAX_QUERY_LENGTH])
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _room_match(room_id: int, match: str) -> str:
+    """Scope a MATCH expression to one room; user terms only ever match title/author columns."""
+    return f'room_key : "r{int(room_id)}" AND {{title author_title}} : ({match})'
+
+
+def _fts_ready() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        try:
+            _fts_available = FTS_TABLE in inspect(db.engine).get_table_names()
+        except Exception:
+            _fts_available = False
+    return _fts_available
+
+
+def _search_fts(room_id: int, match: str, limit: int, offset: int) -> list[int]:
+    rows = db.session.execute(
+        text(
+            f"""
+            SELECT rowid
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH :match
+            ORDER BY bm25({FTS_TABLE}, :w_title, :w_author, :w_room), rowid DESC
+            LIMIT :limit OFFSET :offset
+            """
+        ),
+        {
+            "match": _room_match(room_id, match),
+            "w_title": _BM25_WEIGHTS[0],
+            "w_author": _BM25_WEIGHTS[1],
+            "w_room": _BM25_WEIGHTS[2],
+            "limit": limit,
+            "offset": offset,
+        },
+    ).all()
+    return [row[0] for row in rows]
+
+
+def _search_like(room_id: int, raw: str, limit: int, offset: int) -> list[int]:
+    query = (
+        db.session.query(QueueEntry.id)
+        .join(Queue, Queue.id == QueueEntry.queue_id)
+        .outerjoin(YouTubeAuthor, YouTubeAuthor.id == QueueEntry.youtube_author_id)
+        .filter(Queue.room_id == room_id)
+    )
+    for token in _TOKEN_RE.findall(raw[:SEARCH_MAX_QUERY_LENGTH]):
+        pattern = f"%{token}%"
+        query = query.filter(
+            or_(QueueEntry.title.ilike(pattern), YouTubeAuthor.title.ilike(pattern))
+        )
+    rows = query.order_by(QueueEntry.added_at.desc()).limit(limit).offset(offset).all()
+    return [row[0] for row in rows]
+
+
+def search_room_entries(
+    room_id: int, raw: str, limit: int = SEARCH_DEFAULT_LIMIT, offset: int = 0
+) -> tuple[list[QueueEntry], bool]:
+    """Return (ranked entries, has_more) for entries in any of the room's queues."""
+    limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+    offset = max(0, int(offset))
+    match = build_match_query(raw)
+    if not match:
+        return [], False
+
+    # Fetch one extra id to tell the client whether another page exists
+    if _fts_ready():
+        ids = _search_fts(room_id, match, limit + 1, offset)
+    else:
+        ids = _search_like(room_id, raw, limit + 1, offset)
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+    if not ids:
+        return [], False
+
+    entries_by_id = {
+        entry.id: entry
+        for entry in db.session.query(QueueEntry).filter(QueueEntry.id.in_(ids)).all()
+    }
+    return [entries_by_id[i] for i in ids if i in entries_by_id], has_more
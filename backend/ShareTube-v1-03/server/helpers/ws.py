@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from contextvars import ContextVar
+import time
 import traceback
 from typing import Callable, Optional
 from flask import Flask
@@ -16,19 +17,87 @@ from .redis import (
 )
 
 
-def get_user_id_from_socket() -> Optional[int]:
+# Key under which the connect-time identity is cached in the Socket.IO session
+SOCKET_AUTH_SESSION_KEY = "auth"
+
+
+def _get_socket_token() -> Optional[str]:
+    # Extension/mobile clients pass the JWT in the query string; the dashboard relies on its cookie
+    return request.args.get("token") or request.cookies.get("auth_token")
+
+
+def _get_socket_session() -> Optional[dict]:
     try:
-        token = request.args.get("token")
-        if not token:
-            return None
-        payload = jwt.decode(token, current_app.config["JWT_SECRET"], algorithms=["HS256"])
-        sub = payload.get("sub")
-        return int(sub) if sub is not None else None
+        return socketio.server.get_session(request.sid, namespace=request.namespace or "/")
     except Exception:
-        logging.exception("get_user_id_from_socket: failed to get user id from socket")
         return None
 
 
+def decode_socket_token() -> Optional[dict]:
+    """Verify the connecting socket's JWT and return its claims (None when missing or invalid)."""
+    token = _get_socket_token()
+    if not token:
+        return None
+    try:
+        return jwt.decode(token, current_app.config["JWT_SECRET"], algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        logging.info("decode_socket_token: token expired (sid=%s)", getattr(request, "sid", None))
+    except jwt.InvalidTokenError as e:
+        logging.warning("decode_socket_token: invalid token (sid=%s, error=%s)", getattr(request, "sid", None), e)
+    return None
+
+
+def authenticate_socket() -> Optional[int]:
+    """
+    Validate the socket's token once and cache the identity in its Socket.IO session.
+
+    Called from the connect handler; every later event reads the cached identity instead of
+    re-verifying the JWT.
+    """
+    claims = decode_socket_token()
+    if not claims or claims.get("sub") is None:
+        return None
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, ValueError):
+        return None
+    session = _get_socket_session()
+    if session is not None:
+        session[SOCKET_AUTH_SESSION_KEY] = {
+            "user_id": user_id,
+            "exp": claims.get("exp"),
+            "claims": claims,
+        }
+    return user_id
+
+
+def get_socket_identity() -> Optional[dict]:
+    """Cached connect-time identity for the current socket ({user_id, exp, claims}) or None."""
+    session = _get_socket_session()
+    if session is None:
+        return None
+    return session.get(SOCKET_AUTH_SESSION_KEY)
+
+
+def get_user_id_from_socket(allow_expired: bool = False) -> Optional[int]:
+    """
+    Return the authenticated user id for the current socket from the session cache.
+
+    Tokens that expire while the socket is open are rejected (and the client told via
+    auth.expired) unless allow_expired is set, which disconnect cleanup uses.
+    """
+    identity = get_socket_identity()
+    if identity is None:
+        # Connection predates the connect handler (or no session support): authenticate now
+        return authenticate_socket()
+    exp = identity.get("exp")
+    if exp is not None and not allow_expired and time.time() >= exp:
+        logging.info("get_user_id_from_socket: token expired (user_id=%s)", identity.get("user_id"))
+        socketio.emit("auth.expired", {}, to=request.sid)
+        return None
+    return identity.get("user_id")
+
+
 def emit_function_after_delay(
     function: Callable[..., None],
     *args,
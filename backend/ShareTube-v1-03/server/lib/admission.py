@@ -0,0 +1,236 @@
+"""
+Per-worker admission control and load shedding for Socket.IO connections and events.
+
+Problem:
+- A worker accepts every socket it is offered and python-socketio runs every incoming event in
+  its own greenlet, so a connection storm or a burst of searches/probes queues work until the
+  gevent hub is saturated and every room on the worker stutters.
+
+Solution:
+- ``install_admission_control()`` wraps the server's event dispatch, so every handler (including
+  ``connect``) passes through one gate before it runs.
+- New connections beyond ``SOCKETIO_MAX_SOCKETS`` Engine.IO sessions are refused with
+  ``server.busy`` and a jittered ``retry_after_ms``; the client waits that long before retrying,
+  so refused clients do not come back in lockstep.
+- Events are counted while their handler runs. Low-priority events (searches, probes, presence
+  re-syncs) are rejected once ``SOCKETIO_LOW_PRIORITY_MAX_INFLIGHT`` handlers are running,
+  everything else at ``SOCKETIO_MAX_INFLIGHT_HANDLERS``. ``disconnect`` and
+  ``room.leave`` release resources and are always admitted. A rejected event gets ``server.busy``
+  (as its ack, or as an event to the sender) without touching the database.
+- Events run in lanes so playback control never waits behind ``queue.add`` (which holds a pooled
+  DB connection across up to two 8-second YouTube API calls):
+  - control (play/pause/seek/skip/restart/ready) has its own in-flight pool of
+    ``SOCKETIO_CONTROL_MAX_INFLIGHT`` that other events cannot use up;
+  - bulk/external-I/O events (add, debug list load) run at most ``SOCKETIO_BULK_CONCURRENCY`` at
+    a time, kept below the DB pool size, and wait up to ``SOCKETIO_BULK_WAIT_MS`` for a slot;
+  - everything else shares ``SOCKETIO_MAX_INFLIGHT_HANDLERS`` with waiting and running bulk work.
+- Current sockets and in-flight handlers are published as gauges; rejections as counters.
+- A limit of 0 disables that check.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from typing import Any, Optional
+
+from socketio import exceptions as sio_exceptions
+
+from ..config import Config
+from ..extensions import socketio
+from . import metrics
+
+BUSY_EVENT = "server.busy"
+
+# Shed first when the worker is under pressure; clients can retry them without losing state
+LOW_PRIORITY_EVENTS = frozenset(
+    {
+        "queue.search",
+        "queue.probe",
+        "queue.load-debug-list",
+        "presence.sync",
+    }
+)
+# Handlers that free resources are never rejected
+EXEMPT_EVENTS = frozenset({"disconnect", "room.leave"})
+
+LANE_CONTROL = "control"
+LANE_BULK = "bulk"
+LANE_DEFAULT = "default"
+# Playback control: short DB writes that every member of the room is waiting on
+CONTROL_EVENTS = frozenset(
+    {
+        "room.control.play",
+        "room.control.pause",
+        "room.control.seek",
+        "room.control.skip",
+        "room.control.restartvideo",
+        "user.ready",
+    }
+)
+# Long-running work (external HTTP calls, bulk inserts) that must not crowd out control
+BULK_EVENTS = frozenset({"queue.add", "queue.load-debug-list"})
+
+# Handlers in the shared pool (default, low-priority and bulk events, waiting or running)
+_inflight: int = 0
+_control_inflight: int = 0
+_bulk_running: int = 0
+_bulk_slots: Optional[threading.BoundedSemaphore] = None
+_installed: bool = False
+
+
+def _max_sockets() -> int:
+    return int(getattr(Config, "SOCKETIO_MAX_SOCKETS", 2000))
+
+
+def _max_inflight() -> int:
+    return int(getattr(Config, "SOCKETIO_MAX_INFLIGHT_HANDLERS", 200))
+
+
+def _low_priority_max_inflight() -> int:
+    return int(getattr(Config, "SOCKETIO_LOW_PRIORITY_MAX_INFLIGHT", 100))
+
+
+def _control_max_inflight() -> int:
+    return int(getattr(Config, "SOCKETIO_CONTROL_MAX_INFLIGHT", 64))
+
+
+def _bulk_concurrency() -> int:
+    return int(getattr(Config, "SOCKETIO_BULK_CONCURRENCY", 4))
+
+
+def _bulk_wait_seconds() -> float:
+    return max(0, int(getattr(Config, "SOCKETIO_BULK_WAIT_MS", 5000))) / 1000
+
+
+def event_lane(event: str) -> str:
+    if event in CONTROL_EVENTS:
+        return LANE_CONTROL
+    if event in BULK_EVENTS:
+        return LANE_BULK
+    return LANE_DEFAULT
+
+
+def retry_after_ms() -> int:
+    """Jittered delay (0.5x-1.5x ``SOCKETIO_RETRY_AFTER_MS``) so rejected clients spread out."""
+    base = int(getattr(Config, "SOCKETIO_RETRY_AFTER_MS", 2000))
+    return int(base * random.uniform(0.5, 1.5))
+
+
+def socket_count() -> int:
+    """Engine.IO sessions open in this worker (including the one being admitted)."""
+    try:
+        return len(socketio.server.eio.sockets)
+    except Exception:
+        return 0
+
+
+def _update_gauges() -> None:
+    metrics.set_gauge("socket.load.sockets", socket_count())
+    _update_inflight_gauges()
+
+
+def _update_inflight_gauges() -> None:
+    metrics.set_gauge("socket.load.inflight", _inflight)
+    metrics.set_gauge("socket.load.inflight.control", _control_inflight)
+    metrics.set_gauge("socket.load.inflight.bulk", _bulk_running)
+
+
+def _admit_connect() -> None:
+    limit = _max_sockets()
+    count = socket_count()
+    if limit > 0 and count > limit:
+        delay = retry_after_ms()
+        metrics.incr("socket.admission.rejected.connect")
+        logging.warning("admission: refusing socket (%d open, limit %d, retry in %dms)", count, limit, delay)
+        raise sio_exceptions.ConnectionRefusedError(BUSY_EVENT, {"retry_after_ms": delay})
+
+
+def _event_limit(event: str) -> int:
+    if event in LOW_PRIORITY_EVENTS:
+        return _low_priority_max_inflight()
+    return _max_inflight()
+
+
+def _reject_event(event: str, sid: Any, reason: str) -> dict:
+    payload = {"event": event, "retry_after_ms": retry_after_ms()}
+    metrics.incr(f"socket.admission.rejected.{reason}")
+    try:
+        socketio.emit(BUSY_EVENT, payload, to=sid)
+    except Exception:
+        logging.exception("admission: failed to notify %s of rejected %s", sid, event)
+    return {"error": BUSY_EVENT, **payload}
+
+
+def install_admission_control() -> None:
+    """Gate connects and event handlers on this worker's socket and in-flight handler limits."""
+    global _installed, _bulk_slots
+    if _installed:
+        return
+    server = socketio.server
+    trigger_event = server._trigger_event
+    if _bulk_concurrency() > 0:
+        _bulk_slots = threading.BoundedSemaphore(_bulk_concurrency())
+
+    def _run_control(event, namespace, *args):
+        global _control_inflight
+        limit = _control_max_inflight()
+        if limit > 0 and _control_inflight >= limit:
+            return _reject_event(event, args[0] if args else None, "overload")
+        _control_inflight += 1
+        _update_inflight_gauges()
+        try:
+            return trigger_event(event, namespace, *args)
+        finally:
+            _control_inflight -= 1
+            _update_inflight_gauges()
+
+    def _run_bulk(event, namespace, *args):
+        global _bulk_running
+        if _bulk_slots is None:
+            return trigger_event(event, namespace, *args)
+        if not _bulk_slots.acquire(timeout=_bulk_wait_seconds()):
+            return _reject_event(event, args[0] if args else None, "bulk_wait")
+        _bulk_running += 1
+        _update_inflight_gauges()
+        try:
+            return trigger_event(event, namespace, *args)
+        finally:
+            _bulk_running -= 1
+            _bulk_slots.release()
+            _update_inflight_gauges()
+
+    def _trigger_event(event, namespace, *args):
+        global _inflight
+        if event == "connect":
+            _admit_connect()
+            _update_gauges()
+            return trigger_event(event, namespace, *args)
+        if event in EXEMPT_EVENTS:
+            try:
+                return trigger_event(event, namespace, *args)
+            finally:
+                _update_gauges()
+
+        lane = event_lane(event)
+        if lane == LANE_CONTROL:
+            return _run_control(event, namespace, *args)
+
+        limit = _event_limit(event)
+        if limit > 0 and _inflight >= limit:
+            reason = "low_priority" if event in LOW_PRIORITY_EVENTS else "overload"
+            return _reject_event(event, args[0] if args else None, reason)
+        _inflight += 1
+        _update_inflight_gauges()
+        try:
+            if lane == LANE_BULK:
+                return _run_bulk(event, namespace, *args)
+            return trigger_event(event, namespace, *args)
+        finally:
+            _inflight -= 1
+            _update_inflight_gauges()
+
+    server._trigger_event = _trigger_event
+    _installed = True
+    _update_gauges()
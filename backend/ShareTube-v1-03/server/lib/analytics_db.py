@@ -0,0 +1,115 @@
+"""
+Read-only database engine for dashboard/analytics queries.
+
+Problem:
+- Dashboard stats run full-table COUNTs and scans on the same pooled connections that serve
+  realtime room writes, so a heavy admin page could hold up commit_with_retry in live rooms.
+
+Solution:
+- A separate engine with its own small pool, opened with SQLite ``mode=ro`` and
+  ``PRAGMA query_only=ON`` so it can never take the write lock.
+- A per-statement timeout enforced through the SQLite progress handler (SQLite has no native
+  statement timeout); statements that run too long are interrupted.
+- ``analytics_session()`` hands out a short-lived session that always ends its read transaction
+  (rollback + close) on exit, so WAL checkpoints are never pinned by an idle dashboard read.
+- Non-SQLite engines get the same separate pool without the SQLite-specific knobs.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from urllib.parse import quote
+
+from flask import current_app
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session
+
+# Progress handler granularity (SQLite VM instructions between timeout checks)
+_PROGRESS_HANDLER_STEPS = 10000
+
+_engine: Optional[Engine] = None
+_engine_url: Optional[str] = None
+
+
+def _readonly_sqlite_url(database: str) -> str:
+    return f"sqlite:///file:{quote(database)}?mode=ro&uri=true"
+
+
+def _install_sqlite_guards(engine: Engine, statement_timeout_ms: int) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+
+    if statement_timeout_ms <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _arm_statement_timeout(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+        deadline = time.monotonic() + statement_timeout_ms / 1000
+
+        # Returning non-zero from the progress handler interrupts the running statement
+        def _check_deadline() -> int:
+            return 1 if time.monotonic() > deadline else 0
+
+        conn.connection.dbapi_connection.set_progress_handler(_check_deadline, _PROGRESS_HANDLER_STEPS)
+
+    # Left armed until checkin so rows fetched after execute() are still covered by the deadline
+    @event.listens_for(engine, "checkin")
+    def _disarm_statement_timeout(dbapi_connection, _record) -> None:
+        if dbapi_connection is not None:
+            dbapi_connection.set_progress_handler(None, 0)
+
+
+def get_analytics_engine() -> Engine:
+    """Return the process-wide read-only engine, creating it on first use."""
+    global _engine, _engine_url
+    config = current_app.config
+    primary_url = config["SQLALCHEMY_DATABASE_URI"]
+    if _engine is not None and _engine_url == primary_url:
+        return _engine
+
+    pool_size = int(config.get("ANALYTICS_DB_POOL_SIZE", 2))
+    statement_timeout_ms = int(config.get("ANALYTICS_DB_STATEMENT_TIMEOUT_MS", 5000))
+    busy_timeout_s = int(config.get("ANALYTICS_DB_BUSY_TIMEOUT_MS", 2000)) / 1000
+
+    url = make_url(primary_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        engine = create_engine(
+            _readonly_sqlite_url(url.database),
+            pool_size=pool_size,
+            max_overflow=0,
+            pool_timeout=busy_timeout_s,
+            pool_pre_ping=False,
+            connect_args={"timeout": busy_timeout_s, "check_same_thread": False},
+        )
+        _install_sqlite_guards(engine, statement_timeout_ms)
+    else:
+        engine = create_engine(primary_url, pool_size=pool_size, max_overflow=0)
+
+    if _engine is not None:
+        _engine.dispose()
+    _engine = engine
+    _engine_url = primary_url
+    logging.info("analytics_db: read-only engine ready (pool_size=%s)", pool_size)
+    return _engine
+
+
+@contextmanager
+def analytics_session() -> Iterator[Session]:
+    """Short-lived read-only session; the read transaction always ends when the block exits."""
+    session = Session(bind=get_analytics_engine(), autoflush=False, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        try:
+            session.rollback()
+        finally:
+            session.close()
@@ -0,0 +1,241 @@
+"""
+Online SQLite backups using the SQLite backup API.
+
+Problem:
+- The only safe way to back up the live database was to stop the service, or to copy the file
+  and hope the WAL was consistent at that instant.
+
+Solution:
+- Copy the database with ``sqlite3.Connection.backup`` a few pages at a time, sleeping between
+  steps so writers only ever wait for one short step instead of the whole copy.
+- Write each snapshot to a temp file, gzip it, atomically move it into place and keep the newest
+  ``BACKUP_KEEP`` snapshots.
+- Log duration, pages copied, restarts and the time spent inside backup steps (holding the read
+  lock), and keep the last run's stats for inspection.
+- Only the worker that claims the "backup" background slot runs the loop.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from flask import Flask
+
+from ..config import Config
+from ..extensions import db, socketio
+from .background_slots import claim_background_slot
+
+_backup_thread_started: bool = False
+_last_backup_stats: Optional[dict[str, Any]] = None
+
+# Chunk size used when gzipping a finished snapshot (yields to the event loop between chunks)
+_COMPRESS_CHUNK_BYTES = 1024 * 1024
+
+
+class BackupAborted(Exception):
+    """Raised from the progress callback to stop a backup that exceeded BACKUP_MAX_SECONDS."""
+
+
+def _backup_dir(app: Flask) -> Path:
+    configured = (app.config.get("BACKUP_DIR") or "").strip()
+    if configured:
+        return Path(configured)
+    version = app.config.get("VERSION", getattr(Config, "VERSION", "v1-01"))
+    return Path(getattr(Config, "_ROOT", ".")) / "instance" / str(version) / "backups"
+
+
+def _sqlite_path() -> Optional[str]:
+    """Filesystem path of the bound SQLite database, or None for other engines / in-memory DBs."""
+    url = db.engine.url
+    if url.get_backend_name() != "sqlite":
+        return None
+    database = url.database or ""
+    if not database or database == ":memory:":
+        return None
+    return database
+
+
+def get_last_backup_stats() -> Optional[dict[str, Any]]:
+    """Stats from the most recent backup run in this worker (None before the first run)."""
+    return dict(_last_backup_stats) if _last_backup_stats else None
+
+
+def _copy_online(
+    source_path: str,
+    dest_path: Path,
+    pages_per_step: int,
+    step_sleep_seconds: float,
+    max_seconds: float,
+) -> dict[str, Any]:
+    """Copy source_path into dest_path in page steps; returns step/lock accounting."""
+    stats: dict[str, Any] = {
+        "pages_total": 0,
+        "pages_copied": 0,
+        "steps": 0,
+        "restarts": 0,
+        "lock_held_ms": 0.0,
+        "slept_ms": 0.0,
+    }
+    started = time.monotonic()
+    step_started = [time.monotonic()]
+    previous_remaining: list[Optional[int]] = [None]
+
+    def _progress(_status: int, remaining: int, total: int) -> None:
+        # Time between the end of the last sleep and now was spent inside sqlite3_backup_step
+        now = time.monotonic()
+        stats["lock_held_ms"] += (now - step_started[0]) * 1000
+        stats["steps"] += 1
+        stats["pages_total"] = total
+
+        prev = previous_remaining[0] if previous_remaining[0] is not None else total
+        if remaining > prev:
+            # Another connection wrote to the source; SQLite restarted the copy from page 1
+            stats["restarts"] += 1
+            prev = total
+        stats["pages_copied"] += max(0, prev - remaining)
+        previous_remaining[0] = remaining
+
+        if max_seconds > 0 and now - started > max_seconds:
+            raise BackupAborted(f"backup exceeded {max_seconds:.0f}s")
+        if remaining > 0 and step_sleep_seconds > 0:
+            sleep_started = time.monotonic()
+            socketio.sleep(step_sleep_seconds)
+            stats["slept_ms"] += (time.monotonic() - sleep_started) * 1000
+        step_started[0] = time.monotonic()
+
+    source = sqlite3.connect(source_path, timeout=15)
+    dest = sqlite3.connect(str(dest_path))
+    try:
+        source.backup(dest, pages=max(1, pages_per_step), progress=_progress)
+    finally:
+        dest.close()
+        source.close()
+    return stats
+
+
+def _compress(raw_path: Path, final_path: Path) -> int:
+    """Gzip raw_path into final_path atomically; returns the compressed size in bytes."""
+    tmp_path = final_path.with_name(final_path.name + ".tmp")
+    with open(raw_path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+        while True:
+            chunk = src.read(_COMPRESS_CHUNK_BYTES)
+            if not chunk:
+                break
+            dst.write(chunk)
+            socketio.sleep(0)
+    os.replace(tmp_path, final_path)
+    return final_path.stat().st_size
+
+
+def _rotate(directory: Path, prefix: str, keep: int) -> list[str]:
+    snapshots = sorted(directory.glob(f"{prefix}-*.db.gz"))
+    removed: list[str] = []
+    for old in snapshots[: max(0, len(snapshots) - max(1, keep))]:
+        try:
+            old.unlink()
+            removed.append(old.name)
+        except OSError:
+            logging.warning("backup: failed to remove old snapshot %s", old)
+    return removed
+
+
+def run_backup(app: Flask) -> Optional[dict[str, Any]]:
+    """Take one online snapshot of the SQLite database; returns run stats or None if skipped."""
+    global _last_backup_stats
+    with app.app_context():
+        source_path = _sqlite_path()
+    if not source_path:
+        logging.info("backup: database is not a file-backed SQLite database; skipping")
+        return None
+
+    directory = _backup_dir(app)
+    directory.mkdir(parents=True, exist_ok=True)
+    prefix = app.config.get("APP_NAME", getattr(Config, "APP_NAME", "ShareTube"))
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    raw_path = directory / f".{prefix}-{stamp}.db.partial"
+    final_path = directory / f"{prefix}-{stamp}.db.gz"
+
+    started = time.monotonic()
+    try:
+        stats = _copy_online(
+            source_path,
+            raw_path,
+            pages_per_step=int(app.config.get("BACKUP_PAGES_PER_STEP", 256)),
+            step_sleep_seconds=int(app.config.get("BACKUP_STEP_SLEEP_MS", 50)) / 1000,
+            max_seconds=float(app.config.get("BACKUP_MAX_SECONDS", 600)),
+        )
+        copied_at = time.monotonic()
+        stats["bytes"] = _compress(raw_path, final_path)
+        stats["copy_seconds"] = round(copied_at - started, 3)
+        stats["compress_seconds"] = round(time.monotonic() - copied_at, 3)
+    finally:
+        try:
+            raw_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    stats["duration_seconds"] = round(time.monotonic() - started, 3)
+    stats["lock_held_ms"] = round(stats["lock_held_ms"], 1)
+    stats["slept_ms"] = round(stats["slept_ms"], 1)
+    stats["path"] = str(final_path)
+    stats["finished_at"] = int(time.time())
+    stats["rotated"] = _rotate(directory, prefix, int(app.config.get("BACKUP_KEEP", 7)))
+    _last_backup_stats = stats
+    logging.info(
+        "backup: wrote %s (%s bytes) in %.2fs; pages=%s/%s steps=%s restarts=%s lock_held=%.1fms slept=%.1fms",
+        final_path.name,
+        stats["bytes"],
+        stats["duration_seconds"],
+        stats["pages_copied"],
+        stats["pages_total"],
+        stats["steps"],
+        stats["restarts"],
+        stats["lock_held_ms"],
+        stats["slept_ms"],
+    )
+    return stats
+
+
+def _backup_forever(app: Flask) -> None:
+    """Background loop taking a snapshot every BACKUP_INTERVAL_SECONDS."""
+    interval = int(app.config.get("BACKUP_INTERVAL_SECONDS", 21600))
+    while True:
+        # Sleep first so restarts/deploys do not each produce a snapshot
+        socketio.sleep(interval)
+        try:
+            run_backup(app)
+        except BackupAborted as e:
+            logging.warning("backup: aborted (%s)", e)
+        except Exception:
+            logging.exception("backup: snapshot failed")
+
+
+def start_backup_if_needed(app: Flask) -> None:
+    """Start the periodic backup task in the worker that claims the backup slot."""
+    global _backup_thread_started
+    try:
+        if _backup_thread_started:
+            return
+        if int(app.config.get("BACKUP_INTERVAL_SECONDS", 21600)) <= 0:
+            return
+        with app.app_context():
+            if not _sqlite_path():
+                return
+
+        slot = claim_background_slot(app, task="backup", slots=1)
+        if not slot:
+            app.logger.info("backup: background backups disabled in this worker (no slot claimed)")
+            return
+
+        socketio.start_background_task(_backup_forever, app)
+        _backup_thread_started = True
+        app.logger.info("backup: started periodic backups (slot=%s, dir=%s)", slot, _backup_dir(app))
+    except Exception:
+        logging.exception("failed to start backup thread")
@@ -0,0 +1,231 @@
+"""
+Per-event emit buffer flushed only after the handler's transaction commits.
+
+Problem:
+- Socket handlers interleave ``socketio.emit`` with database work, so rooms could see updates
+  for state that was later rolled back (or broadcast before the commit landed), and every emit
+  was its own publish through the message queue.
+
+Solution:
+- Inside a Socket.IO event (request context with a ``sid``), ``emit()`` appends to a buffer on
+  ``flask.g`` instead of sending.
+- ``after_commit`` on ``db.session`` flushes the buffer; ``after_rollback`` discards it.
+- Consecutive emits to the same target are merged into one ``emit.batch`` frame
+  (``{"events": [{"event", "data"}, ...]}``) so they cost a single publish; clients unwrap it and
+  dispatch each event to the normal listeners in order. ``socket_outbound.COALESCED_EVENTS``
+  (``room.playback``, ``presence.update``) are never merged, so a backlogged socket can still
+  replace a held one with a newer frame.
+- Whatever is still buffered when the event finishes is flushed from ``teardown_request``; room
+  broadcasts left behind by uncommitted writes are dropped there, while replies to the caller
+  (errors, acks) are always delivered.
+- Outside a socket event (background tasks, HTTP) ``emit()`` sends immediately.
+- Room broadcasts (``room:{code}`` targets) are stamped with the room's ``seq`` and logged for
+  resume-from-seq rejoins at send time, so discarded emits never consume a seq.
+- ``caller_replies()`` lists what the event has sent (or will send) to the caller, so idempotent
+  handlers can answer a duplicate with the same replies.
+- ``emit_reply()`` sends a room's request/response reply to one socket instead of the room and
+  counts the frames that saved (``emit.targeted.*`` metrics).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from flask import Flask, g, has_request_context, request
+from sqlalchemy import event
+
+from ..extensions import db, socketio
+from ..helpers.room_log import append_room_event
+from . import metrics
+from .socket_outbound import COALESCED_EVENTS
+
+BATCH_EVENT = "emit.batch"
+
+_installed: bool = False
+# Rooms that received at least one targeted reply in this worker (denominator for the per-room rate)
+_targeted_rooms: set[str] = set()
+_targeted_since = time.time()
+
+
+@dataclass
+class _EmitBuffer:
+    sid: str
+    pending: list[tuple[str, Any, str]] = field(default_factory=list)
+    # Emits to the caller already flushed, in order
+    sent_replies: list[tuple[str, Any]] = field(default_factory=list)
+    # Set when writes reach the database inside the open transaction (cleared on commit/rollback)
+    uncommitted_writes: bool = False
+
+
+def _current_buffer() -> Optional[_EmitBuffer]:
+    """Buffer for the Socket.IO event being handled, or None outside a socket event."""
+    if not has_request_context():
+        return None
+    sid = getattr(request, "sid", None)
+    if sid is None:
+        return None
+    buffer = g.get("emit_buffer")
+    if buffer is None:
+        buffer = _EmitBuffer(sid=sid)
+        g.emit_buffer = buffer
+    return buffer
+
+
+def emit(event_name: str, data: Any = None, to: Optional[str] = None) -> None:
+    """Emit now outside socket events; inside one, defer until the transaction commits."""
+    buffer = _current_buffer()
+    if buffer is None:
+        socketio.emit(event_name, _stamp(event_name, data, to), to=to)
+        return
+    buffer.pending.append((event_name, data, to or buffer.sid))
+    metrics.incr("emit.buffer.deferred")
+
+
+def _record_targeted_emit(code: str) -> None:
+    """Count a reply sent to one socket and the room-wide frames it would otherwise have cost."""
+    try:
+        members = socketio.server.manager.rooms.get("/", {}).get(f"room:{code}") or {}
+        metrics.incr("emit.targeted")
+        metrics.incr("emit.targeted.frames_saved", max(0, len(members) - 1))
+        _targeted_rooms.add(code)
+        hours = max((time.time() - _targeted_since) / 3600, 1 / 60)
+        metrics.set_gauge(
+            "emit.targeted.frames_saved_per_room_hour",
+            round(metrics.get_counter("emit.targeted.frames_saved") / len(_targeted_rooms) / hours, 1),
+        )
+    except Exception:
+        logging.debug("emit_buffer: failed to record targeted emit metrics", exc_info=True)
+
+
+def emit_reply(code: str, event_name: str, data: Any = None, to: Optional[str] = None) -> None:
+    """
+    Emit a reply for room ``code`` to one socket: ``to``, else the caller of the current socket
+    event. Outside a socket event without ``to`` it falls back to the room broadcast.
+    """
+    if not to:
+        buffer = _current_buffer()
+        to = buffer.sid if buffer is not None else None
+    if to:
+        _record_targeted_emit(code)
+    emit(event_name, data, to=to or f"room:{code}")
+
+
+def _stamp(event_name: str, data: Any, to: Optional[str]) -> Any:
+    """Attach the room seq to a room broadcast (and log it); other targets pass through."""
+    if not to or not to.startswith("room:") or not isinstance(data, dict):
+        return data
+    try:
+        return {**data, "seq": append_room_event(to[len("room:"):], event_name, data)}
+    except Exception:
+        logging.exception("emit_buffer: failed to stamp room seq (event=%s)", event_name)
+        return data
+
+
+def _send(pending: list[tuple[str, Any, str]]) -> None:
+    """Send buffered emits in order, merging consecutive emits to the same target."""
+    index = 0
+    while index < len(pending):
+        target = pending[index][2]
+        run = [pending[index]]
+        index += 1
+        while (
+            index < len(pending)
+            and pending[index][2] == target
+            and run[0][0] not in COALESCED_EVENTS
+            and pending[index][0] not in COALESCED_EVENTS
+        ):
+            run.append(pending[index])
+            index += 1
+
+        if len(run) == 1:
+            socketio.emit(run[0][0], _stamp(run[0][0], run[0][1], target), to=target)
+        else:
+            socketio.emit(
+                BATCH_EVENT,
+                {"events": [{"event": name, "data": _stamp(name, data, target)} for name, data, _ in run]},
+                to=target,
+            )
+            metrics.incr("emit.buffer.merged", len(run) - 1)
+        metrics.incr("emit.buffer.published")
+
+
+def _flush(buffer: _EmitBuffer) -> None:
+    pending, buffer.pending = buffer.pending, []
+    if not pending:
+        return
+    buffer.sent_replies.extend((name, data) for name, data, target in pending if target == buffer.sid)
+    try:
+        _send(pending)
+    except Exception:
+        logging.exception("emit_buffer: failed to flush %s emits", len(pending))
+
+
+def caller_replies() -> list[dict]:
+    """Emits to the caller of the current socket event (sent and still buffered) as {event, data}."""
+    buffer = g.get("emit_buffer") if has_request_context() else None
+    if buffer is None:
+        return []
+    replies = list(buffer.sent_replies)
+    replies.extend((name, data) for name, data, target in buffer.pending if target == buffer.sid)
+    return [{"event": name, "data": data} for name, data in replies]
+
+
+def _on_after_flush(_session, _flush_context) -> None:
+    buffer = _current_buffer()
+    if buffer is not None:
+        buffer.uncommitted_writes = True
+
+
+def _on_after_commit(_session) -> None:
+    buffer = _current_buffer()
+    if buffer is None:
+        return
+    buffer.uncommitted_writes = False
+    _flush(buffer)
+
+
+def _on_after_rollback(_session) -> None:
+    buffer = _current_buffer()
+    if buffer is None:
+        return
+    buffer.uncommitted_writes = False
+    if buffer.pending:
+        metrics.incr("emit.buffer.discarded", len(buffer.pending))
+        logging.info("emit_buffer: discarded %s emits after rollback", len(buffer.pending))
+        buffer.pending = []
+
+
+def _flush_at_teardown(_exc: Optional[BaseException] = None) -> None:
+    buffer = g.get("emit_buffer")
+    if buffer is None or not buffer.pending:
+        return
+    session_dirty = buffer.uncommitted_writes
+    try:
+        session = db.session()
+        session_dirty = session_dirty or bool(session.new or session.dirty or session.deleted)
+    except Exception:
+        pass
+    if session_dirty:
+        # Room broadcasts describing state that never committed would be phantom updates
+        kept = [item for item in buffer.pending if item[2] == buffer.sid]
+        dropped = len(buffer.pending) - len(kept)
+        if dropped:
+            metrics.incr("emit.buffer.discarded", dropped)
+            logging.info("emit_buffer: dropped %s broadcasts for uncommitted changes", dropped)
+        buffer.pending = kept
+    _flush(buffer)
+
+
+def install_emit_buffer(app: Flask) -> None:
+    """Hook the buffer into db.session transaction events and the per-event teardown."""
+    global _installed
+    app.teardown_request(_flush_at_teardown)
+    if _installed:
+        return
+    event.listen(db.session, "after_flush", _on_after_flush)
+    event.listen(db.session, "after_commit", _on_after_commit)
+    event.listen(db.session, "after_rollback", _on_after_rollback)
+    _installed = True
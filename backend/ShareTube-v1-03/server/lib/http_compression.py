@@ -0,0 +1,80 @@
+"""
+Response compression for large JSON payloads.
+
+Problem:
+- ``/api/*`` and the dashboard JSON APIs (users, rooms, queues, activity) return large arrays
+  uncompressed; Nginx only proxies them.
+
+Solution:
+- An ``after_request`` hook compresses JSON responses of at least ``HTTP_COMPRESS_MIN_BYTES``
+  with Brotli (when the ``brotli`` package is installed and the client accepts ``br``) or gzip.
+- Small bodies are left alone: below the threshold the CPU cost outweighs the bytes saved.
+- Streamed responses, already-encoded bodies and non-2xx responses pass through untouched.
+"""
+
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+from flask import Flask, Response, request
+
+from ..config import Config
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def _min_bytes() -> int:
+    return int(getattr(Config, "HTTP_COMPRESS_MIN_BYTES", 1024))
+
+
+def _choose_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=int(getattr(Config, "HTTP_COMPRESS_BR_QUALITY", 4)))
+    return gzip.compress(body, compresslevel=int(getattr(Config, "HTTP_COMPRESS_GZIP_LEVEL", 6)))
+
+
+def _compress_response(response: Response) -> Response:
+    min_bytes = _min_bytes()
+    if min_bytes <= 0 or not response.is_json:
+        return response
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if not 200 <= response.status_code < 300 or "Content-Encoding" in response.headers:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    compressed = compress_body(body, encoding)
+    if len(compressed) >= len(body):
+        return response
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    metrics.incr(f"http.compress.{encoding}")
+    metrics.incr("http.compress.bytes_in", len(body))
+    metrics.incr("http.compress.bytes_out", len(compressed))
+    return response
+
+
+def install_http_compression(app: Flask) -> None:
+    """Compress large JSON responses for clients that accept gzip or br."""
+    app.after_request(_compress_response)
@@ -0,0 +1,100 @@
+"""
+Pluggable JSON codec shared by Flask responses, Socket.IO packets and the Redis replay logs.
+
+Problem:
+- ``jsonify``, every Socket.IO packet and the room/queue replay logs encode with the stdlib
+  ``json`` module; ``Room.to_dict()`` / ``QueueEntry.to_dict()`` snapshots are encoded again for
+  each broadcast, for the replay log and for each HTTP response.
+
+Solution:
+- ``dumps``/``loads`` use orjson when it is installed (``JSON_CODEC=auto``, the default, or
+  ``orjson``) and the stdlib otherwise (``JSON_CODEC=stdlib`` forces it).
+- Calls orjson cannot serve (unsupported keyword arguments, integers beyond 64 bits) fall back to
+  the stdlib per call, so anything the stdlib could encode still encodes.
+- The module itself is the Socket.IO ``json`` hook (python-socketio only calls ``dumps`` and
+  ``loads``); ``CodecJSONProvider`` plugs the same codec into Flask.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Optional, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+from ..config import Config
+from . import metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Keyword arguments orjson output already satisfies (it is always compact UTF-8)
+_ORJSON_IGNORED_KWARGS = frozenset({"separators", "ensure_ascii"})
+
+
+def _select_orjson() -> bool:
+    choice = str(getattr(Config, "JSON_CODEC", "auto")).strip().lower()
+    return orjson is not None and choice != "stdlib"
+
+
+_USE_ORJSON = _select_orjson()
+
+
+def codec_name() -> str:
+    return "orjson" if _USE_ORJSON else "stdlib"
+
+
+def _safe_int(text: str) -> int:
+    # Same guard engine.io applies to inbound packets: huge integer literals are a parsing DoS
+    if len(text) > 100:
+        raise ValueError("Integer is too large")
+    return int(text)
+
+
+def dumps(
+    obj: Any,
+    *,
+    default: Optional[Callable[[Any], Any]] = None,
+    sort_keys: bool = False,
+    indent: Optional[int] = None,
+    **kwargs: Any,
+) -> str:
+    """Serialize ``obj`` to a JSON ``str`` (compact unless ``indent`` is given)."""
+    if _USE_ORJSON and indent in (None, 2) and not kwargs.keys() - _ORJSON_IGNORED_KWARGS:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if default is not None:
+            # Let the caller's default format these the way the stdlib path would
+            option |= orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        try:
+            return orjson.dumps(obj, default=default, option=option).decode("utf-8")
+        except TypeError:
+            metrics.incr("json_codec.fallback")
+    if indent is None:
+        kwargs.setdefault("separators", (",", ":"))
+    return json.dumps(obj, default=default, sort_keys=sort_keys, indent=indent, **kwargs)
+
+
+def loads(s: Any, **kwargs: Any) -> Any:
+    """Deserialize a JSON document from ``str`` or ``bytes``."""
+    if _USE_ORJSON and not kwargs:
+        return orjson.loads(s)
+    kwargs.setdefault("parse_int", _safe_int)
+    return json.loads(s, **kwargs)
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by the shared codec (keeps Flask's defaults and sort order)."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return dumps(obj, **kwargs)
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return loads(s, **kwargs)
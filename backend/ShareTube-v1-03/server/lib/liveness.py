@@ -0,0 +1,189 @@
+"""
+User liveness derived from Engine.IO transport heartbeats.
+
+Problem:
+- Engine.IO already pings every socket (``ping_interval=10``) and closes it when the pong does not
+  come back within ``ping_timeout``, yet the extension relayed each transport pong as an app-level
+  ``client.pong`` event whose handler committed ``User.last_seen`` to SQLite: one extra event and
+  one write per socket every ten seconds, only so the heartbeat sweep could spot stale users.
+
+Solution:
+- ``install_transport_liveness()`` hooks Engine.IO's packet receive path. A PONG marks the
+  socket's user alive in an in-process record (no I/O on the transport path); sockets are bound
+  to users by the connect handler and dropped by the disconnect handler.
+- With Redis, each worker publishes the users it saw pong to one sorted set (user id scored by
+  last pong time) every ``LIVENESS_PUBLISH_SECONDS`` in a single ZADD, so the sweep, which runs in
+  one worker, sees sockets on every worker. Without Redis there is one worker and the sweep reads
+  the in-process record.
+- ``alive_user_ids(since)`` is what the heartbeat sweep checks before cleaning a user up.
+- ``User.last_seen`` is only written on join, leave and disconnect, so it now means "last room
+  join/leave" rather than "last heartbeat": the dashboard's "last seen" column and
+  ``get_user_stats()['recent_active']`` lag for users who stay connected for a long time. Ask
+  ``alive_user_ids()`` for who is connected right now.
+- Dead sockets are still closed by Engine.IO's ping timeout and cleaned up by the disconnect
+  handler; the sweep only catches users whose disconnect never ran (e.g. a worker that died).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Optional
+
+from flask import Flask, request
+
+from ..config import Config
+from ..extensions import socketio
+from . import metrics
+from .utils import get_redis_client
+
+# Sorted set of user ids scored by their latest transport pong (unix seconds)
+LIVENESS_KEY = "presence:alive"
+
+# Engine.IO sid -> user id of the sockets connected to this worker
+_socket_users: dict[str, int] = {}
+# User id -> unix time of the latest pong (or connect) seen by this worker
+_last_alive: dict[int, float] = {}
+# Users marked alive since the last publish to Redis
+_unpublished: set[int] = set()
+_installed: bool = False
+_publisher_started: bool = False
+
+
+def _publish_interval_seconds() -> float:
+    return max(1, int(getattr(Config, "LIVENESS_PUBLISH_SECONDS", 5)))
+
+
+def _retention_seconds() -> int:
+    """Local records older than this cannot keep a user alive past the sweep's timeout."""
+    return max(60, int(getattr(Config, "PONG_TIMEOUT_SECONDS", 20)) * 3)
+
+
+def _current_eio_sid() -> Optional[str]:
+    try:
+        return socketio.server.manager.eio_sid_from_sid(request.sid, request.namespace or "/")
+    except Exception:
+        return None
+
+
+def _mark_alive(user_id: int) -> None:
+    _last_alive[user_id] = time.time()
+    _unpublished.add(user_id)
+
+
+def _on_transport_pong(eio_sid: str) -> None:
+    user_id = _socket_users.get(eio_sid)
+    if user_id is None:
+        return
+    _mark_alive(user_id)
+    metrics.incr("liveness.pong")
+
+
+def track_socket_liveness(user_id: int) -> None:
+    """Bind the connecting socket to its user and mark the user alive; called on connect."""
+    eio_sid = _current_eio_sid()
+    if eio_sid:
+        _socket_users[eio_sid] = user_id
+    _mark_alive(user_id)
+    metrics.set_gauge("liveness.sockets", len(_socket_users))
+
+
+def forget_socket_liveness() -> None:
+    """Unbind the disconnecting socket; the user's record ages out unless another socket pongs."""
+    eio_sid = _current_eio_sid()
+    if eio_sid:
+        _socket_users.pop(eio_sid, None)
+    metrics.set_gauge("liveness.sockets", len(_socket_users))
+
+
+def publish_liveness() -> int:
+    """Push users seen alive since the last publish to Redis; returns how many were published."""
+    if not _unpublished:
+        return 0
+    redis_client = get_redis_client()
+    if not redis_client:
+        return 0
+    published = {user_id: _last_alive.get(user_id, time.time()) for user_id in list(_unpublished)}
+    try:
+        pipe = redis_client.pipeline()
+        # GT: a worker publishing an older pong must not move a user's score backwards
+        pipe.zadd(LIVENESS_KEY, {str(user_id): ts for user_id, ts in published.items()}, gt=True)
+        pipe.expire(LIVENESS_KEY, _retention_seconds())
+        pipe.execute()
+    except Exception:
+        logging.exception("liveness: failed to publish %s users to Redis", len(published))
+        return 0
+    _unpublished.difference_update(published)
+    metrics.incr("liveness.published", len(published))
+    return len(published)
+
+
+def _prune_local(since: float) -> None:
+    bound = set(_socket_users.values())
+    for user_id, ts in list(_last_alive.items()):
+        if ts < since and user_id not in bound:
+            _last_alive.pop(user_id, None)
+            _unpublished.discard(user_id)
+
+
+def alive_user_ids(since: float) -> set[int]:
+    """Users with a transport pong (or connect) at or after ``since`` (unix seconds), any worker."""
+    _prune_local(time.time() - _retention_seconds())
+    alive = {user_id for user_id, ts in _last_alive.items() if ts >= since}
+    redis_client = get_redis_client()
+    if redis_client:
+        try:
+            pipe = redis_client.pipeline()
+            # Entries this old can never make a user alive again
+            pipe.zremrangebyscore(LIVENESS_KEY, "-inf", f"({since}")
+            pipe.zrangebyscore(LIVENESS_KEY, since, "+inf")
+            _removed, members = pipe.execute()
+            alive.update(int(member) for member in members)
+        except Exception:
+            logging.exception("liveness: failed to read alive users from Redis")
+    return alive
+
+
+def _publish_forever(app: Flask) -> None:
+    """Per-worker loop publishing transport liveness to Redis."""
+    interval = _publish_interval_seconds()
+    while True:
+        socketio.sleep(interval)
+        try:
+            with app.app_context():
+                publish_liveness()
+            _prune_local(time.time() - _retention_seconds())
+        except Exception:
+            logging.exception("liveness: publish cycle failed")
+
+
+def _hook_engineio_pongs() -> None:
+    from engineio import packet as eio_packet
+    from engineio import socket as eio_socket
+
+    receive = eio_socket.Socket.receive
+
+    def _receive(self, pkt):
+        if pkt.packet_type == eio_packet.PONG:
+            try:
+                _on_transport_pong(self.sid)
+            except Exception:
+                logging.exception("liveness: failed to record pong (eio_sid=%s)", self.sid)
+        return receive(self, pkt)
+
+    eio_socket.Socket.receive = _receive
+
+
+def install_transport_liveness(app: Flask) -> None:
+    """Record Engine.IO pongs as user liveness and, with Redis, start this worker's publisher."""
+    global _installed, _publisher_started
+    if not _installed:
+        _hook_engineio_pongs()
+        _installed = True
+    if _publisher_started:
+        return
+    with app.app_context():
+        if not get_redis_client():
+            return
+    socketio.start_background_task(_publish_forever, app)
+    _publisher_started = True
@@ -0,0 +1,54 @@
+"""
+In-process counters for realtime fan-out and rate-control instrumentation.
+
+Counters are per worker process (each Gunicorn worker keeps its own); the dashboard exposes the
+snapshot of whichever worker serves the request, tagged with its pid.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Union
+
+Number = Union[int, float]
+
+_lock = threading.Lock()
+_counters: dict[str, Number] = {}
+_gauges: dict[str, Number] = {}
+_started_at = time.time()
+
+
+def incr(name: str, value: Number = 1) -> None:
+    """Add value to a monotonically increasing counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: Number) -> None:
+    """Record the current value of a gauge (last write wins)."""
+    with _lock:
+        _gauges[name] = value
+
+
+def get_counter(name: str) -> Number:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot() -> dict:
+    """Copy of all counters and gauges for this worker."""
+    with _lock:
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": int(time.time() - _started_at),
+            "counters": dict(sorted(_counters.items())),
+            "gauges": dict(sorted(_gauges.items())),
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
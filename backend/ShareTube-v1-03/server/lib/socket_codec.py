@@ -0,0 +1,265 @@
+"""
+Opt-in MessagePack and compressed frames for Socket.IO clients that negotiate them.
+
+Problem:
+- All realtime traffic is JSON text, including the fat ``current_entry`` dicts in
+  ``room.playback`` and full queue snapshots sent on join and ``queue.sync``; for big rooms
+  these reach hundreds of KB.
+- gevent-websocket has no permessage-deflate, so nothing on the socket transport is compressed.
+- python-socketio serializes with one packet class for the whole server and encodes a broadcast
+  once for every recipient, so switching ``serializer="msgpack"`` would break every JSON client
+  (the dashboard, older extension builds) at once.
+
+Solution:
+- Clients opt in at connect time: ``?codec=msgpack`` for binary MessagePack frames and/or
+  ``?compress=deflate`` for compressed large frames. The connect handler records the socket's
+  Engine.IO sid with its options. Everyone else keeps the default JSON parser. The extension
+  and the mobile remote share ``SocketManager`` (``extension/appshell/core/managers/socket.js``),
+  which always asks for both, so both get packed/deflated frames when the server enables them.
+- ``socketio.init_app`` gets ``CodecPacket`` as its serializer. It encodes exactly like the
+  default packet but returns a ``str`` that remembers the packet it came from, so the send path
+  never has to re-parse the JSON.
+- The server's per-recipient send hooks re-frame events for opted-in sockets:
+  - ``emit.packed`` carries ``msgpack({"event", "data"})`` as a Socket.IO binary attachment;
+  - ``emit.deflated`` carries ``(format, raw deflate of the body)`` for bodies of at least
+    ``SOCKETIO_DEFLATE_MIN_BYTES``, where the body is the msgpack blob or the JSON text
+    ``["event", data]``. Smaller frames are not worth the CPU and are sent as before.
+- Each variant is built once per broadcast and reused for every socket that asked for it.
+  Broadcasts still travel through the message queue as plain Python data, so this costs no extra
+  publishes.
+- Acks, multi-argument events and packets that already carry binary are passed through as-is.
+- Whatever frames a socket ends up with are handed to ``socket_outbound``, which holds and
+  coalesces them while that socket is backlogged.
+- With both features and the outbound queue off (or ``msgpack`` missing for the packed codec)
+  nothing is installed and every client receives JSON.
+"""
+
+from __future__ import annotations
+
+import logging
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from flask import request
+from socketio import packet as sio_packet
+
+from ..config import Config
+from ..extensions import socketio
+from . import metrics, socket_outbound
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+PACKED_EVENT = "emit.packed"
+DEFLATED_EVENT = "emit.deflated"
+CODEC_MSGPACK = "msgpack"
+CODEC_JSON = "json"
+COMPRESS_DEFLATE = "deflate"
+
+# Socket.IO session key holding the negotiated codec (and the Engine.IO sid it applies to)
+CODEC_SESSION_KEY = "codec"
+
+
+@dataclass(frozen=True)
+class SocketCodec:
+    packed: bool = False
+    deflate: bool = False
+
+
+# Engine.IO sids of sockets in this worker that negotiated msgpack and/or deflate
+_socket_codecs: dict[str, SocketCodec] = {}
+_installed: bool = False
+
+
+class _TextFrame(str):
+    """Encoded JSON packet text that keeps a reference to the packet it was encoded from."""
+
+    __slots__ = ("packet", "variants")
+
+
+class CodecPacket(sio_packet.Packet):
+    """Default JSON packet whose text encoding remembers its source for re-framing."""
+
+    def encode(self):
+        encoded = super().encode()
+        if isinstance(encoded, str):
+            frame = _TextFrame(encoded)
+            frame.packet = self
+            frame.variants = None
+            return frame
+        return encoded
+
+
+def msgpack_enabled() -> bool:
+    return msgpack is not None and bool(getattr(Config, "SOCKETIO_MSGPACK_ENABLED", False))
+
+
+def _deflate_min_bytes() -> int:
+    return int(getattr(Config, "SOCKETIO_DEFLATE_MIN_BYTES", 8192))
+
+
+def deflate_enabled() -> bool:
+    return _deflate_min_bytes() > 0
+
+
+def _hooks_enabled() -> bool:
+    return msgpack_enabled() or deflate_enabled() or socket_outbound.outbound_enabled()
+
+
+def socketio_serializer_options() -> dict:
+    """Extra ``socketio.init_app`` options; empty (default JSON serializer) when all are off."""
+    if not _hooks_enabled():
+        return {}
+    return {"serializer": CodecPacket}
+
+
+def _current_eio_sid() -> Optional[str]:
+    try:
+        return socketio.server.manager.eio_sid_from_sid(request.sid, request.namespace or "/")
+    except Exception:
+        return None
+
+
+def negotiate_socket_codec() -> SocketCodec:
+    """Record the connecting socket's requested codec options; called from the connect handler."""
+    requested_codec = (request.args.get("codec") or "").strip().lower()
+    requested_compress = (request.args.get("compress") or "").strip().lower()
+    codec = SocketCodec(
+        packed=requested_codec == CODEC_MSGPACK and msgpack_enabled(),
+        deflate=requested_compress == COMPRESS_DEFLATE and deflate_enabled(),
+    )
+    if not _installed or codec == SocketCodec():
+        return SocketCodec()
+    eio_sid = _current_eio_sid()
+    if not eio_sid:
+        return SocketCodec()
+    _socket_codecs[eio_sid] = codec
+    try:
+        session = socketio.server.get_session(request.sid, namespace=request.namespace or "/")
+        session[CODEC_SESSION_KEY] = {
+            "codec": CODEC_MSGPACK if codec.packed else CODEC_JSON,
+            "deflate": codec.deflate,
+            "eio_sid": eio_sid,
+        }
+    except Exception:
+        pass
+    if codec.packed:
+        metrics.incr("socket.codec.msgpack.sockets")
+    if codec.deflate:
+        metrics.incr("socket.codec.deflate.sockets")
+    return codec
+
+
+def forget_socket_codec() -> None:
+    """Drop the disconnecting socket's codec options; called from the disconnect handler."""
+    try:
+        session = socketio.server.get_session(request.sid, namespace=request.namespace or "/")
+        codec = session.get(CODEC_SESSION_KEY) or {}
+    except Exception:
+        codec = {}
+    eio_sid = codec.get("eio_sid") or _current_eio_sid()
+    if eio_sid:
+        _socket_codecs.pop(eio_sid, None)
+        socket_outbound.forget_outbox(eio_sid)
+
+
+def _deflate(body: bytes) -> bytes:
+    compressor = zlib.compressobj(int(getattr(Config, "SOCKETIO_DEFLATE_LEVEL", 1)), zlib.DEFLATED, -15)
+    return compressor.compress(body) + compressor.flush()
+
+
+def _reframe(frame: _TextFrame, codec: SocketCodec) -> Optional[list[Any]]:
+    """Encoded frames for an event packet in the socket's codec, or None to send the JSON text."""
+    pkt = frame.packet
+    if pkt.packet_type != sio_packet.EVENT or pkt.id is not None:
+        return None
+    if not isinstance(pkt.data, list) or len(pkt.data) != 2:
+        return None
+    event_name, data = pkt.data
+
+    if codec.packed:
+        try:
+            body = msgpack.packb({"event": event_name, "data": data}, default=str, use_bin_type=True)
+        except Exception:
+            logging.exception("socket_codec: failed to pack %s", event_name)
+            return None
+        body_format = CODEC_MSGPACK
+    else:
+        if len(frame) < _deflate_min_bytes():
+            return None
+        # Event packets without an ack id are "2" + optional "/nsp," + the JSON array
+        body = frame[frame.index("["):].encode("utf-8")
+        body_format = CODEC_JSON
+
+    args: Optional[list[Any]] = None
+    if codec.deflate and len(body) >= _deflate_min_bytes():
+        compressed = _deflate(body)
+        if len(compressed) < len(body):
+            args = [DEFLATED_EVENT, body_format, compressed]
+            metrics.incr("socket.codec.deflate.frames")
+            metrics.incr("socket.codec.deflate.bytes_in", len(body))
+            metrics.incr("socket.codec.deflate.bytes_out", len(compressed))
+    if args is None:
+        if not codec.packed:
+            return None
+        args = [PACKED_EVENT, body]
+    if codec.packed:
+        metrics.incr("socket.codec.msgpack.packed")
+        metrics.incr("socket.codec.msgpack.bytes_saved", len(frame.encode("utf-8")) - len(body))
+
+    encoded = sio_packet.Packet(sio_packet.EVENT, data=args, namespace=pkt.namespace).encode()
+    return encoded if isinstance(encoded, list) else [encoded]
+
+
+def _frames_for(frame: _TextFrame, codec: SocketCodec) -> Optional[list[Any]]:
+    # Built on first use and kept on the frame, which the manager shares across recipients
+    if frame.variants is None:
+        frame.variants = {}
+    if codec not in frame.variants:
+        frame.variants[codec] = _reframe(frame, codec)
+    return frame.variants[codec]
+
+
+def install_socket_codec() -> None:
+    """Wrap the server's per-recipient send hooks to re-frame and pace outbound events."""
+    global _installed
+    if _installed or not _hooks_enabled():
+        return
+    from engineio import packet as eio_packet
+
+    server = socketio.server
+    send_eio_packet = getattr(server, "_send_eio_packet", None)
+    send_packet = server._send_packet
+
+    def _send_eio_packet(eio_sid, eio_pkt):
+        codec = _socket_codecs.get(eio_sid)
+        frame = getattr(eio_pkt, "data", None)
+        frames = _frames_for(frame, codec) if codec is not None and isinstance(frame, _TextFrame) else None
+        if frames:
+            packets = [eio_packet.Packet(eio_packet.MESSAGE, part) for part in frames]
+        else:
+            packets = [eio_pkt]
+        socket_outbound.deliver(eio_sid, packets, frame)
+
+    def _send_packet(eio_sid, pkt):
+        if pkt.packet_type not in (sio_packet.EVENT, sio_packet.BINARY_EVENT):
+            send_packet(eio_sid, pkt)
+            return
+        codec = _socket_codecs.get(eio_sid)
+        encoded = pkt.encode()
+        frames = None
+        if codec is not None and isinstance(encoded, _TextFrame):
+            frames = _frames_for(encoded, codec)
+        parts = frames or (encoded if isinstance(encoded, list) else [encoded])
+        packets = [eio_packet.Packet(eio_packet.MESSAGE, part) for part in parts]
+        socket_outbound.deliver(eio_sid, packets, encoded)
+
+    # Manager.emit fans a pre-encoded packet out through _send_eio_packet; direct replies and
+    # older python-socketio releases go through _send_packet
+    if send_eio_packet is not None:
+        server._send_eio_packet = _send_eio_packet
+    server._send_packet = _send_packet
+    _installed = True
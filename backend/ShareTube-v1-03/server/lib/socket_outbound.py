@@ -0,0 +1,226 @@
+"""
+Bounded per-socket outbound queue with latest-wins coalescing of room state events.
+
+Problem:
+- Every ``room.playback`` and ``presence.update`` broadcast is put on each recipient's Engine.IO
+  queue as soon as it is emitted. A slow mobile client, a polling fallback or a backgrounded tab
+  drains that queue slower than a busy room fills it, so frames pile up on the worker without
+  bound, and most of them are stale by the time they go out.
+
+Solution:
+- While a socket's Engine.IO queue holds fewer than ``SOCKETIO_OUTBOUND_HIGH_WATER`` packets,
+  frames are sent straight through as before.
+- Past that mark new frames wait in a per-socket outbox, and a drainer task hands them to
+  Engine.IO once the queue is back under half the mark.
+- Held state events are keyed by (event, room code), so a newer ``room.playback`` or
+  ``presence.update`` for the same room replaces the held one (newest wins). A ``presence.update``
+  snapshot also replaces held ``presence.joined/left/ready`` deltas for that room. The emit
+  buffer never merges these state events into an ``emit.batch`` frame, so they stay keyable.
+  Every other frame keeps its order and is never dropped.
+- The outbox is capped at ``SOCKETIO_OUTBOUND_MAX_BYTES`` / ``SOCKETIO_OUTBOUND_MAX_FRAMES``. A
+  socket that exceeds either loses its outbox and is disconnected; the client reconnects and
+  resumes from its last room seq, which is cheaper than buffering for it indefinitely.
+- ``SOCKETIO_OUTBOUND_HIGH_WATER=0`` disables the outbox and every frame is sent immediately.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from ..config import Config
+from ..extensions import socketio
+from . import metrics
+
+# Newest frame per (event, room code) wins while a socket is backlogged
+COALESCED_EVENTS = frozenset({"room.playback", "presence.update"})
+# Versioned presence deltas; a newer full snapshot for the same room makes them redundant
+PRESENCE_DELTA_EVENTS = frozenset({"presence.joined", "presence.left", "presence.ready"})
+PRESENCE_SNAPSHOT_EVENT = "presence.update"
+
+# How often a drainer re-checks a backlogged socket's Engine.IO queue
+_DRAIN_INTERVAL_SECONDS = 0.05
+
+
+@dataclass
+class _Outbox:
+    # key -> (Engine.IO packets of one frame, approximate size in bytes)
+    frames: "OrderedDict[tuple, tuple[list[Any], int]]" = field(default_factory=OrderedDict)
+    bytes: int = 0
+    shed: bool = False
+
+
+# Engine.IO sids of sockets in this worker whose frames are currently being held
+_outboxes: dict[str, _Outbox] = {}
+_sequence = itertools.count()
+
+
+def high_water() -> int:
+    return int(getattr(Config, "SOCKETIO_OUTBOUND_HIGH_WATER", 32))
+
+
+def outbound_enabled() -> bool:
+    return high_water() > 0
+
+
+def _max_bytes() -> int:
+    return int(getattr(Config, "SOCKETIO_OUTBOUND_MAX_BYTES", 1024 * 1024))
+
+
+def _max_frames() -> int:
+    return int(getattr(Config, "SOCKETIO_OUTBOUND_MAX_FRAMES", 256))
+
+
+def _backlog(eio_sid: str) -> Optional[int]:
+    """Packets waiting on the socket's Engine.IO queue, or None when the socket is gone."""
+    try:
+        return socketio.server.eio._get_socket(eio_sid).queue.qsize()
+    except Exception:
+        return None
+
+
+def _send_now(eio_sid: str, eio_pkt: Any) -> None:
+    eio = socketio.server.eio
+    if hasattr(eio, "send_packet"):
+        eio.send_packet(eio_sid, eio_pkt)
+    else:
+        eio.send(eio_sid, eio_pkt.data)
+
+
+def _frame_size(packets: list[Any]) -> int:
+    return sum(len(getattr(p, "data", None) or b"") for p in packets)
+
+
+def _frame_key(frame: Any) -> tuple:
+    """Outbox key: (event, room code) for coalesced events, unique for everything else."""
+    # ``frame`` is the encoded text from socket_codec.CodecPacket, which keeps its source packet
+    pkt = getattr(frame, "packet", None)
+    data = getattr(pkt, "data", None)
+    if pkt is not None and pkt.id is None and isinstance(data, list) and len(data) == 2:
+        event, payload = data
+        code = payload.get("code") if isinstance(payload, dict) else None
+        if event in COALESCED_EVENTS and code:
+            return (event, code)
+        if event in PRESENCE_DELTA_EVENTS and code:
+            return (event, code, next(_sequence))
+    return (None, None, next(_sequence))
+
+
+def _update_gauges() -> None:
+    metrics.set_gauge("socket.outbound.backlogged_sockets", sum(1 for o in _outboxes.values() if not o.shed))
+    metrics.set_gauge("socket.outbound.pending_bytes", sum(o.bytes for o in _outboxes.values()))
+
+
+def _discard(outbox: _Outbox, key: tuple) -> None:
+    _, size = outbox.frames.pop(key)
+    outbox.bytes -= size
+    metrics.incr("socket.outbound.coalesced")
+
+
+def _hold(eio_sid: str, outbox: _Outbox, packets: list[Any], frame: Any) -> None:
+    if outbox.shed:
+        metrics.incr("socket.outbound.dropped")
+        return
+    key = _frame_key(frame)
+    if key in outbox.frames:
+        _discard(outbox, key)
+    if key[0] == PRESENCE_SNAPSHOT_EVENT:
+        for stale in [k for k in outbox.frames if k[0] in PRESENCE_DELTA_EVENTS and k[1] == key[1]]:
+            _discard(outbox, stale)
+    size = _frame_size(packets)
+    outbox.frames[key] = (packets, size)
+    outbox.bytes += size
+    metrics.incr("socket.outbound.held")
+    if outbox.bytes > _max_bytes() or len(outbox.frames) > _max_frames():
+        _shed(eio_sid, outbox)
+
+
+def _shed(eio_sid: str, outbox: _Outbox) -> None:
+    """Drop a socket's outbox and disconnect it; it resumes from its last room seq on reconnect."""
+    metrics.incr("socket.outbound.dropped", len(outbox.frames))
+    metrics.incr("socket.outbound.dropped_bytes", outbox.bytes)
+    metrics.incr("socket.outbound.slow_disconnects")
+    logging.warning(
+        "socket_outbound: disconnecting slow socket %s (%d frames, %d bytes held)",
+        eio_sid,
+        len(outbox.frames),
+        outbox.bytes,
+    )
+    outbox.frames.clear()
+    outbox.bytes = 0
+    outbox.shed = True
+    _update_gauges()
+    socketio.start_background_task(_disconnect, eio_sid, outbox)
+
+
+def _disconnect(eio_sid: str, outbox: _Outbox) -> None:
+    try:
+        socketio.server.eio.disconnect(eio_sid)
+    except Exception:
+        logging.exception("socket_outbound: failed to disconnect %s", eio_sid)
+    finally:
+        if _outboxes.get(eio_sid) is outbox:
+            _outboxes.pop(eio_sid, None)
+        _update_gauges()
+
+
+def _drain(eio_sid: str, outbox: _Outbox) -> None:
+    try:
+        while outbox.frames and not outbox.shed:
+            backlog = _backlog(eio_sid)
+            if backlog is None:
+                metrics.incr("socket.outbound.dropped", len(outbox.frames))
+                outbox.frames.clear()
+                outbox.bytes = 0
+                break
+            mark = high_water()
+            if backlog < max(1, mark // 2):
+                budget = mark - backlog
+                while outbox.frames and budget > 0:
+                    _, (packets, size) = outbox.frames.popitem(last=False)
+                    outbox.bytes -= size
+                    for eio_pkt in packets:
+                        _send_now(eio_sid, eio_pkt)
+                    budget -= len(packets)
+                    metrics.incr("socket.outbound.flushed")
+                _update_gauges()
+                continue
+            socketio.sleep(_DRAIN_INTERVAL_SECONDS)
+    except Exception:
+        logging.exception("socket_outbound: drainer for %s failed", eio_sid)
+    finally:
+        if not outbox.shed and _outboxes.get(eio_sid) is outbox:
+            _outboxes.pop(eio_sid, None)
+        _update_gauges()
+
+
+def deliver(eio_sid: str, packets: list[Any], frame: Any = None) -> None:
+    """Send one encoded frame (its Engine.IO packets) now, or hold it while the socket is backlogged."""
+    outbox = _outboxes.get(eio_sid)
+    if outbox is None:
+        mark = high_water()
+        backlog = _backlog(eio_sid) if mark > 0 else None
+        if backlog is None or backlog < mark:
+            for eio_pkt in packets:
+                _send_now(eio_sid, eio_pkt)
+            return
+        outbox = _outboxes[eio_sid] = _Outbox()
+        metrics.incr("socket.outbound.backlogged")
+        _hold(eio_sid, outbox, packets, frame)
+        socketio.start_background_task(_drain, eio_sid, outbox)
+    else:
+        _hold(eio_sid, outbox, packets, frame)
+    _update_gauges()
+
+
+def forget_outbox(eio_sid: str) -> None:
+    """Release a disconnected socket's held frames."""
+    outbox = _outboxes.pop(eio_sid, None)
+    if outbox is not None and outbox.frames:
+        metrics.incr("socket.outbound.dropped", len(outbox.frames))
+        outbox.frames.clear()
+        outbox.bytes = 0
+    _update_gauges()
@@ -1,22 +1,44 @@
 # Future annotations import to support forward references
 from __future__ import annotations
 
+import logging
+
 # Import Flask application type for typing clarity
 from flask import Flask
+from sqlalchemy import inspect, text
 
 # Import the SQLAlchemy instance so that future migrations can use it
 from .extensions import db
+from .helpers.search import ensure_queue_search_index
 from .models import User
 
+
+# Add a column to an existing table when create_all() ran against an older schema
+def _add_column_if_missing(conn, table: str, column: str, ddl: str) -> None:
+    columns = {col["name"] for col in inspect(conn).get_columns(table)}
+    if column in columns:
+        return
+    logging.info("migrations: adding %s.%s", table, column)
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
 # Run all database migrations required for the current application version
 def run_all_migrations(app: Flask) -> None:
     # Ensure we have an application context so SQLAlchemy metadata is bound
     with app.app_context():
         with db.engine.begin() as conn:
+            # Ready barrier generations (generation-based ready reset)
+            _add_column_if_missing(conn, "room", "ready_generation", "INTEGER NOT NULL DEFAULT 0")
+            _add_column_if_missing(
+                conn, "room_membership", "ready_generation", "INTEGER NOT NULL DEFAULT 0"
+            )
+            # Queue version for the queue.batch patch protocol
+            _add_column_if_missing(conn, "queue", "version", "INTEGER NOT NULL DEFAULT 0")
+            # FTS5 index (and sync triggers) behind queue.search
+            ensure_queue_search_index(conn)
             # select first suer and make them a super_admin
             pass
             # user = User.query.first()
             # if user:
             #     user.role = 'super_admin'
             #     db.session.commit()
-
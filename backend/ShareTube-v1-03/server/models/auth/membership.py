@@ -37,6 +37,8 @@ class RoomMembership(db.Model):
     ready: Mapped[bool] = db.Column(
         db.Boolean, default=False, nullable=False, index=True
     )
+    # Room ready generation the flag was set in; the flag only counts while it matches the room's
+    ready_generation: Mapped[int] = db.Column(db.Integer, default=0, nullable=False)
 
     # Ensure a user can have at most one membership per room
     __table_args__ = (
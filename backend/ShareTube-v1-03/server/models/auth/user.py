@@ -25,7 +25,7 @@ class User(db.Model):
     name: Mapped[Optional[str]] = db.Column(db.String(255))
     # Profile picture URL
     picture: Mapped[Optional[str]] = db.Column(db.String(1024))
-    # Last time the user was seen active (heartbeat)
+    # Last time the user joined or left a room (transport liveness lives in lib.liveness)
     last_seen: Mapped[int] = db.Column(db.Integer, default=lambda: int(time.time()), index=True)
     # Whether the user is currently active (has at least one active room membership)
     active: Mapped[bool] = db.Column(db.Boolean, default=True, index=True)
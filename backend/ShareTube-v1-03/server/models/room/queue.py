@@ -69,6 +69,9 @@ class Queue(db.Model):
         "QueueEntry", foreign_keys=[current_entry_id], uselist=False, post_update=True
     )
 
+    # Monotonic version bumped once per committed change; clients apply queue.batch patches in order
+    version: Mapped[int] = db.Column(db.Integer, default=0, nullable=False)
+
     def to_dict(self) -> dict:
         """Serialize queue to a dict suitable for clients.
 
@@ -82,6 +85,7 @@ class Queue(db.Model):
             "created_by_id": self.created_by_id,
             "creator": self.creator.to_dict() if self.creator else None,
             "created_at": self.created_at,
+            "version": self.version or 0,
             "entries": [entry.to_dict() for entry in ordered_entries],
             "current_entry": (
                 self.current_entry.to_dict() if self.current_entry else None
@@ -11,8 +11,9 @@ from typing import Optional, TYPE_CHECKING, Callable
 # SQLAlchemy typing helper for mapped attributes / relationships
 from sqlalchemy.orm import Mapped
 
-# Import the SQLAlchemy instance and socketio from the shared extensions module
-from ...extensions import db, socketio
+# Import the SQLAlchemy instance from the shared extensions module
+from ...extensions import db
+from ...lib import emit_buffer
 from ...models.auth.membership import RoomMembership, RoomOperator
 
 if TYPE_CHECKING:
@@ -48,6 +49,8 @@ class Room(db.Model):
     # Current playback/state machine status for the room
     # idle | starting | playing | paused | midroll
     state: Mapped[str] = db.Column(db.String(16), default="idle")
+    # Ready barrier generation; bumping it invalidates every member's ready flag at once
+    ready_generation: Mapped[int] = db.Column(db.Integer, default=0, nullable=False)
     # Current queue being played
     current_queue_id: Mapped[Optional[int]] = db.Column(
         db.Integer, db.ForeignKey("queue.id"), nullable=True, index=True
@@ -82,28 +85,29 @@ class Room(db.Model):
     def emit(code: str, trigger: str) -> tuple[Callable, Callable]:
         """Return (resolve, reject) helpers for emitting Socket.IO events for this room.
 
-        - resolve(event, payload) -> emits to ``room:{code}`` with ``trigger`` and ``code`` injected.
-        - reject(error, state='error', event='room.error') -> emits an error payload to the same room.
+        - resolve(event, payload, to=None) -> emits to ``room:{code}`` with ``trigger`` and ``code``
+          injected; pass ``to=request.sid`` for request/response style results that only the
+          caller needs.
+        - reject(error, state='error', event='room.error') -> emits an error payload to the socket
+          whose event is being handled (falls back to the room outside a socket request).
+
+        Both go through the emit buffer, so inside a handler they are sent after its commit.
         """
 
-        def resolve(event: str, payload: Optional[dict] = None) -> None:
-            payload = payload or {}
-            socketio.emit(
-                event,
-                {
-                    "trigger": trigger,
-                    "code": code,
-                    **payload,
-                },
-                room=f"room:{code}",
-            )
+        def resolve(event: str, payload: Optional[dict] = None, to: Optional[str] = None) -> None:
+            payload = {"trigger": trigger, "code": code, **(payload or {})}
+            if to:
+                emit_buffer.emit_reply(code, event, payload, to=to)
+            else:
+                emit_buffer.emit(event, payload, to=f"room:{code}")
 
         def reject(
             error: str,
             state: str = "error",
             event: str = "room.error",
         ) -> None:
-            socketio.emit(
+            emit_buffer.emit_reply(
+                code,
                 event,
                 {
                     "trigger": trigger,
@@ -111,7 +115,6 @@ class Room(db.Model):
                     "state": state,
                     "error": error,
                 },
-                room=f"room:{code}",
             )
             logging.info(f"Rejected {event} for room {code}: {error}")
 
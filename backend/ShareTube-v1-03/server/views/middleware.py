@@ -8,7 +8,16 @@ from flask_socketio import rooms
 
 from ..extensions import db    
 from ..models import Room, RoomMembership, Queue, QueueEntry, User
-from ..helpers.ws import get_user_id_from_socket
+from ..helpers.ws import get_socket_identity, get_user_id_from_socket
+from ..helpers.rate_limit import take_token
+from ..helpers.idempotency import (
+    STATUS_DONE,
+    claim_request,
+    complete_request,
+    get_request_id,
+    release_request,
+)
+from ..lib import emit_buffer, metrics
 import logging
 
 
@@ -208,3 +217,110 @@ def ensure_queue(handler: Callable) -> Callable:
         return handler(room, user_id, queue, data)
     return wrapper
 
+
+def rate_limited(handler: Callable) -> Callable:
+    """
+    Decorator that answers over-limit socket events before the handler touches the database.
+
+    Spends a token from the socket's and the user's bucket for the event (see
+    ``SOCKETIO_RATE_LIMITS``); events without a configured bucket pass straight through. A
+    rejected call tells the sender ``rate_limited`` with ``{event, retry_after_ms}``.
+
+    Usage:
+        @socketio.on("room.control.seek")
+        @rate_limited
+        @require_room_by_code
+        def _on_room_control_seek(room, user_id, data):
+            ...
+    """
+    @wraps(handler)
+    def wrapper(*args):
+        event_name = None
+        try:
+            if getattr(request, "event", None):
+                event_name = request.event.get("message")
+        except Exception:
+            event_name = None
+        if not event_name:
+            return handler(*args)
+
+        identity = get_socket_identity() or {}
+        retry_after_ms = take_token(event_name, request.sid, identity.get("user_id"))
+        if not retry_after_ms:
+            return handler(*args)
+        metrics.incr("rate_limit.rejected")
+        metrics.incr(f"rate_limit.rejected.{event_name}")
+        emit_buffer.emit(
+            "rate_limited",
+            {"event": event_name, "retry_after_ms": retry_after_ms},
+            to=request.sid,
+        )
+        return None, "rate_limited"
+    return wrapper
+
+
+def _handler_failed(result: Any, replies: list[dict]) -> bool:
+    """True when a handler rejected its event (``room.error`` to the caller or an error tuple)."""
+    if any(reply.get("event") == "room.error" for reply in replies):
+        return True
+    return isinstance(result, tuple) and len(result) == 2 and result[0] is None and isinstance(result[1], str)
+
+
+def idempotent(handler: Callable) -> Callable:
+    """
+    Decorator that runs a mutating socket event at most once per client ``request_id``.
+
+    Events without a ``request_id`` (or from an unauthenticated socket) pass straight through.
+    The first successful call records its result and the replies it sent to the caller for
+    ``IDEMPOTENCY_TTL_SECONDS``; a duplicate gets those replies re-sent to its own socket and the
+    same result, and a duplicate of a call still running is answered as in progress. A call that
+    raised or was rejected releases its claim, so a retry with the same id runs again.
+
+    Usage:
+        @socketio.on("room.control.skip")
+        @idempotent
+        @require_room_by_code
+        def _on_room_control_skip(room, user_id, data):
+            ...
+    """
+    @wraps(handler)
+    def wrapper(data: Optional[dict] = None, *args):
+        event_name = None
+        try:
+            if getattr(request, "event", None):
+                event_name = request.event.get("message")
+        except Exception:
+            event_name = None
+        request_id = get_request_id(data)
+        user_id = (get_socket_identity() or {}).get("user_id")
+        if not event_name or not request_id or user_id is None:
+            return handler(data, *args)
+
+        record = claim_request(user_id, event_name, request_id)
+        if record is None:
+            try:
+                result = handler(data, *args)
+            except Exception:
+                release_request(user_id, event_name, request_id)
+                raise
+            replies = emit_buffer.caller_replies()
+            if _handler_failed(result, replies):
+                release_request(user_id, event_name, request_id)
+                metrics.incr("idempotency.released")
+            else:
+                complete_request(user_id, event_name, request_id, result, replies)
+            return result
+
+        metrics.incr("idempotency.duplicate")
+        metrics.incr(f"idempotency.duplicate.{event_name}")
+        if record.get("status") != STATUS_DONE:
+            metrics.incr("idempotency.in_progress")
+            logging.info(
+                "idempotent: %s request_id=%s from user=%s still running", event_name, request_id, user_id
+            )
+            return None, "idempotent: in progress"
+        for reply in record.get("replies") or []:
+            emit_buffer.emit(reply.get("event"), reply.get("data"), to=request.sid)
+        result = record.get("result")
+        return tuple(result) if isinstance(result, list) else result
+    return wrapper
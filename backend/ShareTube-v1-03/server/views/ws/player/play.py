@@ -4,8 +4,10 @@ import logging
 
 from ....extensions import db, socketio
 from ....lib.utils import commit_with_retry, now_ms, playing_since_ms_with_buffer
-from ....models import QueueEntry, Room, RoomMembership, User
+from ....helpers.ready import reset_room_ready
+from ....models import QueueEntry, Room
 from ...middleware import require_room_by_code
+from ..queue.common import QueueBatch
 from ..rooms.room_timeouts import (
     cancel_starting_timeout,
     schedule_starting_to_playing_timeout,
@@ -23,6 +25,7 @@ def register() -> None:
             error = None
             queue = room.current_queue
             current_entry_changed = False
+            batch = QueueBatch(room)
 
             if not queue:
                 error = "room.start_playback: no current queue"
@@ -41,22 +44,12 @@ def register() -> None:
                     else:
                         queue.current_entry_id = next_entry.id
                         room.state = "starting"
-                        active_user_ids = (
-                            db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                        )
-                        (
-                            db.session.query(RoomMembership)
-                            .filter(
-                                RoomMembership.room_id == room.id,
-                                RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                            )
-                            .update({RoomMembership.ready: False}, synchronize_session=False)
-                        )
-                        db.session.flush()
+                        reset_room_ready(room)
                         next_entry.status = "playing"
                         next_entry.progress_ms = 0
                         next_entry.playing_since_ms = None
                         next_entry.paused_at = None
+                        batch.moved(next_entry)
                         result = {"state": "starting", "current_entry": next_entry.to_dict()}
             elif room.state in ("starting", "midroll"):
                 room.state = "playing"
@@ -67,6 +60,7 @@ def register() -> None:
                     playing_since_ms = playing_since_ms_with_buffer()
                     current_entry.playing_since_ms = playing_since_ms
                     current_entry.paused_at = None
+                    batch.moved(current_entry)
                 result = {
                     "state": "playing",
                     "playing_since_ms": playing_since_ms,
@@ -81,6 +75,7 @@ def register() -> None:
                     playing_since_ms = playing_since_ms_with_buffer()
                     current_entry.playing_since_ms = playing_since_ms
                     current_entry.paused_at = None
+                    batch.moved(current_entry)
                     room.state = "playing"
                     result = {
                         "state": "playing",
@@ -90,6 +85,7 @@ def register() -> None:
             else:
                 current_entry = queue.current_entry if queue else None
                 if current_entry:
+                    batch.moved(current_entry)
                     result = {
                         "state": room.state,
                         "playing_since_ms": current_entry.playing_since_ms,
@@ -108,17 +104,7 @@ def register() -> None:
                 schedule_starting_to_playing_timeout(room.code, delay_seconds=30)
 
             try:
-                if room.current_queue and room.current_queue.current_entry:
-                    db.session.refresh(room.current_queue.current_entry)
-                    socketio.emit(
-                        "queue.moved",
-                        {
-                            "id": room.current_queue.current_entry.id,
-                            "position": room.current_queue.current_entry.position,
-                            "status": room.current_queue.current_entry.status,
-                        },
-                        room=f"room:{room.code}",
-                    )
+                batch.emit()
             except Exception:
                 logging.exception("room.control.play queue broadcast error")
 
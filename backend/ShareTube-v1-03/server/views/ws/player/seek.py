@@ -1,95 +1,182 @@
+"""
+room.control.seek with per-room burst coalescing.
+
+Frame stepping and scrubbing send seeks in bursts; each one used to run the virtual-clock math,
+a commit, a refresh and a room broadcast. Seeks for a room that arrive within
+``SEEK_COALESCE_MS`` of the first are folded into one pending seek (net ``delta_ms`` on top of
+the latest absolute ``progress_ms``), which is committed and broadcast once when the window
+closes. The actor gets an immediate ``room.control.seek.ack`` with the projected position so
+local scrubbing stays responsive. ``SEEK_COALESCE_MS=0`` applies every seek inline.
+"""
+
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from flask import Flask, current_app, request
 
+from ....config import Config
 from ....extensions import db, socketio
+from ....lib import metrics
 from ....lib.utils import commit_with_retry, now_ms
-from ....models import Room
-from ...middleware import require_room_by_code
+from ....models import QueueEntry, Room
+from ...middleware import rate_limited, require_room_by_code
+
+
+@dataclass
+class _PendingSeek:
+    entry_id: int
+    # Room state when the burst started; a play/pause landing inside the window wins over `play`
+    room_state: str
+    play: bool
+    target_ms: Optional[int] = None
+    delta_ms: int = 0
+    frame_step: Optional[int] = None
+    relative: bool = False
+    actor_user_id: Optional[int] = None
+    seeks: int = 0
+
+
+# Room code -> seek burst waiting for its window to close (per worker)
+_pending_seeks: dict[str, _PendingSeek] = {}
+
+
+def _coalesce_window_seconds() -> float:
+    return max(0, int(getattr(Config, "SEEK_COALESCE_MS", 80))) / 1000
+
+
+def _fold(pending: _PendingSeek, data: dict, user_id: int) -> None:
+    """Fold one seek request into the pending burst (absolute targets reset the net delta)."""
+    delta_ms = data.get("delta_ms")
+    if delta_ms is not None:
+        pending.delta_ms += int(delta_ms)
+        pending.relative = True
+    else:
+        # Sanitize client-provided progress
+        try:
+            pending.target_ms = int(data.get("progress_ms"))
+        except Exception:
+            pending.target_ms = 0
+        pending.delta_ms = 0
+        pending.relative = False
+    pending.play = bool(data.get("play"))
+    pending.frame_step = data.get("frame_step")
+    pending.actor_user_id = user_id
+    pending.seeks += 1
+
+
+def _target_progress_ms(entry: QueueEntry, pending: _PendingSeek, _now_ms: int) -> int:
+    """Where the burst lands: the latest absolute target (or the live position) plus the net delta."""
+    if pending.target_ms is not None:
+        base_progress_ms = pending.target_ms
+    else:
+        base_progress_ms = entry.progress_ms or 0
+        playing_since_ms = entry.playing_since_ms or 0
+        base_progress_ms += max(0, _now_ms - playing_since_ms) if playing_since_ms else 0
+    progress_ms = base_progress_ms + pending.delta_ms
+    # Clamp to the duration when available to keep the virtual clock sane
+    duration_ms = max(0, int(entry.duration_ms or 0))
+    if duration_ms > 0:
+        return max(0, min(progress_ms, duration_ms))
+    return max(0, progress_ms)
+
+
+def _apply_seek(room: Room, pending: _PendingSeek) -> None:
+    """Commit a (possibly coalesced) seek and broadcast the resulting playback once."""
+    res, _rej = Room.emit(room.code, trigger="room.control.seek")
+    queue = room.current_queue
+    current_entry = queue.current_entry if queue else None
+    if not current_entry or current_entry.id != pending.entry_id:
+        # Skipped or removed while the burst was pending; the seek no longer applies
+        metrics.incr("seek.coalesce.dropped")
+        return
+
+    play = pending.play
+    if room.state != pending.room_state:
+        play = room.state == "playing"
+    _now_ms = now_ms()
+    current_entry.progress_ms = _target_progress_ms(current_entry, pending, _now_ms)
+    current_entry.playing_since_ms = _now_ms if play else None
+    room.state = "playing" if play else "paused"
+    commit_with_retry(db.session)
+    metrics.incr("seek.coalesce.applied")
+    metrics.incr("seek.coalesce.folded", pending.seeks - 1)
+
+    payload = {
+        "state": room.state,
+        "delta_ms": pending.delta_ms if pending.relative else None,
+        "progress_ms": current_entry.progress_ms,
+        "frame_step": pending.frame_step,
+        "playing_since_ms": current_entry.playing_since_ms,
+        "actor_user_id": pending.actor_user_id,
+    }
+    res("room.playback", payload)
+
+
+def _flush_pending_seek(app: Flask, code: str) -> None:
+    socketio.sleep(_coalesce_window_seconds())
+    pending = _pending_seeks.pop(code, None)
+    if pending is None:
+        return
+    with app.app_context():
+        try:
+            room = Room.query.filter_by(code=code).first()
+            if room:
+                _apply_seek(room, pending)
+        except Exception:
+            logging.exception("room.control.seek: coalesced seek failed (code=%s)", code)
+            db.session.rollback()
 
 
 def register() -> None:
     @socketio.on("room.control.seek")
+    @rate_limited
     @require_room_by_code
     def _on_room_control_seek(room: Room, user_id: int, data: dict):
         res, rej = Room.emit(room.code, trigger="room.control.seek")
         try:
-            progress_ms = (data or {}).get("progress_ms")
-            delta_ms = (data or {}).get("delta_ms")
-            play = (data or {}).get("play")
-            frame_step = (data or {}).get("frame_step")
-            _now_ms = now_ms()
+            data = data or {}
+            relative = data.get("delta_ms") is not None
+            if not relative and data.get("progress_ms") is None:
+                rej("room.control.seek: no progress_ms or delta_ms")
+                return
             queue = room.current_queue
-            error = None
-            if delta_ms is not None:
-                if not queue:
-                    error = "room.relative_seek: no current queue"
-                elif not queue.current_entry:
-                    error = "room.relative_seek: no current entry"
-                else:
-                    current_entry = queue.current_entry
-                    base_progress_ms = current_entry.progress_ms or 0
-                    playing_since_ms = current_entry.playing_since_ms or 0
-                    elapsed_ms = (
-                        max(0, _now_ms - playing_since_ms) if playing_since_ms else 0
-                    )
-                    effective_progress_ms = base_progress_ms + elapsed_ms
-                    duration_ms = max(0, int(current_entry.duration_ms or 0))
-                    new_progress_ms = effective_progress_ms + delta_ms
-                    current_entry.progress_ms = max(
-                        0, min(new_progress_ms, duration_ms)
+            if not queue:
+                rej("room.relative_seek: no current queue" if relative else "room.seek_video: no current queue")
+                return
+            current_entry = queue.current_entry
+            if not current_entry:
+                rej("room.relative_seek: no current entry" if relative else "room.seek_video: no current entry")
+                return
+
+            window = _coalesce_window_seconds()
+            pending = _pending_seeks.get(room.code)
+            if pending is None or pending.entry_id != current_entry.id:
+                pending = _PendingSeek(entry_id=current_entry.id, room_state=room.state, play=False)
+                if window > 0:
+                    _pending_seeks[room.code] = pending
+                    socketio.start_background_task(
+                        _flush_pending_seek, current_app._get_current_object(), room.code
                     )
-                    current_entry.playing_since_ms = _now_ms if play else None
-                    room.state = "playing" if play else "paused"
-            elif progress_ms is not None:
-                if not queue:
-                    error = "room.seek_video: no current queue"
-                elif not queue.current_entry:
-                    error = "room.seek_video: no current entry"
-                else:
-                    current_entry = queue.current_entry
-                    # Sanitize and clamp client-provided progress
-                    try:
-                        progress_ms_int = int(progress_ms)
-                    except Exception:
-                        progress_ms_int = 0
-                    duration_ms = max(0, int(current_entry.duration_ms or 0))
-                    if duration_ms > 0:
-                        progress_ms_int = max(0, min(progress_ms_int, duration_ms))
-                    else:
-                        progress_ms_int = max(0, progress_ms_int)
-                    current_entry.progress_ms = progress_ms_int
-                    current_entry.playing_since_ms = _now_ms if play else None
-                    room.state = "playing" if play else "paused"
             else:
-                rej("room.control.seek: no progress_ms or delta_ms")
-                return
-            if error:
-                rej(error)
+                metrics.incr("seek.coalesce.merged")
+            _fold(pending, data, user_id)
+
+            if window <= 0:
+                _apply_seek(room, pending)
                 return
-            commit_with_retry(db.session)
-            db.session.refresh(room)
-            current_entry = None
-            if room.current_queue and room.current_queue.current_entry:
-                db.session.refresh(room.current_queue.current_entry)
-                current_entry = room.current_queue.current_entry
-
-            actual_progress_ms = (
-                current_entry.progress_ms if current_entry else None
+            # Local acknowledgement for the actor; the room gets one room.playback per burst
+            res(
+                "room.control.seek.ack",
+                {
+                    "progress_ms": _target_progress_ms(current_entry, pending, now_ms()),
+                    "play": pending.play,
+                    "frame_step": pending.frame_step,
+                    "pending_ms": int(window * 1000),
+                },
+                to=request.sid,
             )
-
-            payload = {
-                "state": room.state,
-                "delta_ms": delta_ms,
-                "progress_ms": actual_progress_ms,
-                "frame_step": frame_step,
-                "playing_since_ms": (
-                    current_entry.playing_since_ms if current_entry else None
-                ),
-                "actor_user_id": user_id,
-            }
-
-            res("room.playback", payload)
         except Exception:
             logging.exception("room.control.seek handler error")
-
@@ -4,8 +4,10 @@ import logging
 
 from ....extensions import db, socketio
 from ....lib.utils import commit_with_retry
-from ....models import QueueEntry, Room, RoomMembership, User
-from ...middleware import require_room_by_code
+from ....helpers.ready import reset_room_ready
+from ....models import QueueEntry, Room
+from ...middleware import idempotent, require_room_by_code
+from ..queue.common import QueueBatch
 from ..rooms.room_timeouts import (
     cancel_starting_timeout,
     schedule_starting_to_playing_timeout,
@@ -14,6 +16,7 @@ from ..rooms.room_timeouts import (
 
 def register() -> None:
     @socketio.on("room.control.skip")
+    @idempotent
     @require_room_by_code
     def _on_room_control_skip(room: Room, user_id: int, data: dict):
         try:
@@ -73,18 +76,7 @@ def register() -> None:
 
             if next_entry:
                 room.state = "starting"
-                active_user_ids = (
-                    db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                )
-                (
-                    db.session.query(RoomMembership)
-                    .filter(
-                        RoomMembership.room_id == room.id,
-                        RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                    )
-                    .update({RoomMembership.ready: False}, synchronize_session=False)
-                )
-                db.session.flush()
+                reset_room_ready(room)
             else:
                 load_entry = (
                     db.session.query(QueueEntry)
@@ -105,48 +97,19 @@ def register() -> None:
                 load_entry.paused_at = None
                 room.state = "starting"
                 queue.current_entry = load_entry
-                active_user_ids = (
-                    db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                )
-                (
-                    db.session.query(RoomMembership)
-                    .filter(
-                        RoomMembership.room_id == room.id,
-                        RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                    )
-                    .update({RoomMembership.ready: False}, synchronize_session=False)
-                )
-                db.session.flush()
+                reset_room_ready(room)
                 next_entry = load_entry
 
+            batch = QueueBatch(room)
+            batch.moved(skipped_entry)
+            batch.moved(next_entry)
             commit_with_retry(db.session)
             if room.state == "starting":
                 cancel_starting_timeout(room.code)
             db.session.refresh(room)
 
             try:
-                if skipped_entry:
-                    db.session.refresh(skipped_entry)
-                    socketio.emit(
-                        "queue.moved",
-                        {
-                            "id": skipped_entry.id,
-                            "position": skipped_entry.position,
-                            "status": skipped_entry.status,
-                        },
-                        room=f"room:{room.code}",
-                    )
-                if next_entry:
-                    db.session.refresh(next_entry)
-                    socketio.emit(
-                        "queue.moved",
-                        {
-                            "id": next_entry.id,
-                            "position": next_entry.position,
-                            "status": next_entry.status,
-                        },
-                        room=f"room:{room.code}",
-                    )
+                batch.emit()
             except Exception:
                 logging.exception("room.control.skip queue broadcast error")
 
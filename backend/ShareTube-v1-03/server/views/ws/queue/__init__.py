@@ -7,7 +7,9 @@ from .load_debug_list import register as register_queue_load_debug_list
 from .move import register as register_queue_move
 from .probe import register as register_queue_probe
 from .requeue_to_top import register as register_queue_requeue_to_top
+from .search import register as register_queue_search
 from .remove import register as register_queue_remove
+from .sync import register as register_queue_sync
 
 __all__ = [
     "emit_queue_update_for_room",
@@ -23,4 +25,6 @@ def register_socket_handlers() -> None:
     register_queue_probe()
     register_queue_continue_next()
     register_queue_load_debug_list()
+    register_queue_search()
+    register_queue_sync()
 
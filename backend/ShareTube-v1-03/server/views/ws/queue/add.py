@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import logging
 
+from flask import request
+
 from ....extensions import db, socketio
 from ....models import Queue, QueueEntry, Room, YouTubeAuthor
 from ....lib.utils import (
@@ -14,11 +16,14 @@ from ....lib.utils import (
     commit_with_retry,
     now_ms,
 )
-from ...middleware import ensure_queue, require_room
+from ...middleware import ensure_queue, idempotent, rate_limited, require_room
+from .common import QueueBatch
 
 
 def register() -> None:
     @socketio.on("queue.add")
+    @rate_limited
+    @idempotent
     @require_room
     @ensure_queue
     def _on_enqueue_url(room: Room, user_id: int, queue: Queue, data: dict):
@@ -120,13 +125,13 @@ def register() -> None:
                 youtube_author=author,
             )
             db.session.add(entry)
+            # Flush for the entry id so the insert op is built before commit
+            db.session.flush()
+            batch = QueueBatch(room, queue)
+            batch.inserted(entry)
             commit_with_retry(db.session)
-            socketio.emit(
-                "queue.added",
-                {"item": entry.to_dict()},
-                room=f"room:{room.code}",
-            )
-            res("queue.add.result", {"added": True})
+            batch.emit()
+            res("queue.add.result", {"added": True}, to=request.sid)
             if should_prompt_to_advance:
                 res("room.playback", {"state": room.state, "show_continue_prompt": True})
         except Exception:
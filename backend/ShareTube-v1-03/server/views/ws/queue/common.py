@@ -1,50 +1,107 @@
 from __future__ import annotations
 
-from ....extensions import db, socketio
-from ....models import Room, RoomMembership, User
+from typing import Any, Optional
 
+from flask import current_app
 
-def emit_queue_update_for_room(room: Room) -> None:
+from ....extensions import db
+from ....lib import emit_buffer
+from ....helpers.permissions import MODIFY_ANY_ENTRY, has_capability
+from ....helpers.redis import record_queue_patch
+from ....models import Queue, QueueEntry, Room
+
+
+def emit_queue_update_for_room(room: Room, to: Optional[str] = None) -> None:
+    """Full queue snapshot (with its version); clients replace their local queue with it."""
     if room.current_queue:
-        socketio.emit(
+        emit_buffer.emit(
             "queue.update",
-            room.current_queue.to_dict(),
-            room=f"room:{room.code}",
+            {"code": room.code, **room.current_queue.to_dict()},
+            to=to or f"room:{room.code}",
         )
 
 
+def bump_queue_version(queue: Queue) -> int:
+    """Stage a version bump in the current transaction and return the new version."""
+    # Incremented in SQL so concurrent writers serialize on the row instead of racing in Python
+    queue.version = Queue.version + 1
+    db.session.flush()
+    return queue.version
+
+
 def can_modify_any_entry(room: Room, user_id: int) -> bool:
     """
     Check if a user can modify any entry in the queue (not just their own).
-    
+
     Returns True if user is:
     - Room owner (room.owner_id == user_id)
     - Room operator (in room.operators OR RoomMembership.role == 'operator')
     - Admin or super-admin (User.role in ['admin', 'super_admin'])
-    
-    Otherwise returns False.
+
+    Otherwise returns False. Resolved through the cached permission matrix.
     """
-    # Check if user is room owner
-    if room.owner_id and room.owner_id == user_id:
-        return True
-    
-    # Check if user is room operator (via RoomOperator table)
-    if any(operator.user_id == user_id for operator in room.operators):
-        return True
-    
-    # Check if user has operator role in RoomMembership
-    membership = (
-        db.session.query(RoomMembership)
-        .filter_by(room_id=room.id, user_id=user_id)
-        .first()
-    )
-    if membership and membership.role == "operator":
-        return True
-    
-    # Check if user has admin or super-admin role
-    user = db.session.get(User, user_id)
-    if user and user.role in ("admin", "super_admin"):
-        return True
-    
-    return False
+    return has_capability(room, user_id, MODIFY_ANY_ENTRY)
+
+
+class QueueBatch:
+    """
+    Versioned patch of queue entry mutations produced by one handler invocation.
+
+    Handlers record mutations as they make them (values are captured before commit, so no
+    per-entry refresh is needed) and call emit() once after committing. The first recorded op
+    bumps ``Queue.version`` inside the handler's transaction, so every committed change maps to
+    exactly one version. Clients apply patches in version order and ask for catch-up
+    (queue.sync) when they see a gap.
+
+    Ops:
+    - {"op": "insert", "item"}
+    - {"op": "move", "id", "position", "status"}
+    - {"op": "update", "id", ...changed fields}
+    - {"op": "remove", "id"}
+    """
+
+    def __init__(self, room: Room, queue: Optional[Queue] = None) -> None:
+        self.room = room
+        self.queue = queue or room.current_queue
+        self.ops: list[dict[str, Any]] = []
+        self.version: Optional[int] = None
+
+    def _record(self, op: dict[str, Any]) -> None:
+        # A later mutation of the same entry within one handler supersedes the earlier one
+        if op["op"] in ("move", "update"):
+            self.ops = [o for o in self.ops if not (o["op"] == op["op"] and o.get("id") == op["id"])]
+        self.ops.append(op)
+        if self.version is None and self.queue is not None:
+            self.version = bump_queue_version(self.queue)
+
+    def inserted(self, entry: QueueEntry) -> None:
+        self._record({"op": "insert", "item": entry.to_dict()})
+
+    def moved(self, entry: Optional[QueueEntry]) -> None:
+        if entry is None:
+            return
+        self.moved_fields(entry.id, entry.position, entry.status)
+
+    def moved_fields(self, entry_id: int, position: Optional[int], status: str) -> None:
+        self._record({"op": "move", "id": entry_id, "position": position, "status": status})
+
+    def updated(self, entry_id: int, **fields: Any) -> None:
+        self._record({"op": "update", "id": entry_id, **fields})
+
+    def removed(self, entry_id: int) -> None:
+        self._record({"op": "remove", "id": entry_id})
 
+    def emit(self) -> None:
+        if not self.ops:
+            return
+        patch = {
+            "code": self.room.code,
+            "queue_id": self.queue.id if self.queue is not None else None,
+            "version": self.version,
+            "ops": self.ops,
+        }
+        if self.queue is not None and self.version is not None:
+            record_queue_patch(
+                self.queue.id, patch, int(current_app.config.get("QUEUE_PATCH_LOG_SIZE", 200))
+            )
+        emit_buffer.emit("queue.batch", patch, to=f"room:{self.room.code}")
@@ -3,22 +3,24 @@ from __future__ import annotations
 import logging
 
 from ....extensions import db, socketio
+from ....helpers.permissions import can_manage_room
 from ....lib.utils import commit_with_retry, now_ms
-from ....models import Queue, QueueEntry, Room, RoomMembership, User
-from ...middleware import require_room
+from ....helpers.ready import reset_room_ready
+from ....models import Queue, QueueEntry, Room
+from ...middleware import idempotent, require_room
 from ..rooms.room_timeouts import schedule_starting_to_playing_timeout
+from .common import QueueBatch
 
 
 def register() -> None:
     @socketio.on("queue.continue_next")
+    @idempotent
     @require_room
     def _on_queue_continue_next(room: Room, user_id: int, data: dict):
         """Manually continue to next video (owner/operators only), marking current as completed."""
         res, rej = Room.emit(room.code, trigger="queue.continue_next")
         try:
-            is_owner = room.owner_id == user_id
-            is_operator = any(operator.user_id == user_id for operator in room.operators)
-            if not (is_owner or is_operator):
+            if not can_manage_room(room, user_id):
                 return rej("queue.continue_next: insufficient permissions")
 
             if not room.current_queue:
@@ -54,32 +56,10 @@ def register() -> None:
                 next_entry.playing_since_ms = None
                 next_entry.paused_at = None
                 room.state = "starting"
-                active_user_ids = (
-                    db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                )
-                (
-                    db.session.query(RoomMembership)
-                    .filter(
-                        RoomMembership.room_id == room.id,
-                        RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                    )
-                    .update({RoomMembership.ready: False}, synchronize_session=False)
-                )
-                db.session.flush()
+                reset_room_ready(room)
                 
-                try:
-                    db.session.refresh(next_entry)
-                except Exception:
-                    pass
-                socketio.emit(
-                    "queue.moved",
-                    {
-                        "id": next_entry.id,
-                        "position": next_entry.position,
-                        "status": next_entry.status,
-                    },
-                    room=f"room:{room.code}",
-                )
+                batch = QueueBatch(room)
+                batch.moved(next_entry)
                 res(
                     "room.playback",
                     {
@@ -92,10 +72,9 @@ def register() -> None:
                 )
                 schedule_starting_to_playing_timeout(room.code, delay_seconds=30)
                 commit_with_retry(db.session)
+                batch.emit()
                 return
 
-            completed_entry = current_entry
-
             _now_ms = now_ms()
             duration_ms = max(0, int(current_entry.duration_ms or 0))
             base_progress_ms = int(current_entry.progress_ms or 0)
@@ -150,20 +129,12 @@ def register() -> None:
 
             if next_entry:
                 room.state = "starting"
-                active_user_ids = (
-                    db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                )
-                (
-                    db.session.query(RoomMembership)
-                    .filter(
-                        RoomMembership.room_id == room.id,
-                        RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                    )
-                    .update({RoomMembership.ready: False}, synchronize_session=False)
-                )
-                db.session.flush()
+                reset_room_ready(room)
             else:
                 room.state = "paused"
+            batch = QueueBatch(room)
+            batch.moved(current_entry_for_completion)
+            batch.moved(next_entry)
             commit_with_retry(db.session)
             
             # Refresh room and queue after commit to ensure current_entry relationship is updated
@@ -171,34 +142,7 @@ def register() -> None:
             if room.current_queue:
                 db.session.refresh(room.current_queue)
 
-            try:
-                db.session.refresh(completed_entry)
-            except Exception:
-                completed_entry = None
-            if completed_entry:
-                socketio.emit(
-                    "queue.moved",
-                    {
-                        "id": completed_entry.id,
-                        "position": completed_entry.position,
-                        "status": completed_entry.status,
-                    },
-                    room=f"room:{room.code}",
-                )
-            if next_entry:
-                try:
-                    db.session.refresh(next_entry)
-                except Exception:
-                    pass
-                socketio.emit(
-                    "queue.moved",
-                    {
-                        "id": next_entry.id,
-                        "position": next_entry.position,
-                        "status": next_entry.status,
-                    },
-                    room=f"room:{room.code}",
-                )
+            batch.emit()
 
             if next_entry:
                 res(
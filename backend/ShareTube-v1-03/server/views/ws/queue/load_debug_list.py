@@ -11,7 +11,7 @@ from ....extensions import db, socketio
 from ....models import QueueEntry, YouTubeAuthor
 from ....lib.utils import now_ms
 from ...middleware import ensure_queue, require_room
-from .common import emit_queue_update_for_room
+from .common import bump_queue_version, emit_queue_update_for_room
 
 
 def register() -> None:
@@ -83,6 +83,7 @@ def register() -> None:
                 if field in entry_data:
                     setattr(entry, field, entry_data[field])
             db.session.add(entry)
+        bump_queue_version(queue)
         db.session.commit()
         db.session.refresh(queue)
         emit_queue_update_for_room(room)
@@ -5,10 +5,12 @@ from server.models.room.queue_entry import QueueEntry
 import logging
 from typing import Any
 
+from flask import request
+
 from ....extensions import db, socketio
 from ....models import Queue, QueueEntry, Room
 from ...middleware import ensure_queue, require_room
-from .common import can_modify_any_entry
+from .common import QueueBatch, can_modify_any_entry
     
 
 def register() -> None:
@@ -96,21 +98,17 @@ def register() -> None:
                     e.position = idx
                     updates.append({"id": e.id, "position": e.position, "status": e.status})
 
+            batch = QueueBatch(room, queue)
+            for u in updates:
+                batch.moved_fields(u["id"], u["position"], u["status"])
+            batch.moved(entry_to_move)
+
             db.session.commit()
             db.session.refresh(room)
             db.session.refresh(queue)
 
-            socketio.emit(
-                "queue.moved",
-                {
-                    "id": entry_to_move.id,
-                    "position": entry_to_move.position,
-                    "status": entry_to_move.status,
-                    "opts": {"updates": updates},
-                },
-                room=f"room:{room.code}",
-            )
-            res("queue.move.result", {"ok": True, "updates": updates})
+            batch.emit()
+            res("queue.move.result", {"ok": True, "updates": updates}, to=request.sid)
         except Exception:
             logging.exception(
                 "queue.move handler error (id=%s) (target_id=%s) (position=%s) (user_id=%s) (room=%s)",
@@ -4,9 +4,11 @@ import logging
 
 from ....extensions import db, socketio
 from ....lib.utils import commit_with_retry, now_ms
-from ....models import Queue, QueueEntry, Room, RoomMembership, User
+from ....helpers.ready import reset_room_ready
+from ....models import Queue, QueueEntry, Room
 from ...middleware import require_queue_entry, require_room
 from ..rooms.room_timeouts import schedule_starting_to_playing_timeout
+from .common import QueueBatch
 
 
 def register() -> None:
@@ -63,6 +65,8 @@ def register() -> None:
                 # Keep current_entry_id set to the completed entry (don't clear it)
                 room.state = "idle"
 
+                batch = QueueBatch(room)
+                batch.moved(completed_entry)
                 commit_with_retry(db.session)
 
                 # Refresh room and queue after commit to ensure current_entry relationship is updated
@@ -70,20 +74,7 @@ def register() -> None:
                 if room.current_queue:
                     db.session.refresh(room.current_queue)
 
-                try:
-                    db.session.refresh(completed_entry)
-                except Exception:
-                    completed_entry = None
-                if completed_entry:
-                    socketio.emit(
-                        "queue.moved",
-                        {
-                            "id": completed_entry.id,
-                            "position": completed_entry.position,
-                            "status": completed_entry.status,
-                        },
-                        room=f"room:{room.code}",
-                    )
+                batch.emit()
                 res(
                     "room.playback",
                     {
@@ -133,20 +124,12 @@ def register() -> None:
 
             if next_entry:
                 room.state = "starting"
-                active_user_ids = (
-                    db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                )
-                (
-                    db.session.query(RoomMembership)
-                    .filter(
-                        RoomMembership.room_id == room.id,
-                        RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                    )
-                    .update({RoomMembership.ready: False}, synchronize_session=False)
-                )
-                db.session.flush()
+                reset_room_ready(room)
             else:
                 room.state = "paused"
+            batch = QueueBatch(room)
+            batch.moved(current_entry_for_completion)
+            batch.moved(next_entry)
             commit_with_retry(db.session)
             
             # Refresh room and queue after commit to ensure current_entry relationship is updated
@@ -154,34 +137,7 @@ def register() -> None:
             if room.current_queue:
                 db.session.refresh(room.current_queue)
 
-            try:
-                db.session.refresh(completed_entry)
-            except Exception:
-                completed_entry = None
-            if completed_entry:
-                socketio.emit(
-                    "queue.moved",
-                    {
-                        "id": completed_entry.id,
-                        "position": completed_entry.position,
-                        "status": completed_entry.status,
-                    },
-                    room=f"room:{room.code}",
-                )
-            if next_entry:
-                try:
-                    db.session.refresh(next_entry)
-                except Exception:
-                    pass
-                socketio.emit(
-                    "queue.moved",
-                    {
-                        "id": next_entry.id,
-                        "position": next_entry.position,
-                        "status": next_entry.status,
-                    },
-                    room=f"room:{room.code}",
-                )
+            batch.emit()
             if next_entry:
                 res(
                     "room.playback",
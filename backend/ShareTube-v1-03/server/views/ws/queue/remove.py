@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import logging
 
+from flask import request
+
 from ....extensions import db, socketio
 from ....lib.utils import commit_with_retry
 from ....models import QueueEntry, Room
 from ...middleware import require_room
-from .common import can_modify_any_entry
+from .common import QueueBatch, can_modify_any_entry
 
 
 def register() -> None:
@@ -36,26 +38,17 @@ def register() -> None:
                 )
                 return rej("queue.remove: no entry found for id")
             was_deleted = entry.status == "deleted"
+            batch = QueueBatch(room, entry.queue)
             if was_deleted:
+                batch.removed(entry.id)
                 db.session.delete(entry)
             else:
                 entry.status = "deleted"
+                batch.updated(entry.id, status="deleted")
             commit_with_retry(db.session)
             db.session.refresh(room)
-
-            payload = {"id": id}
-            if was_deleted:
-                payload["remove"] = True
-            else:
-                payload["status"] = "deleted"
-                try:
-                    db.session.refresh(entry)
-                    payload["position"] = entry.position
-                except Exception:
-                    payload["position"] = None
-
-            socketio.emit("queue.removed", payload, room=f"room:{room.code}")
-            res("queue.remove.result", {"removed": True})
+            batch.emit()
+            res("queue.remove.result", {"removed": True}, to=request.sid)
         except Exception:
             logging.exception(
                 "queue.remove handler error (id=%s) (user_id=%s) (room=%s)",
@@ -5,10 +5,12 @@ from server.models.room.queue_entry import QueueEntry
 import logging
 from typing import Any
 
+from flask import request
+
 from ....extensions import db, socketio
 from ....models import Queue, QueueEntry, Room
 from ...middleware import ensure_queue, require_room
-from .common import can_modify_any_entry
+from .common import QueueBatch, can_modify_any_entry
 
 
 def register() -> None:
@@ -65,20 +67,16 @@ def register() -> None:
                     e.status = "queued"
                     updates.append({"id": e.id, "position": e.position, "status": e.status})
 
+            batch = QueueBatch(room, queue)
+            for u in updates:
+                batch.moved_fields(u["id"], u["position"], u["status"])
+            batch.moved(entry)
+
             db.session.commit()
             db.session.refresh(room)
             db.session.refresh(queue)
-            socketio.emit(
-                "queue.moved",
-                {
-                    "id": entry.id,
-                    "position": entry.position,
-                    "status": entry.status,
-                    "opts": {"updates": updates},
-                },
-                room=f"room:{room.code}",
-            )
-            res("queue.requeue_to_top.result", {"ok": True, "updates": updates})
+            batch.emit()
+            res("queue.requeue_to_top.result", {"ok": True, "updates": updates}, to=request.sid)
         except Exception:
             logging.exception(
                 "queue.requeue_to_top handler error (id=%s) (user_id=%s) (room=%s)",
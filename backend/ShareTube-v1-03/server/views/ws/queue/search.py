@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import logging
+
+from flask import request
+
+from ....extensions import socketio
+from ....lib import emit_buffer
+from ....helpers.search import SEARCH_DEFAULT_LIMIT, search_room_entries
+from ....models import Room
+from ...middleware import require_room
+
+
+def register() -> None:
+    @socketio.on("queue.search")
+    @require_room
+    def _on_queue_search(room: Room, user_id: int, data: dict):
+        """
+        Full-text search over every queue (current and historical) of the caller's room.
+
+        Payload: {code, q, limit?, offset?}. Results go only to the requesting socket as
+        queue.search.result with ranked entries and a has_more flag for pagination.
+        """
+        query = str((data or {}).get("q") or "").strip()
+        try:
+            limit = int((data or {}).get("limit") or SEARCH_DEFAULT_LIMIT)
+            offset = int((data or {}).get("offset") or 0)
+        except (TypeError, ValueError):
+            emit_buffer.emit(
+                "room.error",
+                {"error": "queue.search: limit and offset must be integers", "code": room.code},
+                to=request.sid,
+            )
+            return
+
+        try:
+            entries, has_more = search_room_entries(room.id, query, limit=limit, offset=offset)
+            emit_buffer.emit(
+                "queue.search.result",
+                {
+                    "code": room.code,
+                    "q": query,
+                    "offset": offset,
+                    "has_more": has_more,
+                    "results": [entry.to_dict() for entry in entries],
+                },
+                to=request.sid,
+            )
+        except Exception:
+            logging.exception(
+                "queue.search handler error (q=%s) (user_id=%s) (room=%s)",
+                query,
+                user_id,
+                room.code,
+            )
+            emit_buffer.emit(
+                "room.error",
+                {"error": "queue.search handler error", "code": room.code},
+                to=request.sid,
+            )
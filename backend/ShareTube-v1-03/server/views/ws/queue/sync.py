@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from flask import request
+
+from ....extensions import socketio
+from ....helpers.redis import get_queue_patches_since
+from ....lib import emit_buffer, metrics
+from ....models import Room
+from ...middleware import require_room
+from .common import emit_queue_update_for_room
+
+
+def register() -> None:
+    @socketio.on("queue.sync")
+    @require_room
+    def _on_queue_sync(room: Room, user_id: int, data: dict):
+        """
+        Catch a client up after a queue version gap.
+
+        Replays the logged patches since the client's version when the log still covers them,
+        otherwise sends a full queue.update snapshot.
+        """
+        queue = room.current_queue
+        if not queue:
+            return
+        try:
+            since = int((data or {}).get("version") or 0)
+        except (TypeError, ValueError):
+            since = 0
+        current = queue.version or 0
+
+        same_queue = (data or {}).get("queue_id") == queue.id
+        patches = get_queue_patches_since(queue.id, since, current) if same_queue and since > 0 else None
+        if patches is None:
+            metrics.incr("queue.sync.snapshot")
+            emit_queue_update_for_room(room, to=request.sid)
+            return
+
+        metrics.incr("queue.sync.patches", len(patches))
+        for patch in patches:
+            emit_buffer.emit("queue.batch", patch, to=request.sid)
@@ -4,7 +4,7 @@ import time
 
 from flask import Blueprint, jsonify, request
 
-from .common import emit_presence
+from .common import emit_presence, schedule_presence
 from .heartbeat import start_heartbeat_if_needed
 from .... import get_user_id_from_auth_header
 from ....extensions import db
@@ -62,28 +62,31 @@ def time_now():
     return jsonify({"clientTimestamp": client_timestamp})
 
 
+from .connect import register as register_connect
 from .join import register as register_room_join
 from .leave import register as register_room_leave
 from .user_ready import register as register_user_ready
 from .client_verification import register as register_client_verification
-from .client_pong import register as register_client_pong
 from .settings import register as register_settings
 from .disconnect import register as register_disconnect
+from .presence_sync import register as register_presence_sync
 
 __all__ = [
     "rooms_bp",
     "register_socket_handlers",
     "emit_presence",
+    "schedule_presence",
     "start_heartbeat_if_needed",
 ]
 
 
 def register_socket_handlers() -> None:
+    register_connect()
     register_room_join()
     register_room_leave()
     register_user_ready()
     register_client_verification()
-    register_client_pong()
     register_settings()
     register_disconnect()
+    register_presence_sync()
 
@@ -5,33 +5,118 @@ import time
 
 from typing import Optional
 
-from ....extensions import db, socketio
+from flask import current_app
+
+from ....extensions import db
+from ....lib import emit_buffer, metrics
 from ....models import Room, RoomMembership, User
 from ....helpers.ws import emit_function_after_delay
-from ....helpers.redis import get_user_socket_connections, has_user_been_verified
+from ....helpers.permissions import invalidate_permissions
+from ....helpers.ready import adjust_ready_counters, is_member_ready
+from ....helpers.redis import (
+    get_presence_version,
+    get_user_socket_connections,
+    has_user_been_verified,
+    next_presence_version,
+)
+
+
+# Rooms with a presence flush already scheduled in this worker
+_presence_pending: set[int] = set()
+
+
+def schedule_presence(room_id: int) -> None:
+    """
+    Debounced presence snapshot broadcast: at most one pending flush per room per window.
+
+    Used for changes that touch every member at once (ready barrier resets); requests arriving
+    while a flush is pending are absorbed by it, so a burst costs one member query and one emit.
+    Single-member changes go out as presence.joined/left/ready deltas instead.
+    """
+    metrics.incr("presence.requested")
+    if room_id in _presence_pending:
+        metrics.incr("presence.coalesced")
+        return
+    _presence_pending.add(room_id)
+    window_ms = int(current_app.config.get("PRESENCE_DEBOUNCE_MS", 250))
+    emit_function_after_delay(_flush_presence, room_id, delay_seconds=window_ms / 1000)
+
+
+def _flush_presence(room_id: int) -> None:
+    # Clear before querying so changes committed during the flush schedule a fresh one
+    _presence_pending.discard(room_id)
+    emit_presence(room_id)
+
+
+def _presence_user(user: User, ready: bool) -> dict:
+    return {
+        "id": user.id,
+        "name": user.name,
+        "picture": user.picture,
+        "ready": bool(ready),
+    }
+
 
+def emit_presence(room_id: int, to: Optional[str] = None) -> None:
+    """
+    Emit a full presence snapshot ({code, version, users}).
 
-def emit_presence(room_id: int) -> None:
+    Broadcast to the room by default; pass ``to`` (a socket id) for the snapshot a joining
+    client or a client that detected a version gap asks for.
+    """
     room = db.session.get(Room, room_id)
     if not room:
         return
+    metrics.incr("presence.emitted")
 
+    # Read the version before the members so a concurrent change is re-applied as a delta
+    version = get_presence_version(room.id)
     rows = (
-        db.session.query(User, RoomMembership.ready)
+        db.session.query(User, RoomMembership.ready, RoomMembership.ready_generation)
         .join(RoomMembership, RoomMembership.user_id == User.id)
         .filter(RoomMembership.room_id == room.id, User.active.is_(True))
         .all()
     )
-    payload = [
-        {
-            "id": user.id,
-            "name": user.name,
-            "picture": user.picture,
-            "ready": bool(ready),
-        }
-        for user, ready in rows
+    generation = room.ready_generation or 0
+    users = [
+        _presence_user(user, bool(ready) and (ready_generation or 0) == generation)
+        for user, ready, ready_generation in rows
     ]
-    socketio.emit("presence.update", payload, room=f"room:{room.code}")
+    payload = {"code": room.code, "version": version, "users": users}
+    emit_buffer.emit("presence.update", payload, to=to or f"room:{room.code}")
+
+
+def emit_presence_joined(room: Room, user: User, ready: bool = False) -> None:
+    """Delta: a member joined (or rejoined) the room."""
+    version = next_presence_version(room.id)
+    metrics.incr("presence.delta")
+    emit_buffer.emit(
+        "presence.joined",
+        {"code": room.code, "version": version, "user": _presence_user(user, ready)},
+        to=f"room:{room.code}",
+    )
+
+
+def emit_presence_left(room: Room, user_id: int) -> None:
+    """Delta: a member left or was removed from the room."""
+    version = next_presence_version(room.id)
+    metrics.incr("presence.delta")
+    emit_buffer.emit(
+        "presence.left",
+        {"code": room.code, "version": version, "user_id": user_id},
+        to=f"room:{room.code}",
+    )
+
+
+def emit_presence_ready(room: Room, user_id: int, ready: bool) -> None:
+    """Delta: a member toggled ready."""
+    version = next_presence_version(room.id)
+    metrics.incr("presence.delta")
+    emit_buffer.emit(
+        "presence.ready",
+        {"code": room.code, "version": version, "user_id": user_id, "ready": bool(ready)},
+        to=f"room:{room.code}",
+    )
 
 
 def handle_user_disconnect(user_id: int) -> None:
@@ -41,16 +126,18 @@ def handle_user_disconnect(user_id: int) -> None:
             return
 
         room = membership.room
+        was_ready = is_member_ready(membership, room)
         user = db.session.get(User, membership.user_id)
         if user:
             user.last_seen = int(time.time())
 
         # Bulk delete avoids SAWarning when another code path already removed this membership.
-        (
+        removed = (
             db.session.query(RoomMembership)
             .filter_by(id=membership.id)
             .delete(synchronize_session=False)
         )
+        invalidate_permissions(room_id=membership.room_id, user_id=membership.user_id)
 
         other_memberships = (
             db.session.query(RoomMembership)
@@ -60,7 +147,10 @@ def handle_user_disconnect(user_id: int) -> None:
         if not other_memberships and user:
             user.active = False
         db.session.commit()
-        emit_function_after_delay(emit_presence, room.id, delay_seconds=0.1)
+        # Only the handler whose delete removed the row moves the counters
+        if removed == 1:
+            adjust_ready_counters(room.id, ready_delta=-int(was_ready), total_delta=-1)
+        emit_presence_left(room, user_id)
     except Exception:
         logging.exception("_handle_user_disconnect error")
 
@@ -80,16 +170,18 @@ def handle_user_disconnect_delayed(user_id: int) -> None:
             return
 
         room = membership.room
+        was_ready = is_member_ready(membership, room)
         user = db.session.get(User, membership.user_id)
         if user:
             user.last_seen = int(time.time())
 
         # Bulk delete avoids SAWarning when another code path already removed this membership.
-        (
+        removed = (
             db.session.query(RoomMembership)
             .filter_by(id=membership.id)
             .delete(synchronize_session=False)
         )
+        invalidate_permissions(room_id=membership.room_id, user_id=membership.user_id)
 
         other_memberships = (
             db.session.query(RoomMembership)
@@ -99,7 +191,10 @@ def handle_user_disconnect_delayed(user_id: int) -> None:
         if not other_memberships and user:
             user.active = False
         db.session.commit()
-        emit_function_after_delay(emit_presence, room.id, delay_seconds=0.1)
+        # Only the handler whose delete removed the row moves the counters
+        if removed == 1:
+            adjust_ready_counters(room.id, ready_delta=-int(was_ready), total_delta=-1)
+        emit_presence_left(room, user_id)
     except Exception:
         logging.exception("_handle_user_disconnect_delayed error")
 
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import logging
+
+from flask import request
+
+from ....extensions import socketio
+from ....helpers.ws import authenticate_socket
+from ....lib.liveness import track_socket_liveness
+from ....lib.socket_codec import negotiate_socket_codec
+
+
+def register() -> None:
+    @socketio.on("connect")
+    def _on_connect(*_args):
+        """
+        Authenticate the socket once at connect time.
+
+        The verified identity is cached in the Socket.IO session for every later event; sockets
+        without a valid token are refused so handlers never see unauthenticated traffic. Clients
+        may also ask for msgpack frames with ``?codec=msgpack`` and compressed large frames with
+        ``?compress=deflate``. The socket is bound to its user so Engine.IO pongs count as the
+        user's liveness.
+        """
+        user_id = authenticate_socket()
+        if not user_id:
+            logging.info("connect: refusing socket without a valid token (sid=%s)", request.sid)
+            raise ConnectionRefusedError("auth.expired")
+        negotiate_socket_codec()
+        track_socket_liveness(user_id)
@@ -17,6 +17,9 @@ from ....helpers.redis import (
     remove_socket_connection,
     clear_user_verification,
 )
+from ....helpers.rate_limit import forget_socket_buckets
+from ....lib.liveness import forget_socket_liveness
+from ....lib.socket_codec import forget_socket_codec
 from .common import (
     handle_user_disconnect,
     handle_user_disconnect_delayed,
@@ -26,8 +29,11 @@ from .common import (
 def register() -> None:
     @socketio.on("disconnect")
     def _on_disconnect(*_args):
+        forget_socket_codec()
+        forget_socket_liveness()
+        forget_socket_buckets(request.sid)
         try:
-            user_id = get_user_id_from_socket()
+            user_id = get_user_id_from_socket(allow_expired=True)
             if not user_id:
                 logging.warning("disconnect: no user_id found for disconnected socket")
                 return
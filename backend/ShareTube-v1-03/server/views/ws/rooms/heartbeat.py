@@ -1,6 +1,9 @@
 """
 Heartbeat module for managing user presence and cleanup.
 Handles periodic cleanup of inactive users across all rooms.
+
+A user counts as inactive when neither ``User.last_seen`` (join/leave/disconnect) nor an
+Engine.IO transport pong (see ``lib.liveness``) is newer than ``PONG_TIMEOUT_SECONDS``.
 """
 from __future__ import annotations
 
@@ -11,9 +14,12 @@ from flask import Flask
 from ....extensions import db, socketio
 from ....lib.utils import commit_with_retry
 from ....lib.background_slots import claim_background_slot
+from ....lib.liveness import alive_user_ids
+from ....helpers.permissions import invalidate_permissions
+from ....helpers.ready import reconcile_all_ready_counters, reconcile_ready_counters
 from ....models import Room, RoomMembership, User
 
-from .common import emit_presence
+from .common import emit_presence_left
 
 # Guard to ensure we start only one heartbeat thread
 _heartbeat_thread_started: bool = False
@@ -24,6 +30,8 @@ def _heartbeat_cleanup_forever(app: Flask) -> None:
     with app.app_context():
         interval = app.config.get("HEARTBEAT_INTERVAL_SECONDS", 10)
         pong_timeout = app.config.get("PONG_TIMEOUT_SECONDS", 11)
+        ready_reconcile_interval = app.config.get("READY_COUNTER_RECONCILE_SECONDS", 60)
+    last_ready_reconcile = time.monotonic()
 
     while True:
         start_time = time.perf_counter_ns()
@@ -32,13 +40,23 @@ def _heartbeat_cleanup_forever(app: Flask) -> None:
             with app.app_context():
                 cutoff_time = int(time.time()) - pong_timeout
 
-                # Get all inactive active users
-                inactive_users = User.query.filter(
-                    User.active == True,
-                    User.last_seen < cutoff_time
-                ).all()
+                # Active users not seen since the cutoff, minus those whose sockets still pong
+                stale_user_ids = [
+                    user_id
+                    for (user_id,) in db.session.query(User.id).filter(
+                        User.active == True,
+                        User.last_seen < cutoff_time
+                    )
+                ]
+                inactive_users = []
+                if stale_user_ids:
+                    alive = alive_user_ids(cutoff_time)
+                    inactive_ids = [user_id for user_id in stale_user_ids if user_id not in alive]
+                    if inactive_ids:
+                        inactive_users = User.query.filter(User.id.in_(inactive_ids)).all()
 
-                affected_room_codes: set[str] = set[str]()
+                # room code -> ids of users removed from it this cycle
+                removed_by_room: dict[str, list[int]] = {}
 
                 for user in inactive_users:
                     logging.debug("heartbeat: cleaning up inactive user %s", user.id)
@@ -52,8 +70,8 @@ def _heartbeat_cleanup_forever(app: Flask) -> None:
                         continue
 
                     # Collect room codes before deleting memberships
-                    room_codes = [membership.room.code for membership in memberships]
-                    affected_room_codes.update(room_codes)
+                    for membership in memberships:
+                        removed_by_room.setdefault(membership.room.code, []).append(user.id)
 
                     # Bulk delete all memberships for this user
                     (
@@ -61,20 +79,29 @@ def _heartbeat_cleanup_forever(app: Flask) -> None:
                         .filter_by(user_id=user.id)
                         .delete(synchronize_session=False)
                     )
+                    invalidate_permissions(user_id=user.id)
 
                     # Deactivate the user since all memberships are removed
                     user.active = False
                     user.last_seen = int(time.time())
 
-                if affected_room_codes:
+                if removed_by_room:
                     commit_with_retry(db.session)
 
-                    # Emit presence updates for affected rooms
-                    for room_code in affected_room_codes:
+                    # Emit presence deltas for affected rooms
+                    for room_code, removed_user_ids in removed_by_room.items():
                         room = Room.query.filter_by(code=room_code).first()
                         if room:
-                            logging.debug("heartbeat: emitting presence for room %s", room.code)
-                            emit_presence(room.id)
+                            reconcile_ready_counters(room.id)
+                            logging.debug("heartbeat: emitting presence.left for room %s", room.code)
+                            for removed_user_id in removed_user_ids:
+                                emit_presence_left(room, removed_user_id)
+
+                # Repair ready/total counter drift left behind by failed commits
+                if time.monotonic() - last_ready_reconcile >= ready_reconcile_interval:
+                    last_ready_reconcile = time.monotonic()
+                    checked = reconcile_all_ready_counters()
+                    logging.debug("heartbeat: reconciled ready counters for %s rooms", checked)
         except Exception:
             try:
                 db.session.rollback()
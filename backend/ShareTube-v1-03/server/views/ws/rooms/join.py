@@ -7,14 +7,17 @@ from flask import request
 from flask_socketio import join_room
 
 from ....extensions import db, socketio
+from ....lib import emit_buffer, metrics
 from ....models import Room, RoomMembership, User
 from ....helpers.ws import (
-    emit_function_after_delay,
     get_user_id_from_socket,
 )
+from ....helpers.ready import adjust_ready_counters, is_member_ready
 from ....helpers.redis import track_socket_connection, clear_user_verification
+from ....helpers.room_log import get_room_events_since
+from ....helpers.room_snapshot import get_room_snapshot
 from ....lib.utils import now_ms
-from .common import emit_presence
+from .common import emit_presence, emit_presence_joined
 
 
 def register() -> None:
@@ -26,17 +29,17 @@ def register() -> None:
 
             user_id = get_user_id_from_socket()
             if not user_id:
-                socketio.emit("room.error", {"error": "Authentication required"})
+                emit_buffer.emit("room.error", {"error": "Authentication required"}, to=request.sid)
                 return
 
             code = (data or {}).get("code")
             if not code:
-                socketio.emit("room.error", {"error": "Room code required"})
+                emit_buffer.emit("room.error", {"error": "Room code required"}, to=request.sid)
                 return
 
             room = Room.query.filter_by(code=code).first()
             if not room:
-                socketio.emit("room.error", {"error": "Room not found"})
+                emit_buffer.emit("room.error", {"error": "Room not found"}, to=request.sid)
                 return
 
             track_socket_connection(user_id, request.sid)
@@ -54,6 +57,8 @@ def register() -> None:
                 user.last_seen = now_ts
                 user.active = True
 
+            ready_delta = 0
+            total_delta = 0
             if not membership:
                 membership = RoomMembership(
                     room_id=room.id,
@@ -62,23 +67,80 @@ def register() -> None:
                     ready=False,
                 )
                 db.session.add(membership)
+                total_delta = 1
             elif room_in_starting:
+                if is_member_ready(membership, room):
+                    ready_delta = -1
                 membership.ready = False
             db.session.commit()
+            if ready_delta or total_delta:
+                adjust_ready_counters(room.id, ready_delta=ready_delta, total_delta=total_delta)
 
             join_room(f"room:{room.code}")
-            emit_function_after_delay(emit_presence, room.id, delay_seconds=0.1)
-            socketio.emit(
+
+            # Resume: replay only the broadcasts this client missed while they are still logged
+            replay = None
+            last_seq = (data or {}).get("last_seq")
+            if last_seq is not None:
+                try:
+                    replay = get_room_events_since(room.code, int(last_seq))
+                except (TypeError, ValueError):
+                    replay = None
+            if replay is not None:
+                metrics.incr("room.join.resumed")
+                metrics.incr("room.join.replayed_events", len(replay))
+                emit_buffer.emit(
+                    "user.join.result",
+                    {
+                        "ok": True,
+                        "code": room.code,
+                        "resumed": True,
+                        "clientTimestamp": client_timestamp,
+                    },
+                    to=request.sid,
+                )
+                for seq, event, payload in replay:
+                    emit_buffer.emit(event, {**payload, "seq": seq}, to=request.sid)
+                if user:
+                    emit_presence_joined(room, user, ready=is_member_ready(membership, room))
+                return
+
+            if last_seq is not None:
+                metrics.incr("room.join.resume_missed")
+            if user:
+                emit_presence_joined(room, user, ready=is_member_ready(membership, room))
+
+            seq, snapshot = get_room_snapshot(room)
+            # Conditional fetch: the client already holds this room at the current seq
+            if (data or {}).get("snapshot_seq") == seq:
+                metrics.incr("room.join.not_modified")
+                emit_buffer.emit(
+                    "user.join.result",
+                    {
+                        "ok": True,
+                        "code": room.code,
+                        "seq": seq,
+                        "not_modified": True,
+                        "clientTimestamp": client_timestamp,
+                    },
+                    to=request.sid,
+                )
+                return
+
+            emit_buffer.emit(
                 "user.join.result",
                 {
                     "ok": True,
                     "code": room.code,
-                    "snapshot": room.to_dict(),
+                    "seq": seq,
+                    "snapshot": snapshot,
                     "clientTimestamp": client_timestamp,
                 },
                 to=request.sid,
             )
+            # Full snapshot only for the joining socket; everyone else applies the delta
+            emit_presence(room.id, to=request.sid)
         except Exception:
             logging.exception("room.join handler error")
-            socketio.emit("room.error", {"error": "Failed to join room"})
+            emit_buffer.emit("room.error", {"error": "Failed to join room"}, to=request.sid)
 
@@ -8,9 +8,10 @@ from flask_socketio import leave_room
 
 from ....extensions import db, socketio
 from ....models import RoomMembership, Room, User
-from ....helpers.ws import emit_function_after_delay
+from ....helpers.permissions import invalidate_permissions
+from ....helpers.ready import adjust_ready_counters, is_member_ready
 from ....helpers.redis import check_user_other_connections, remove_socket_connection
-from .common import emit_presence
+from .common import emit_presence_left
 from ...middleware import require_room_by_code
 
 
@@ -31,16 +32,18 @@ def register() -> None:
             if not membership:
                 return
 
+            was_ready = is_member_ready(membership, room)
             user = db.session.get(User, membership.user_id)
             if user:
                 user.last_seen = int(time.time())
 
             # Bulk delete avoids SAWarning when another handler already removed this membership.
-            (
+            removed = (
                 db.session.query(RoomMembership)
                 .filter_by(id=membership.id)
                 .delete(synchronize_session=False)
             )
+            invalidate_permissions(room_id=room.id, user_id=membership.user_id)
 
             other_memberships = (
                 db.session.query(RoomMembership)
@@ -50,9 +53,12 @@ def register() -> None:
             if not other_memberships and user:
                 user.active = False
             db.session.commit()
+            # Only the handler whose delete removed the row moves the counters
+            if removed == 1:
+                adjust_ready_counters(room.id, ready_delta=-int(was_ready), total_delta=-1)
             db.session.refresh(room)
             leave_room(f"room:{room.code}")
-            emit_function_after_delay(emit_presence, room.id, delay_seconds=0.1)
+            emit_presence_left(room, user_id)
         except Exception:
             logging.exception("room.leave handler error")
 
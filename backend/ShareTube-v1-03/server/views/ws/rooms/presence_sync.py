@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from flask import request
+
+from ....extensions import socketio
+from ....lib import metrics
+from ....models import Room
+from ...middleware import require_room
+from .common import emit_presence
+
+
+def register() -> None:
+    @socketio.on("presence.sync")
+    @require_room
+    def _on_presence_sync(room: Room, user_id: int, data: dict):
+        """Send a full presence snapshot to a client that detected a presence version gap."""
+        metrics.incr("presence.sync_requested")
+        emit_presence(room.id, to=request.sid)
@@ -13,6 +13,7 @@ from urllib.parse import urlparse
 from flask import Flask, current_app
 
 from ....extensions import db, socketio
+from ....lib import emit_buffer
 from ....lib.utils import get_redis_client, now_ms, playing_since_ms_with_buffer
 from ....models import Room
 
@@ -108,7 +109,7 @@ def schedule_starting_to_playing_timeout(room_code: str, delay_seconds: float =
                 if current_entry:
                     db.session.refresh(current_entry)
 
-                socketio.emit(
+                emit_buffer.emit(
                     "room.playback",
                     {
                         "trigger": "starting_timeout",
@@ -118,7 +119,7 @@ def schedule_starting_to_playing_timeout(room_code: str, delay_seconds: float =
                         "progress_ms": current_entry.progress_ms if current_entry else 0,
                         "actor_user_id": None,
                     },
-                    room=f"room:{room_code}",
+                    to=f"room:{room_code}",
                 )
 
         except Exception:
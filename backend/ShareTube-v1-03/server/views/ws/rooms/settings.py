@@ -5,6 +5,8 @@ import logging
 from flask import request
 
 from ....extensions import db, socketio
+from ....lib import emit_buffer
+from ....helpers.permissions import can_manage_room
 from ....models import Room
 from ...middleware import require_room_by_code
 
@@ -14,10 +16,8 @@ def register() -> None:
     @require_room_by_code
     def _on_room_settings_set(room: Room, user_id: int, data: dict):
         try:
-            is_owner = room.owner_id == user_id
-            is_operator = any(operator.user_id == user_id for operator in room.operators)
-            if not (is_owner or is_operator):
-                socketio.emit(
+            if not can_manage_room(room, user_id):
+                emit_buffer.emit(
                     "room.error",
                     {
                         "error": "room.settings.set: insufficient permissions",
@@ -31,7 +31,7 @@ def register() -> None:
             setting_value = (data or {}).get("value")
 
             if not setting_name:
-                socketio.emit(
+                emit_buffer.emit(
                     "room.error",
                     {
                         "error": "room.settings.set: setting name is required",
@@ -44,7 +44,7 @@ def register() -> None:
             # Validate setting based on type
             if setting_name == "autoadvance_on_end":
                 if not isinstance(setting_value, bool):
-                    socketio.emit(
+                    emit_buffer.emit(
                         "room.error",
                         {
                             "error": "room.settings.set: autoadvance_on_end must be a boolean",
@@ -57,7 +57,7 @@ def register() -> None:
 
             elif setting_name == "is_private":
                 if not isinstance(setting_value, bool):
-                    socketio.emit(
+                    emit_buffer.emit(
                         "room.error",
                         {
                             "error": "room.settings.set: is_private must be a boolean",
@@ -71,7 +71,7 @@ def register() -> None:
             elif setting_name == "ad_sync_mode":
                 valid_modes = ["off", "pause_all", "operators_only", "starting_only"]
                 if setting_value not in valid_modes:
-                    socketio.emit(
+                    emit_buffer.emit(
                         "room.error",
                         {
                             "error": f"room.settings.set: ad_sync_mode must be one of {valid_modes}",
@@ -83,7 +83,7 @@ def register() -> None:
                 room.ad_sync_mode = setting_value
 
             else:
-                socketio.emit(
+                emit_buffer.emit(
                     "room.error",
                     {
                         "error": f"room.settings.set: unknown setting '{setting_name}'",
@@ -95,10 +95,10 @@ def register() -> None:
 
             db.session.commit()
 
-            socketio.emit(
+            emit_buffer.emit(
                 "room.settings.update",
                 {"setting": setting_name, "value": setting_value, "code": room.code},
-                room=f"room:{room.code}",
+                to=f"room:{room.code}",
             )
         except Exception:
             logging.exception("room.settings.set handler error")
@@ -1,19 +1,80 @@
 from __future__ import annotations
 
 import logging
+from typing import Optional
+
 from flask import current_app
+from sqlalchemy import and_, not_
 
 from ....extensions import db, socketio
 from ....models import QueueEntry, Room, RoomMembership, User
-from ...middleware import require_room
+from ...middleware import rate_limited, require_room
 from .room_timeouts import cancel_starting_timeout
-from ....lib.utils import flush_with_retry, commit_with_retry, now_ms, playing_since_ms_with_buffer
-from ....helpers.ws import emit_function_after_delay
-from .common import emit_presence
+from ....lib.utils import commit_with_retry, now_ms, playing_since_ms_with_buffer
+from ....helpers.permissions import can_manage_room
+from ....helpers.ready import adjust_ready_counters, get_ready_counters, reset_room_ready
+from .common import emit_presence_ready, schedule_presence
+
+
+def _set_member_ready(membership: RoomMembership, generation: int, ready: bool) -> bool:
+    """
+    Set a member's ready flag for the current barrier; True only when this call changed it.
+
+    The WHERE clause matches only rows whose ready state differs, so of two concurrent toggles
+    (two tabs of one user) only the first to commit sees a changed row and moves the counter.
+    It also requires the room to still be on ``generation``: a toggle racing a new barrier must
+    not count towards the counter that barrier just cleared.
+    """
+    ready_now = and_(RoomMembership.ready.is_(True), RoomMembership.ready_generation == generation)
+    current_barrier = (
+        db.session.query(Room.id)
+        .filter(Room.id == membership.room_id, Room.ready_generation == generation)
+        .exists()
+    )
+    changed = (
+        db.session.query(RoomMembership)
+        .filter(
+            RoomMembership.id == membership.id,
+            current_barrier,
+            not_(ready_now) if ready else ready_now,
+        )
+        .update({"ready": ready, "ready_generation": generation}, synchronize_session=False)
+    )
+    return changed == 1
+
+
+def _start_playback_when_ready(room: Room, user_id: int) -> Optional[dict]:
+    """Move a starting/midroll room to playing once everyone is ready; None when not applicable."""
+    current_entry = room.current_queue.current_entry if room.current_queue else None
+    if current_entry is None or room.state not in ("starting", "midroll"):
+        return None
+    # Several last-ready toggles can see the full count; only the one that flips the state starts playback
+    claimed = (
+        db.session.query(Room)
+        .filter(Room.id == room.id, Room.state.in_(("starting", "midroll")))
+        .update({"state": "playing"}, synchronize_session=False)
+    )
+    if not claimed:
+        return None
+    cancel_starting_timeout(room.code)
+    room.state = "playing"
+    current_entry.status = "playing"
+    playing_since_ms = playing_since_ms_with_buffer()
+    current_entry.playing_since_ms = playing_since_ms
+    current_entry.paused_at = None
+    commit_with_retry(db.session)
+    return {
+        "state": "playing",
+        "playing_since_ms": playing_since_ms,
+        "progress_ms": current_entry.progress_ms or 0,
+        "current_entry": current_entry.to_dict(),
+        "actor_user_id": user_id,
+    }
 
 
 def register() -> None:
     @socketio.on("user.ready")
+    @rate_limited
     @require_room
     def _on_user_ready(room: Room, user_id: int, data: dict):
         res, _rej = Room.emit(room.code, trigger="user.ready")
@@ -31,29 +92,24 @@ def register() -> None:
                 return
 
             ready = bool((data or {}).get("ready"))
-            previous_ready = bool(membership.ready)
-            membership.ready = bool(ready)
-            flush_with_retry(db.session)
-
-            socketio.emit(
-                "user.ready.update",
-                {"user_id": user_id, "ready": ready},
-                room=f"room:{room.code}",
-            )
-            current_app.logger.info("user.ready.update: room=%s, user_id=%s, ready=%s", room.code, user_id, ready)
+            changed = _set_member_ready(membership, room.ready_generation or 0, ready)
+            previous_ready = ready != changed
+            # Applied to the counters only after the commit below
+            ready_delta = (1 if ready else -1) if changed else 0
+            barrier_reset = False
 
-            midroll_payload = None
+            # A repeated toggle changes nothing; don't spend a presence version on it
+            if changed:
+                emit_presence_ready(room, user_id, ready)
+                current_app.logger.info("presence.ready: room=%s, user_id=%s, ready=%s", room.code, user_id, ready)
 
-            def _is_operator(user_id_to_check: int) -> bool:
-                if room.owner_id and room.owner_id == user_id_to_check:
-                    return True
-                return any(operator.user_id == user_id_to_check for operator in room.operators)
+            midroll_payload = None
 
             def _should_consider_midroll(mode: str) -> bool:
                 if mode == "pause_all":
                     return room.state in ("playing", "starting")
                 if mode == "operators_only":
-                    return room.state == "playing" and _is_operator(user_id)
+                    return room.state == "playing" and can_manage_room(room, user_id)
                 if mode == "starting_only":
                     return room.state == "starting"
                 return False
@@ -117,19 +173,9 @@ def register() -> None:
                     current_entry = room.current_queue.current_entry
                     if current_entry:
                         room.state = "midroll"
-                        active_user_ids = (
-                            db.session.query(User.id).filter(User.active.is_(True)).subquery()
-                        )
-                        (
-                            db.session.query(RoomMembership)
-                            .filter(
-                                RoomMembership.room_id == room.id,
-                                RoomMembership.user_id.in_(db.session.query(active_user_ids.c.id)),
-                            )
-                            .update({RoomMembership.ready: False}, synchronize_session=False)
-                        )
-                        db.session.flush()
-                        emit_function_after_delay(emit_presence, room.id, delay_seconds=0.1)
+                        reset_room_ready(room)
+                        barrier_reset = True
+                        schedule_presence(room.id)
                         progress_ms = (
                             paused_progress
                             if paused_progress is not None
@@ -143,43 +189,19 @@ def register() -> None:
                             "actor_user_id": user_id,
                         }
 
-            current_entry = (
-                room.current_queue.current_entry
-                if room.current_queue and room.current_queue.current_entry
-                else None
-            )
+            commit_with_retry(db.session)
 
-            memberships_ready = (
-                db.session.query(RoomMembership.ready)
-                .join(User, RoomMembership.user_id == User.id)
-                .filter(RoomMembership.room_id == room.id, User.active.is_(True))
-                .all()
-            )
-            all_users_ready = bool(memberships_ready) and all(bool(row[0]) for row in memberships_ready)
+            # Constant-time barrier bookkeeping from the committed change; a new barrier
+            # (midroll) already cleared the ready counter
+            ready_count = total_count = 0
+            if ready_delta and not barrier_reset:
+                ready_count, total_count = adjust_ready_counters(room.id, ready_delta=ready_delta)
+            elif ready:
+                ready_count, total_count = get_ready_counters(room.id)
 
-            should_transition = (
-                ready
-                and room.state in ("starting", "midroll")
-                and current_entry is not None
-                and all_users_ready
-            )
             playback_payload = None
-            if should_transition:
-                cancel_starting_timeout(room.code)
-                room.state = "playing"
-                current_entry.status = "playing"
-                playing_since_ms = playing_since_ms_with_buffer()
-                current_entry.playing_since_ms = playing_since_ms
-                current_entry.paused_at = None
-                playback_payload = {
-                    "state": "playing",
-                    "playing_since_ms": playing_since_ms,
-                    "progress_ms": current_entry.progress_ms if current_entry else 0,
-                    "current_entry": current_entry.to_dict(),
-                    "actor_user_id": user_id,
-                }
-
-            commit_with_retry(db.session)
+            if ready and total_count > 0 and ready_count >= total_count:
+                playback_payload = _start_playback_when_ready(room, user_id)
 
             if midroll_payload:
                 res("room.playback", midroll_payload)
@@ -0,0 +1,136 @@
+"""
+Benchmark compression CPU cost versus bytes saved for realtime frames and HTTP JSON responses.
+
+Usage (from backend/ShareTube-v1-03):
+    python -m tooling.bench.bench_compression --entries 10,50,200 --iterations 200
+
+Compares the encoders the server can use on the same realistic payloads:
+- socket frames (``emit.deflated``): raw deflate at several levels over the JSON body and the
+  msgpack body of ``room.playback`` and ``room.join`` snapshots;
+- HTTP (``/api/*``, dashboard): gzip at several levels and, when ``brotli`` is installed, Brotli
+  qualities over the snapshot JSON and a dashboard-style ``{"users": [...]}`` array.
+Compression is paid once per broadcast (the frame is shared by every opted-in socket in the
+worker) and once per HTTP response; decompression is paid by each client.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+
+import msgpack  # noqa: E402
+
+from tooling.bench.bench_socket_codec import _playback, _room_snapshot  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _users(rng: random.Random, count: int) -> dict:
+    # Mirrors DashboardData.get_users_data()
+    return {
+        "users": [
+            {
+                "id": i,
+                "name": f"User {rng.getrandbits(24):06x}",
+                "email": f"user{i}@example.com",
+                "active": rng.random() < 0.3,
+                "last_seen": int(time.time()) - rng.randint(0, 86400 * 30),
+                "created_at": None,
+                "room_count": rng.randint(0, 12),
+                "videos_added": rng.randint(0, 400),
+                "fake_user": False,
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def _deflate(level: int):
+    def encode(body: bytes) -> bytes:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return compressor.compress(body) + compressor.flush()
+
+    return encode
+
+
+def _encoders(http: bool) -> list[tuple[str, object, object]]:
+    if not http:
+        return [
+            (f"deflate-{level}", _deflate(level), lambda blob: zlib.decompress(blob, -15))
+            for level in (1, 3, 6, 9)
+        ]
+    encoders = [
+        (f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level), gzip.decompress)
+        for level in (1, 6, 9)
+    ]
+    if brotli is not None:
+        encoders += [
+            (f"br-{quality}", lambda body, quality=quality: brotli.compress(body, quality=quality), brotli.decompress)
+            for quality in (1, 4, 6)
+        ]
+    return encoders
+
+
+def _cpu_us(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def _compare(label: str, body: bytes, iterations: int, http: bool) -> None:
+    print(f"{label}: {len(body):,} B")
+    for name, encode, decode in _encoders(http):
+        compressed = encode(body)
+        encode_us = _cpu_us(lambda: encode(body), iterations)
+        decode_us = _cpu_us(lambda: decode(compressed), iterations)
+        saved = len(body) - len(compressed)
+        per_kb = encode_us / max(1, saved / 1024)
+        print(
+            f"  {name:<10} {len(compressed):>9,} B ({len(compressed) / len(body):6.1%})"
+            f"  encode {encode_us:>8.1f} us  decode {decode_us:>7.1f} us  {per_kb:6.2f} us/KB saved"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", default="10,50,200", help="comma-separated queue sizes")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = [("room.playback", _playback(rng))]
+    payloads += [
+        (f"room.join snapshot ({n} entries)", _room_snapshot(rng, n))
+        for n in (int(v) for v in args.entries.split(",") if v.strip())
+    ]
+
+    print("== socket frames (emit.deflated) ==")
+    for label, data in payloads:
+        event = ["user.join.result", data]
+        json_body = json.dumps(event, separators=(",", ":")).encode("utf-8")
+        packed_body = msgpack.packb({"event": event[0], "data": data}, default=str, use_bin_type=True)
+        _compare(f"{label} json", json_body, args.iterations, http=False)
+        _compare(f"{label} msgpack", packed_body, args.iterations, http=False)
+
+    print("== HTTP JSON responses ==")
+    http_payloads = payloads[1:] + [(f"dashboard users ({args.users})", _users(rng, args.users))]
+    for label, data in http_payloads:
+        _compare(label, json.dumps(data).encode("utf-8"), args.iterations, http=True)
+
+
+if __name__ == "__main__":
+    main()
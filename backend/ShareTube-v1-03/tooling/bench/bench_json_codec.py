@@ -0,0 +1,139 @@
+"""
+Benchmark JSON encode/decode throughput: stdlib ``json`` vs the shared codec (orjson when installed).
+
+Usage (from backend/ShareTube-v1-03):
+    python -m tooling.bench.bench_json_codec --entries 10,50,200 --iterations 500
+
+Builds a throwaway SQLite database with one room per ``--entries`` size (queue entries with
+YouTube authors), takes the real ``Room.to_dict()`` snapshot of each, then times the encoders the
+server uses for it: compact ``json.dumps`` (what Socket.IO packets and the replay logs used) and
+``json_codec.dumps``, plus the matching ``loads``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+
+from flask import Flask  # noqa: E402
+
+from server.extensions import db  # noqa: E402
+from server.lib import json_codec  # noqa: E402
+from server.models import Queue, QueueEntry, Room, User, YouTubeAuthor  # noqa: E402
+
+WORDS = (
+    "live lofi remix official video music mix chill beats tutorial review trailer "
+    "highlights podcast episode full album cover acoustic session speedrun guide "
+    "reaction compilation documentary interview stream anime opening ending jazz"
+).split()
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).title()
+
+
+def _build_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    db.init_app(app)
+    return app
+
+
+def _populate_room(rng: random.Random, owner: User, authors: list[YouTubeAuthor], entries: int) -> int:
+    room = Room(owner_id=owner.id, state="playing")
+    db.session.add(room)
+    db.session.flush()
+    queue = Queue(room_id=room.id, created_by_id=owner.id)
+    db.session.add(queue)
+    db.session.flush()
+    room.current_queue_id = queue.id
+    for position in range(1, entries + 1):
+        video_id = f"{rng.getrandbits(66):011x}"[:11]
+        author = rng.choice(authors)
+        db.session.add(
+            QueueEntry(
+                queue_id=queue.id,
+                added_by_id=owner.id,
+                url=f"https://www.youtube.com/watch?v={video_id}",
+                video_id=video_id,
+                title=_title(rng),
+                thumbnail_url=f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+                youtube_author_id=author.id,
+                position=position,
+                status="queued",
+                duration_ms=rng.randint(60_000, 3_600_000),
+            )
+        )
+    db.session.commit()
+    return room.id
+
+
+def _cpu_us(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", default="10,50,200", help="comma-separated queue sizes")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"codec: {json_codec.codec_name()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _build_app(os.path.join(tmp, "bench.db"))
+        with app.app_context():
+            db.create_all()
+            owner = User(name="Bench Owner")
+            db.session.add(owner)
+            authors = [
+                YouTubeAuthor(
+                    channel_id=f"UC{rng.getrandbits(110):022x}",
+                    title=f"{_title(rng)} Channel",
+                    description=" ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+                    thumbnail_url=f"https://yt3.ggpht.com/{rng.getrandbits(200):050x}=s88-c-k",
+                    subscriber_count=rng.randint(100, 10_000_000),
+                )
+                for _ in range(50)
+            ]
+            db.session.add_all(authors)
+            db.session.commit()
+
+            for entries in (int(n) for n in args.entries.split(",") if n.strip()):
+                room_id = _populate_room(rng, owner, authors, entries)
+                snapshot = db.session.get(Room, room_id).to_dict()
+                encoded = json.dumps(snapshot, separators=(",", ":"))
+                size_mb = len(encoded.encode("utf-8")) / 1e6
+                iterations = max(20, args.iterations * 10 // max(10, entries))
+
+                stdlib_dumps = _cpu_us(lambda: json.dumps(snapshot, separators=(",", ":")), iterations)
+                codec_dumps = _cpu_us(lambda: json_codec.dumps(snapshot), iterations)
+                stdlib_loads = _cpu_us(lambda: json.loads(encoded), iterations)
+                codec_loads = _cpu_us(lambda: json_codec.loads(encoded), iterations)
+
+                print(f"room.to_dict() with {entries} entries: {len(encoded):,} B")
+                print(
+                    f"  dumps  stdlib {stdlib_dumps:>8.1f} us ({size_mb / stdlib_dumps * 1e6:7.1f} MB/s)"
+                    f"  codec {codec_dumps:>8.1f} us ({size_mb / codec_dumps * 1e6:7.1f} MB/s)"
+                    f"  {stdlib_dumps / codec_dumps:5.1f}x"
+                )
+                print(
+                    f"  loads  stdlib {stdlib_loads:>8.1f} us ({size_mb / stdlib_loads * 1e6:7.1f} MB/s)"
+                    f"  codec {codec_loads:>8.1f} us ({size_mb / codec_loads * 1e6:7.1f} MB/s)"
+                    f"  {stdlib_loads / codec_loads:5.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark playback-control latency (p50/p99) under a queue.add flood, with and without lanes.
+
+Usage (from backend/ShareTube-v1-03):
+    python -m tooling.bench.bench_priority_lanes --adds 200 --controls 200 --api-ms 400
+
+Drives the real Socket.IO server's event dispatch (``socketio.server._trigger_event``, one
+thread per event like python-socketio's async handlers) with simulated handlers:
+- ``queue.add`` checks out a DB connection (``require_room`` does, and the session keeps it),
+  makes two YouTube API calls of ``--api-ms`` each, then takes the SQLite write lock to commit;
+- ``room.control.pause`` checks out a connection and takes the write lock for ``--db-ms``.
+The connection pool is ``--db-pool`` wide (SQLAlchemy's default QueuePool allows 5 + 10 overflow).
+The flood runs once through the plain dispatch and once after ``install_admission_control()``,
+which puts adds in the bounded bulk lane and pause in the reserved control lane.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+
+from flask import Flask  # noqa: E402
+
+from server.config import Config  # noqa: E402
+from server.extensions import socketio  # noqa: E402
+from server.lib import admission, metrics  # noqa: E402
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _register_handlers(db_pool: threading.BoundedSemaphore, write_lock: threading.Lock, args) -> None:
+    def on_add(_sid, _data):
+        with db_pool:
+            time.sleep(args.api_ms / 1000)  # fetch_video_meta
+            time.sleep(args.api_ms / 1000)  # fetch_youtube_channel_meta
+            with write_lock:
+                time.sleep(args.db_ms / 1000)
+        return "ok"
+
+    def on_pause(_sid, _data):
+        with db_pool:
+            with write_lock:
+                time.sleep(args.db_ms / 1000)
+        return "ok"
+
+    socketio.server.on("queue.add", on_add)
+    socketio.server.on("room.control.pause", on_pause)
+
+
+def _flood(args) -> tuple[list[float], int, int]:
+    """Run one flood; returns (control latencies in ms, adds completed, adds rejected)."""
+    control_ms: list[float] = []
+    results = {"added": 0, "rejected": 0}
+    lock = threading.Lock()
+
+    def dispatch(event: str) -> None:
+        start = time.perf_counter()
+        result = socketio.server._trigger_event(event, "/", "bench-sid", {"code": "bench"})
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if event == "room.control.pause":
+                control_ms.append(elapsed)
+            elif isinstance(result, dict) and result.get("error"):
+                results["rejected"] += 1
+            else:
+                results["added"] += 1
+
+    threads = []
+    spread = args.api_ms * 2 / 1000
+    for _ in range(args.adds):
+        threads.append(threading.Thread(target=dispatch, args=("queue.add",)))
+        threads[-1].start()
+        time.sleep(spread / max(1, args.adds))
+    for _ in range(args.controls):
+        threads.append(threading.Thread(target=dispatch, args=("room.control.pause",)))
+        threads[-1].start()
+        time.sleep(spread / max(1, args.controls))
+    for thread in threads:
+        thread.join()
+    return control_ms, results["added"], results["rejected"]
+
+
+def _report(label: str, control_ms: list[float], added: int, rejected: int, seconds: float) -> None:
+    print(
+        f"{label:<9} control p50 {_percentile(control_ms, 50):8.1f} ms  p99 {_percentile(control_ms, 99):8.1f} ms"
+        f"  max {max(control_ms, default=0):8.1f} ms  adds done {added:>4} rejected {rejected:>4}"
+        f"  wall {seconds:6.1f} s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--adds", type=int, default=200)
+    parser.add_argument("--controls", type=int, default=200)
+    parser.add_argument("--api-ms", type=float, default=400, help="latency of each YouTube API call")
+    parser.add_argument("--db-ms", type=float, default=2, help="time each handler holds the write lock")
+    parser.add_argument("--db-pool", type=int, default=15, help="DB connections (pool_size + max_overflow)")
+    parser.add_argument("--bulk", type=int, default=int(getattr(Config, "SOCKETIO_BULK_CONCURRENCY", 4)))
+    args = parser.parse_args()
+
+    Config.SOCKETIO_BULK_CONCURRENCY = args.bulk
+    socketio.init_app(Flask(__name__), async_mode="threading")
+    _register_handlers(threading.BoundedSemaphore(args.db_pool), threading.Lock(), args)
+
+    print(f"{args.adds} queue.add ({2 * args.api_ms:.0f} ms external I/O each), {args.controls} pauses")
+    for label in ("no lanes", "lanes"):
+        if label == "lanes":
+            admission.install_admission_control()
+        metrics.reset()
+        start = time.perf_counter()
+        control_ms, added, rejected = _flood(args)
+        _report(label, control_ms, added, rejected, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark queue.search (FTS5 vs LIKE fallback) against a synthetic history.
+
+Usage (from backend/ShareTube-v1-03):
+    python -m tooling.bench.bench_queue_search --rows 100000 --rooms 50
+
+Builds a throwaway SQLite database, inserts ``--rows`` queue entries spread across ``--rooms``
+rooms (the FTS index is filled by the sync triggers, so insert time includes indexing), then
+times ranked searches for one room through both search paths.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+
+from flask import Flask  # noqa: E402
+
+from server.extensions import db  # noqa: E402
+from server.helpers import search  # noqa: E402
+from server.models import Queue, QueueEntry, Room, YouTubeAuthor  # noqa: E402
+
+WORDS = (
+    "live lofi remix official video music mix chill beats tutorial review trailer "
+    "highlights podcast episode full album cover acoustic session speedrun guide "
+    "reaction compilation documentary interview stream anime opening ending jazz "
+    "piano guitar drum metal synthwave retro gaming minecraft zelda mario cooking"
+).split()
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))).title()
+
+
+def _build_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    db.init_app(app)
+    return app
+
+
+def _populate(rows: int, rooms: int, rng: random.Random) -> list[int]:
+    room_ids: list[int] = []
+    for _ in range(rooms):
+        room = Room()
+        db.session.add(room)
+        db.session.flush()
+        queue = Queue(room_id=room.id)
+        db.session.add(queue)
+        db.session.flush()
+        room.current_queue_id = queue.id
+        room_ids.append(room.id)
+    authors = [
+        YouTubeAuthor(channel_id=f"UC{i:020d}", title=f"{_title(rng)} Channel")
+        for i in range(max(1, rows // 200))
+    ]
+    db.session.add_all(authors)
+    db.session.commit()
+
+    queue_ids = [q.id for q in Queue.query.all()]
+    author_ids = [a.id for a in authors]
+    batch: list[dict] = []
+    for i in range(rows):
+        batch.append(
+            {
+                "queue_id": rng.choice(queue_ids),
+                "url": f"https://www.youtube.com/watch?v=bench{i}",
+                "video_id": f"bench{i}",
+                "youtube_author_id": rng.choice(author_ids),
+                "title": _title(rng),
+                "position": i + 1,
+                "status": rng.choice(("queued", "watched", "watched", "skipped")),
+                "added_at": int(time.time()) - rng.randint(0, 86400 * 90),
+            }
+        )
+        if len(batch) >= 5000:
+            db.session.execute(QueueEntry.__table__.insert(), batch)
+            batch.clear()
+    if batch:
+        db.session.execute(QueueEntry.__table__.insert(), batch)
+    db.session.commit()
+    return room_ids
+
+
+def _time(fn, iterations: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _build_app(os.path.join(tmp, "bench.db"))
+        with app.app_context():
+            db.create_all()
+            with db.engine.begin() as conn:
+                if not search.ensure_queue_search_index(conn):
+                    print("FTS5 unavailable in this SQLite build; only the LIKE path will run")
+
+            start = time.perf_counter()
+            room_ids = _populate(args.rows, args.rooms, rng)
+            print(f"inserted {args.rows} entries across {args.rooms} rooms in {time.perf_counter() - start:.2f}s")
+
+            room_id = room_ids[0]
+            queries = ["lofi", "jazz piano", "official music video", "speedr", "zelda ost"]
+            for q in queries:
+                match = search.build_match_query(q)
+                paths = [("like", lambda: search._search_like(room_id, q, 21, 0))]
+                if search._fts_ready():
+                    paths.insert(0, ("fts5", lambda: search._search_fts(room_id, match, 21, 0)))
+                for name, fn in paths:
+                    p50, p95 = _time(fn, args.iterations)
+                    print(f"{name:>5} q={q!r:<24} p50={p50:7.2f}ms p95={p95:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
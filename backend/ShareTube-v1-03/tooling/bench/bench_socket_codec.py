@@ -0,0 +1,174 @@
+"""
+Benchmark Socket.IO payload size and encode/decode CPU: JSON text frames vs msgpack frames.
+
+Usage (from backend/ShareTube-v1-03):
+    python -m tooling.bench.bench_socket_codec --entries 10,50,200 --iterations 2000
+
+Builds realistic payloads shaped like ``room.playback`` (one ``current_entry`` with its YouTube
+author) and ``room.join`` / ``queue.sync`` snapshots (``room.to_dict()`` with ``--entries`` queue
+entries), then compares the default JSON packet (``2["event",{...}]``) against the binary
+``emit.packed`` frame negotiated with ``?codec=msgpack`` (``msgpack({"event", "data"})`` sent as a
+Socket.IO attachment, plus its small placeholder header). Times are process CPU per payload; the
+msgpack frame is built once per broadcast, so encode cost is paid once per worker, not per socket.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+import msgpack
+from socketio import packet as sio_packet
+
+PACKED_EVENT = "emit.packed"
+
+WORDS = (
+    "live lofi remix official video music mix chill beats tutorial review trailer "
+    "highlights podcast episode full album cover acoustic session speedrun guide "
+    "reaction compilation documentary interview stream anime opening ending jazz"
+).split()
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).title()
+
+
+def _author(rng: random.Random, author_id: int) -> dict:
+    # Mirrors YouTubeAuthor.to_dict()
+    return {
+        "id": author_id,
+        "channel_id": f"UC{rng.getrandbits(110):022x}",
+        "title": f"{_title(rng)} Channel",
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))),
+        "custom_url": f"@{rng.choice(WORDS)}{author_id}",
+        "country": rng.choice(("US", "GB", "DE", "JP", None)),
+        "thumbnail_url": f"https://yt3.ggpht.com/{rng.getrandbits(200):050x}=s88-c-k-c0x00ffffff-no-rj",
+        "published_at": "2014-03-0%dT12:00:00Z" % rng.randint(1, 9),
+        "subscriber_count": rng.randint(100, 10_000_000),
+        "view_count": rng.randint(10_000, 2_000_000_000),
+        "video_count": rng.randint(5, 5000),
+        "last_seen_ms": int(time.time() * 1000),
+    }
+
+
+def _entry(rng: random.Random, entry_id: int, position: int) -> dict:
+    # Mirrors QueueEntry.to_dict()
+    video_id = f"{rng.getrandbits(66):011x}"[:11]
+    author_id = rng.randint(1, 500)
+    return {
+        "id": entry_id,
+        "queue_id": 1,
+        "added_by_id": rng.randint(1, 8),
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "video_id": video_id,
+        "title": _title(rng),
+        "thumbnail_url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+        "youtube_author_id": author_id,
+        "youtube_author": _author(rng, author_id),
+        "position": position,
+        "status": "queued",
+        "watch_count": rng.randint(0, 3),
+        "duration_ms": rng.randint(60_000, 3_600_000),
+        "playing_since_ms": None,
+        "progress_ms": 0,
+        "paused_at": None,
+    }
+
+
+def _room_snapshot(rng: random.Random, entries: int) -> dict:
+    # Mirrors Room.to_dict() with its current queue
+    queue_entries = [_entry(rng, i + 1, i + 1) for i in range(entries)]
+    current = dict(queue_entries[0], status="playing", playing_since_ms=int(time.time() * 1000))
+    return {
+        "id": 1,
+        "code": "bench-room-code",
+        "owner_id": 1,
+        "created_at": int(time.time()),
+        "is_private": False,
+        "control_mode": "owner_and_operators",
+        "ad_sync_mode": "pause_all",
+        "autoadvance_on_end": True,
+        "state": "playing",
+        "current_queue_id": 1,
+        "current_queue": {
+            "id": 1,
+            "room_id": 1,
+            "created_by_id": 1,
+            "creator": {"id": 1, "name": "Bench Owner", "picture": None, "ready": None, "fake_user": False},
+            "created_at": int(time.time()),
+            "version": 42,
+            "entries": queue_entries,
+            "current_entry": current,
+        },
+        "operators": [1, 2],
+        "memberships": list(range(1, 9)),
+    }
+
+
+def _playback(rng: random.Random) -> dict:
+    entry = dict(_entry(rng, 1, 1), status="playing", playing_since_ms=int(time.time() * 1000))
+    return {
+        "trigger": "user.ready",
+        "code": "bench-room-code",
+        "state": "playing",
+        "playing_since_ms": entry["playing_since_ms"],
+        "progress_ms": 0,
+        "current_entry": entry,
+        "actor_user_id": 3,
+        "seq": 1234,
+    }
+
+
+def _json_frame(event: str, data: dict) -> str:
+    return sio_packet.Packet(sio_packet.EVENT, data=[event, data]).encode()
+
+
+def _packed_frame(event: str, data: dict) -> list:
+    # Mirrors socket_codec._pack()
+    blob = msgpack.packb({"event": event, "data": data}, default=str, use_bin_type=True)
+    return sio_packet.Packet(sio_packet.EVENT, data=[PACKED_EVENT, blob]).encode()
+
+
+def _cpu_us(fn, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def _compare(label: str, event: str, data: dict, iterations: int) -> None:
+    text = _json_frame(event, data)
+    header, blob = _packed_frame(event, data)
+    json_bytes = len(text.encode("utf-8"))
+    packed_bytes = len(header.encode("utf-8")) + len(blob)
+
+    json_encode = _cpu_us(lambda: _json_frame(event, data), iterations)
+    packed_encode = _cpu_us(lambda: _packed_frame(event, data), iterations)
+    body = text[1:]
+    json_decode = _cpu_us(lambda: json.loads(body), iterations)
+    packed_decode = _cpu_us(lambda: msgpack.unpackb(blob, raw=False), iterations)
+
+    print(f"{label}")
+    print(f"  size    json {json_bytes:>9,} B   msgpack {packed_bytes:>9,} B   ({packed_bytes / json_bytes:6.1%})")
+    print(f"  encode  json {json_encode:>9.1f} us  msgpack {packed_encode:>9.1f} us")
+    print(f"  decode  json {json_decode:>9.1f} us  msgpack {packed_decode:>9.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", default="10,50,200", help="comma-separated queue sizes")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    _compare("room.playback (current_entry)", "room.playback", _playback(rng), args.iterations)
+    for entries in (int(n) for n in args.entries.split(",") if n.strip()):
+        iterations = max(20, args.iterations * 10 // max(10, entries))
+        _compare(f"room.join snapshot ({entries} entries)", "user.join.result", _room_snapshot(rng, entries), iterations)
+
+
+if __name__ == "__main__":
+    main()
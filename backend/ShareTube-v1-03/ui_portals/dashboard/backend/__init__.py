@@ -11,6 +11,7 @@ from flask import Blueprint, current_app, jsonify, render_template, request, mak
 # from ....extensions import db
 
 from server.models import User 
+from server.lib import metrics
 from server.lib.utils import now_ms
 
 SECURE_DASHBOARD_UUID = "f4c6c472-3a2b-446e-a9a0-9e3a9f3ebf9e"
@@ -263,6 +264,15 @@ def get_queues():
     return jsonify({"queues": DashboardData.get_queues_data()})
 
 
+@dashboard_bp.route("/api/metrics")
+@require_auth
+def get_metrics():
+    """
+    Return realtime counters (presence coalescing, fan-out, rate control) for this worker.
+    """
+    return jsonify(metrics.snapshot())
+
+
 @dashboard_bp.route("/api/health")
 def get_health():
     """
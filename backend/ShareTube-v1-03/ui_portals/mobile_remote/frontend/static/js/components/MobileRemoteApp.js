@@ -81,7 +81,9 @@ export default class MobileRemoteApp {
 
     bindSocketListeners() {
         this.socket.on("presence.update", this.roomManager.onSocketPresenceUpdate.bind(this.roomManager));
-        this.socket.on("user.ready.update", this.roomManager.onSocketUserReadyUpdate.bind(this.roomManager));
+        this.socket.on("presence.joined", this.roomManager.onSocketPresenceJoined.bind(this.roomManager));
+        this.socket.on("presence.left", this.roomManager.onSocketPresenceLeft.bind(this.roomManager));
+        this.socket.on("presence.ready", this.roomManager.onSocketPresenceReady.bind(this.roomManager));
         this.socket.on("client.verify_connection", this.onClientVerifyConnection.bind(this));
         this.socket.setupBeforeUnloadHandler();
     }